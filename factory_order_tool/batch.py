@@ -0,0 +1,315 @@
+"""批量转换模块 - 一次转换整个文件夹的采购单PDF
+
+工作流:
+  1. 展开输入（目录 / 通配符）得到PDF列表
+  2. 主进程只加载一次映射表，通过进程池初始化函数分发给各工作进程
+  3. 各进程独立完成 解析 → 映射 → 导出（每份采购单一个Excel）
+  4. 可选: 按输入顺序把所有行合并写入一个汇总Excel，和/或追加到当日汇总（daily_export）
+  5. 返回每个文件的汇总（行数、未映射料号、失败原因），并写入 batch_summary.json
+
+用法:
+    python batch.py <PDF目录或通配符> -o <输出目录> [--workers N] [--consolidated 汇总.xlsx]
+                    [--daily [当日汇总目录]]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from code_mapper import MappedColumns, NormalizedIndex, map_columns
+from config import DAILY_EXPORT_DIR
+from excel_writer import write_output_excel
+from mapping_store import load_mapping
+from pdf_parser import parse_purchase_order
+
+BATCH_SUMMARY_NAME = "batch_summary.json"
+
+_DAILY_STATUS_TEXT = {"added": "已追加", "replaced": "已替换", "unchanged": "未变化"}
+
+# 工作进程内的映射表（由 _init_worker 设置，每个进程只反序列化一次）
+_worker_mapping = {}
+_worker_normalized = None  # 映射字典的规范化索引（每个进程构建一次；映射库自带）
+
+
+def collect_pdf_files(source):
+    """
+    展开输入为PDF文件列表（按文件名排序）。
+
+    参数:
+        source: str | list[str] - 目录、通配符或文件路径（可多个）
+    """
+    sources = [source] if isinstance(source, str) else list(source)
+    files = []
+    for src in sources:
+        if os.path.isdir(src):
+            pattern = os.path.join(src, "*")
+            files.extend(
+                p for p in glob.glob(pattern) if p.lower().endswith(".pdf")
+            )
+        else:
+            files.extend(glob.glob(src))
+    # 去重并保持确定的顺序
+    return sorted(set(files), key=lambda p: os.path.basename(p).lower())
+
+
+def run_batch(source, output_dir, workers=None, consolidated_path=None,
+              mapping=None, write_per_file=True, daily_dir=None):
+    """
+    批量转换采购单PDF。
+
+    参数:
+        source: str | list[str] - PDF目录、通配符或文件路径
+        output_dir: str - 输出目录（每份采购单一个 工厂订单_{采购单号}.xlsx；采购单号重复时
+                    —— 修订版与原版、重复扫描 —— 按输入顺序，后出现的文件名追加PDF文件名，互不覆盖）
+        workers: int | None - 进程数（None 按CPU核数）
+        consolidated_path: str | None - 若提供，额外输出合并所有采购单的汇总Excel
+        mapping: dict | SqliteMappingStore | None - 映射
+                 （None 则按 config.MAPPING_BACKEND 加载 mapping_table.xlsx；
+                 映射库按路径传给各工作进程，各自打开只读连接）
+        write_per_file: bool - 是否逐份输出Excel
+        daily_dir: str | None - 若提供，按输入顺序把各采购单追加到该目录的当日汇总并整理出汇总Excel
+                   （同一采购单重复转换时替换，见 daily_export）
+
+    返回:
+        summaries: list[dict] - 每个文件的结果（按输入顺序）
+            pdf, order_no, rows, mapped, unmapped_codes, output, error, seconds,
+            duplicate_of（采购单号与之重复的、输入顺序在前的PDF，不重复时为空）
+            （追加到当日汇总时另有 daily: added / replaced / unchanged）
+    """
+    pdf_files = collect_pdf_files(source)
+    if mapping is None:
+        mapping, _ = load_mapping()
+    os.makedirs(output_dir, exist_ok=True)
+
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(pdf_files) or 1))
+    keep_rows = consolidated_path is not None or daily_dir is not None
+
+    results = {}
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(mapping,)
+    ) as executor:
+        # 各进程先写到按输入序号命名的临时文件，全部完成后再按输入顺序确定最终文件名
+        futures = {
+            executor.submit(
+                _convert_one, path, write_per_file, keep_rows,
+                os.path.join(output_dir, f"~batch_{os.getpid()}_{i:05d}.xlsx"),
+            ): path
+            for i, path in enumerate(pdf_files)
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results[path] = future.result()
+            except Exception as e:  # 进程异常退出等
+                results[path] = _failed_summary(path, e)
+
+    summaries = [results[path] for path in pdf_files]
+    _assign_output_names(summaries, output_dir)
+
+    if daily_dir is not None:
+        _append_daily(summaries, daily_dir)
+
+    if consolidated_path:
+        all_rows = MappedColumns()
+        for summary in summaries:
+            columns = summary.pop("_rows", None)
+            if columns is not None:
+                all_rows.extend(columns)
+        write_output_excel(all_rows, consolidated_path)
+    else:
+        for summary in summaries:
+            summary.pop("_rows", None)
+
+    _write_summary_file(output_dir, summaries)
+    return summaries
+
+
+def format_batch_summary(summaries):
+    """生成可读的批量转换汇总文本"""
+    lines = []
+    ok = [s for s in summaries if not s["error"]]
+    failed = [s for s in summaries if s["error"]]
+    total_rows = sum(s["rows"] for s in ok)
+
+    for s in summaries:
+        name = os.path.basename(s["pdf"])
+        if s["error"]:
+            lines.append(f"✗ {name}: 失败 - {s['error']}")
+            continue
+        line = f"✓ {name}: {s['rows']}行, 映射{s['mapped']}行"
+        if s["unmapped_codes"]:
+            line += f", 未映射{len(s['unmapped_codes'])}个料号: " + ", ".join(
+                s["unmapped_codes"]
+            )
+        if s["duplicate_of"]:
+            line += f", 采购单号与 {os.path.basename(s['duplicate_of'])} 重复"
+            if s["output"]:
+                line += f"，另存为 {os.path.basename(s['output'])}"
+        if s.get("daily"):
+            line += f", 当日汇总: {_DAILY_STATUS_TEXT[s['daily']]}"
+        lines.append(line)
+
+    lines.append(
+        f"共{len(summaries)}个文件: 成功{len(ok)}个, 失败{len(failed)}个, 合计{total_rows}行"
+    )
+    return "\n".join(lines)
+
+
+def _assign_output_names(summaries, output_dir):
+    """
+    按输入顺序把各临时文件改名为 工厂订单_{采购单号}.xlsx。
+
+    同一采购单号第二次出现时改用 工厂订单_{采购单号}_{PDF文件名}.xlsx（仍重复再加序号），
+    并在 duplicate_of 中记录首次出现的PDF。
+    """
+    first_pdf = {}
+    taken = set()
+    for summary in summaries:
+        pdf_stem = os.path.splitext(os.path.basename(summary["pdf"]))[0]
+        stem = summary["order_no"] or pdf_stem
+        if not summary["error"]:
+            if stem in first_pdf:
+                summary["duplicate_of"] = first_pdf[stem]
+            else:
+                first_pdf[stem] = summary["pdf"]
+
+        tmp_path = summary["output"]
+        if not tmp_path:
+            continue
+        name = f"工厂订单_{stem}.xlsx"
+        if name in taken:
+            name = f"工厂订单_{stem}_{pdf_stem}.xlsx"
+            n = 2
+            while name in taken:
+                name = f"工厂订单_{stem}_{pdf_stem}_{n}.xlsx"
+                n += 1
+        taken.add(name)
+        output_path = os.path.join(output_dir, name)
+        try:
+            os.replace(tmp_path, output_path)
+        except OSError as e:  # 目标文件在 Excel 中打开等
+            summary["error"] = f"输出文件无法写入: {output_path} ({e})"
+            summary["output"] = ""
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            continue
+        summary["output"] = output_path
+
+
+def _append_daily(summaries, daily_dir):
+    """按输入顺序把成功转换的采购单追加到当日汇总，全部追加后整理一次"""
+    from daily_export import append_order, compact_daily_log, daily_log_path
+
+    log_path = daily_log_path(daily_dir)
+    for summary in summaries:
+        columns = summary.get("_rows")
+        if summary["error"] or columns is None:
+            continue
+        order_no = summary["order_no"] or os.path.splitext(os.path.basename(summary["pdf"]))[0]
+        summary["daily"] = append_order(log_path, columns, order_no, summary["pdf"])["status"]
+    if os.path.exists(log_path):
+        compact_daily_log(log_path)
+
+
+# ========== 工作进程 ==========
+
+def _init_worker(mapping):
+    """进程池初始化: 保存共享的映射表并构建规范化索引"""
+    global _worker_mapping, _worker_normalized
+    _worker_mapping = mapping
+    if isinstance(mapping, dict):
+        _worker_normalized = NormalizedIndex(mapping)
+
+
+def _convert_one(pdf_path, write_file, keep_rows, tmp_path):
+    """工作进程: 解析 → 映射 → 导出单份采购单（写到 tmp_path，由主进程改为最终文件名）"""
+    start = time.perf_counter()
+    output_path = ""
+    try:
+        # 批量模式已按文件并行，单文件内部不再开进程
+        header_info, items = parse_purchase_order(pdf_path, workers=1)
+        # 列式映射: 导出时逐行生成，汇总时以列的形式传回主进程（比行字典小）
+        columns = map_columns(items, _worker_mapping, _worker_normalized)
+        total, mapped, _ = columns.stats()
+
+        order_no = header_info.get("采购单号", "")
+        if write_file and total:
+            output_path = tmp_path
+            write_output_excel(columns, output_path)
+    except Exception as e:
+        if output_path and os.path.exists(output_path):
+            try:
+                os.remove(output_path)
+            except OSError:
+                pass
+        return _failed_summary(pdf_path, e, time.perf_counter() - start)
+
+    summary = {
+        "pdf": pdf_path,
+        "order_no": order_no,
+        "rows": total,
+        "mapped": mapped,
+        "unmapped_codes": sorted(set(columns.unmapped)),
+        "output": output_path,
+        "error": "" if total else "未从PDF中解析到任何订单数据",
+        "seconds": round(time.perf_counter() - start, 3),
+        "duplicate_of": "",
+    }
+    if keep_rows:
+        summary["_rows"] = columns
+    return summary
+
+
+def _failed_summary(pdf_path, error, seconds=0.0):
+    return {
+        "pdf": pdf_path,
+        "order_no": "",
+        "rows": 0,
+        "mapped": 0,
+        "unmapped_codes": [],
+        "output": "",
+        "error": str(error) or type(error).__name__,
+        "seconds": round(seconds, 3),
+        "duplicate_of": "",
+    }
+
+
+def _write_summary_file(output_dir, summaries):
+    """汇总写入输出目录，便于事后核对（写入失败不影响转换结果）"""
+    try:
+        with open(
+            os.path.join(output_dir, BATCH_SUMMARY_NAME), "w", encoding="utf-8"
+        ) as f:
+            json.dump(summaries, f, ensure_ascii=False, indent=2)
+    except OSError:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量转换采购单PDF为工厂Excel")
+    parser.add_argument("source", nargs="+", help="PDF目录、通配符或文件")
+    parser.add_argument("-o", "--output-dir", required=True, help="输出目录")
+    parser.add_argument("--workers", type=int, default=None, help="进程数（默认CPU核数）")
+    parser.add_argument("--consolidated", default=None, help="额外输出汇总Excel路径")
+    parser.add_argument("--daily", nargs="?", const=DAILY_EXPORT_DIR, default=None,
+                        help="追加到当日汇总（可指定目录，默认程序目录下 daily_export）")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    summaries = run_batch(
+        args.source, args.output_dir, args.workers, args.consolidated,
+        daily_dir=args.daily,
+    )
+    print(format_batch_summary(summaries))
+    print(f"耗时 {time.perf_counter() - start:.2f}s")
+    return 1 if any(s["error"] for s in summaries) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
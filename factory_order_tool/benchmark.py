@@ -0,0 +1,635 @@
+"""性能基准脚本（开发用，不参与打包）
+
+用法:
+    python benchmark.py parse <采购单.pdf> [--workers N]
+    python benchmark.py parity [<PDF文件或目录>...]   （不指定时使用生成的测试采购单，需要 reportlab）
+    python benchmark.py mapping [--xlsx 映射表.xlsx] [--rows 100000] [--sheets 5]
+    python benchmark.py apply [--rows 50000] [--codes 2000]
+    python benchmark.py export [--rows 1000 10000 100000] [--memory]
+    python benchmark.py xlsx [--rows 1000 20000 200000] [--skip-openpyxl] [--memory]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+
+def _timed(func, *args, **kwargs):
+    """执行函数并返回 (结果, 耗时秒)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def bench_parse(args):
+    """串行解析 vs 多进程解析，同一文件对比耗时并校验结果一致"""
+    from pdf_parser import parse_purchase_order
+
+    workers = args.workers or os.cpu_count() or 1
+
+    (header_s, items_s), t_serial = _timed(
+        parse_purchase_order, args.pdf, workers=1
+    )
+    (header_p, items_p), t_parallel = _timed(
+        parse_purchase_order, args.pdf, workers=workers
+    )
+
+    print(f"文件: {args.pdf}")
+    print(f"串行:   {t_serial:.3f}s  ({len(items_s)} 项)")
+    print(f"并行:   {t_parallel:.3f}s  ({len(items_p)} 项, {workers} 进程)")
+    print(f"加速比: {t_serial / t_parallel:.2f}x")
+
+    if header_s != header_p or items_s != items_p:
+        print("错误: 并行结果与串行结果不一致")
+        return 1
+    print("结果一致")
+    return 0
+
+
+def bench_parity(args):
+    """
+    pdfplumber 与 pdfium 两个解析后端在PDF语料上的一致性校验（头部信息和 items 必须完全相同），
+    同时校验页面分拣不改变结果（与不分拣的 pdfplumber 解析比较）。
+    未指定PDF时生成测试采购单（含封面、带签字栏表格的条款页和只有上一页备注续行的页面），
+    并校验备注续行的归属（跨页续行并入上一页最后一个项目，签字栏不并入任何项目）。
+    """
+    import tempfile
+    import pdf_parser
+    from pdf_parser import parse_purchase_order
+
+    tmp_dir = None
+    if args.paths:
+        pdf_files = _collect_pdfs(args.paths)
+    else:
+        tmp_dir = tempfile.TemporaryDirectory()
+        pdf_files = _generate_order_pdfs(tmp_dir.name)
+        print(f"已生成 {len(pdf_files)} 份测试采购单")
+    if not pdf_files:
+        print("未找到PDF文件")
+        return 1
+
+    failed = 0
+    total_plumber = total_pdfium = 0.0
+    for path in pdf_files:
+        (header_a, items_a), t_a = _timed(
+            parse_purchase_order, path, workers=1, backend="pdfplumber"
+        )
+        (header_b, items_b), t_b = _timed(
+            parse_purchase_order, path, backend="pdfium"
+        )
+        total_plumber += t_a
+        total_pdfium += t_b
+
+        triage = pdf_parser.PDF_PAGE_TRIAGE_ENABLED
+        pdf_parser.PDF_PAGE_TRIAGE_ENABLED = False
+        try:
+            _, items_full = parse_purchase_order(path, workers=1, backend="pdfplumber")
+        finally:
+            pdf_parser.PDF_PAGE_TRIAGE_ENABLED = triage
+
+        diffs = _diff_items(items_a, items_b)
+        if tmp_dir:
+            diffs += [f"备注: {d}" for d in _check_generated_remarks(items_a)]
+        diffs += [f"分拣: {d}" for d in _diff_items(items_full, items_a)]
+        # 头部信息决定列模板（供应商）和输出文件名（采购单号），不同同样算不一致
+        diffs += [
+            f"头部 {key}: {header_a.get(key)!r} vs {header_b.get(key)!r}"
+            for key in sorted(set(header_a) | set(header_b))
+            if header_a.get(key) != header_b.get(key)
+        ]
+        status = "一致" if not diffs else f"不一致({len(diffs)}处)"
+        print(f"{os.path.basename(path)}: {status}  "
+              f"pdfplumber {t_a:.3f}s / pdfium {t_b:.3f}s  ({len(items_a)} 项)")
+        for diff in diffs[:5]:
+            print(f"    {diff}")
+        if diffs:
+            failed += 1
+
+    if tmp_dir:
+        tmp_dir.cleanup()
+
+    print(f"\n共 {len(pdf_files)} 个文件，{failed} 个不一致")
+    if total_pdfium:
+        print(f"总耗时: pdfplumber {total_plumber:.3f}s / pdfium {total_pdfium:.3f}s "
+              f"（{total_plumber / total_pdfium:.2f}x）")
+    return 1 if failed else 0
+
+
+def bench_mapping(args):
+    """映射表读取: openpyxl vs 流式XML读取，对比耗时并校验映射字典完全一致"""
+    import tempfile
+    from code_mapper import (
+        _build_mapping,
+        _iter_mapping_rows_fast,
+        _iter_mapping_rows_openpyxl,
+    )
+
+    path = args.xlsx
+    tmp_dir = None
+    if not path:
+        tmp_dir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp_dir.name, "mapping_bench.xlsx")
+        _generate_mapping_workbook(path, args.rows, args.sheets)
+        print(f"已生成测试映射表: {args.rows} 行 / {args.sheets} 个sheet")
+
+    try:
+        mapping_o, t_o = _timed(_build_mapping, _iter_mapping_rows_openpyxl(path))
+        mapping_f, t_f = _timed(_build_mapping, _iter_mapping_rows_fast(path))
+    finally:
+        if tmp_dir:
+            tmp_dir.cleanup()
+
+    print(f"openpyxl: {t_o:.3f}s  ({len(mapping_o)} 条)")
+    print(f"流式XML:  {t_f:.3f}s  ({len(mapping_f)} 条)")
+    print(f"加速比:   {t_o / t_f:.2f}x")
+
+    if mapping_o != mapping_f:
+        print("错误: 两种读取方式结果不一致")
+        return 1
+    print("结果一致")
+    return 0
+
+
+def bench_apply(args):
+    """apply_mapping: 逐行字典（原实现）vs 列式映射，对比耗时、输出行内存并校验输出行完全一致"""
+    from code_mapper import NormalizedIndex, apply_mapping, map_columns
+
+    mapping, items = _generate_order_data(args.rows, args.codes)
+    normalized = NormalizedIndex(mapping)
+
+    (rows_old, unmapped_old), t_old = _timed(
+        _apply_mapping_rowwise, items, mapping, normalized
+    )
+    (rows_new, unmapped_new), t_new = _timed(apply_mapping, items, mapping, normalized)
+    columns, t_columns = _timed(map_columns, items, mapping, normalized)
+
+    print(f"{args.rows} 行 / {args.codes} 个料号")
+    print(f"逐行字典(原实现): {t_old:.3f}s")
+    print(f"列式映射+生成行:  {t_new:.3f}s  ({t_old / t_new:.2f}x)")
+    print(f"仅列式映射:       {t_columns:.3f}s  ({t_old / t_columns:.2f}x)")
+
+    if rows_old != rows_new or unmapped_old != unmapped_new:
+        print("错误: 列式映射结果与原实现不一致")
+        return 1
+    print("结果一致")
+
+    # 输出行常驻内存: 字典行 vs OutputRow 记录（单独测量，不影响上面的计时）
+    del rows_old, rows_new
+    mem_old = _retained_memory(_apply_mapping_rowwise, items, mapping, normalized)
+    mem_new = _retained_memory(apply_mapping, items, mapping, normalized)
+    print(
+        f"每行内存: 字典 {mem_old / args.rows:.0f} 字节 / "
+        f"记录 {mem_new / args.rows:.0f} 字节  ({mem_old / mem_new:.2f}x)"
+    )
+    return 0
+
+
+def bench_export(args):
+    """导出Excel: 逐格写入（原实现）vs 只写模式流式写出，对比耗时/峰值内存并校验表格内容和格式一致"""
+    import tempfile
+    from code_mapper import map_columns
+    from excel_writer import write_output_excel
+
+    status = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            mapping, items = _generate_order_data(rows, args.codes)
+            columns = map_columns(items, mapping, None)
+            old_path = os.path.join(tmp, f"cells_{rows}.xlsx")
+            new_path = os.path.join(tmp, f"stream_{rows}.xlsx")
+
+            _, t_old = _timed(_write_output_excel_cells, columns.rows(), old_path)
+            _, t_new = _timed(write_output_excel, columns, new_path)
+            print(f"{rows} 行:")
+            print(f"  逐格写入(原实现): {t_old:.3f}s  ({os.path.getsize(old_path) // 1024} KB)")
+            print(
+                f"  只写模式流式:     {t_new:.3f}s  ({os.path.getsize(new_path) // 1024} KB)"
+                f"  ({t_old / t_new:.2f}x)"
+            )
+            if args.memory:
+                peak_old = _peak_memory(_write_output_excel_cells, columns.rows(), old_path)
+                peak_new = _peak_memory(write_output_excel, columns, new_path)
+                print(
+                    f"  峰值内存: {peak_old / 1048576:.1f} MB → {peak_new / 1048576:.1f} MB"
+                )
+
+            if rows <= args.verify_rows:
+                diffs = _diff_workbooks(old_path, new_path)
+                if diffs:
+                    print("  错误: 输出不一致")
+                    for d in diffs[:10]:
+                        print(f"    {d}")
+                    status = 1
+                else:
+                    print("  内容/列宽/格式一致")
+    return status
+
+
+def bench_xlsx(args):
+    """导出Excel: openpyxl 只写模式 vs 直接写XML（xlsx_writer），对比耗时并校验读回的值/列宽/格式一致"""
+    import tempfile
+    from code_mapper import map_columns
+    from excel_writer import write_output_excel
+
+    status = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            mapping, items = _generate_order_data(rows, args.codes)
+            columns = map_columns(items, mapping, None)
+            old_path = os.path.join(tmp, f"openpyxl_{rows}.xlsx")
+            new_path = os.path.join(tmp, f"xml_{rows}.xlsx")
+
+            print(f"{rows} 行:")
+            if not args.skip_openpyxl:
+                _, t_old = _timed(write_output_excel, columns, old_path, "openpyxl")
+                print(f"  openpyxl只写模式: {t_old:.3f}s  ({os.path.getsize(old_path) // 1024} KB)")
+            _, t_new = _timed(write_output_excel, columns, new_path, "xml")
+            speedup = "" if args.skip_openpyxl else f"  ({t_old / t_new:.2f}x)"
+            print(f"  直接写XML:        {t_new:.3f}s  ({os.path.getsize(new_path) // 1024} KB){speedup}")
+            if args.memory:
+                peak = _peak_memory(write_output_excel, columns, new_path, "xml")
+                print(f"  直接写XML峰值内存: {peak / 1048576:.1f} MB")
+
+            if not args.skip_openpyxl and rows <= args.verify_rows:
+                diffs = _diff_workbooks(old_path, new_path)
+                if diffs:
+                    print("  错误: 输出不一致")
+                    for d in diffs[:10]:
+                        print(f"    {d}")
+                    status = 1
+                else:
+                    print("  内容/列宽/格式一致")
+    return status
+
+
+def _write_output_excel_cells(output_rows, output_path):
+    """原导出实现（普通工作簿逐格写入、每格新建样式对象），仅作基准对照"""
+    from openpyxl import Workbook
+    from openpyxl.styles import Alignment, Border, Font, Side
+    from config import OUTPUT_COLUMNS
+    from excel_writer import _COLUMN_WIDTHS, _col_letter
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Sheet1"
+    header_font = Font(bold=True, size=11)
+    thin_border = Border(
+        left=Side(style="thin"), right=Side(style="thin"),
+        top=Side(style="thin"), bottom=Side(style="thin"),
+    )
+    for col_idx, col_name in enumerate(OUTPUT_COLUMNS, 1):
+        cell = ws.cell(row=1, column=col_idx, value=col_name)
+        cell.font = header_font
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+        cell.border = thin_border
+    for row_idx, row_data in enumerate(output_rows, 2):
+        for col_idx, col_name in enumerate(OUTPUT_COLUMNS, 1):
+            value = row_data.get(col_name, "")
+            if col_name == "数量" and value:
+                try:
+                    value = float(str(value).replace(",", ""))
+                except (ValueError, TypeError):
+                    pass
+            cell = ws.cell(row=row_idx, column=col_idx, value=value)
+            cell.border = thin_border
+            cell.alignment = Alignment(vertical="center")
+    for col_idx, col_name in enumerate(OUTPUT_COLUMNS, 1):
+        ws.column_dimensions[_col_letter(col_idx)].width = _COLUMN_WIDTHS.get(col_name, 12)
+    wb.save(output_path)
+    wb.close()
+
+
+def _diff_workbooks(path_a, path_b):
+    """逐格比较两个导出文件的值、字体/对齐/边框和列宽，返回差异描述列表"""
+    from openpyxl import load_workbook
+
+    diffs = []
+    wb_a, wb_b = load_workbook(path_a), load_workbook(path_b)
+    ws_a, ws_b = wb_a.active, wb_b.active
+    if ws_a.title != ws_b.title:
+        diffs.append(f"工作表名: {ws_a.title!r} vs {ws_b.title!r}")
+    if (ws_a.max_row, ws_a.max_column) != (ws_b.max_row, ws_b.max_column):
+        diffs.append(
+            f"尺寸: {ws_a.max_row}x{ws_a.max_column} vs {ws_b.max_row}x{ws_b.max_column}"
+        )
+    for letter, dim in ws_a.column_dimensions.items():
+        if dim.width != ws_b.column_dimensions[letter].width:
+            diffs.append(f"列宽 {letter}: {dim.width} vs {ws_b.column_dimensions[letter].width}")
+    for row_a, row_b in zip(ws_a.iter_rows(), ws_b.iter_rows()):
+        for a, b in zip(row_a, row_b):
+            if (
+                a.value != b.value
+                or a.font.b != b.font.b
+                or a.font.sz != b.font.sz
+                or a.alignment.horizontal != b.alignment.horizontal
+                or a.alignment.vertical != b.alignment.vertical
+                or a.border.left.style != b.border.left.style
+                or a.border.right.style != b.border.right.style
+                or a.border.top.style != b.border.top.style
+                or a.border.bottom.style != b.border.bottom.style
+            ):
+                diffs.append(f"{a.coordinate}: {a.value!r} vs {b.value!r}")
+    return diffs
+
+
+def _peak_memory(func, *args):
+    """执行函数并返回执行期间的峰值内存（字节，tracemalloc 统计）"""
+    import gc
+    import tracemalloc
+
+    gc.collect()
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def _generate_order_data(rows, codes):
+    """生成测试映射字典和订单项目（约5%为映射表中不存在的料号）"""
+    import random
+
+    rng = random.Random(0)
+    mapping = {
+        f"YY{60000000 + n}": {"产品编号": f"J{n:08d}", "产品名称": f"导线 规格{n}"}
+        for n in range(codes)
+    }
+    all_codes = list(mapping) + [f"YY{70000000 + n}" for n in range(codes // 20)]
+    dates = [f"2026/{m:02d}/{d:02d}" for m in range(1, 13) for d in (5, 15, 25)]
+    items = [
+        {
+            "项次": str(i + 1), "料件编号": rng.choice(all_codes), "品名": "导线",
+            "规格": "", "图号": "", "采购数量": str(rng.randint(1, 5000)),
+            "出货日期": rng.choice(dates), "交期回复": "",
+        }
+        for i in range(rows)
+    ]
+    return mapping, items
+
+
+def _retained_memory(func, *args):
+    """执行函数并返回其结果占用的内存（字节，tracemalloc 统计，结果随后释放）"""
+    import gc
+    import tracemalloc
+
+    gc.collect()
+    tracemalloc.start()
+    result = func(*args)
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained
+
+
+def _apply_mapping_rowwise(items, mapping, normalized):
+    """原逐行实现（每行构建完整字典、每行解析日期），仅作基准对照"""
+    from datetime import date, datetime
+    from code_mapper import MATCH_EXACT, match_label
+    from config import OUTPUT_ORDER_TYPE, QUANTITY_SAFETY_MARGIN
+
+    def resolve_end_date(delivery_date_str, today_str):
+        if not delivery_date_str:
+            return today_str
+        for fmt in ("%Y/%m/%d", "%Y-%m-%d", "%Y.%m.%d"):
+            try:
+                delivery_date = datetime.strptime(delivery_date_str, fmt).date()
+                today = datetime.strptime(today_str, "%Y/%m/%d").date()
+                if delivery_date < today:
+                    return today_str
+                return delivery_date.strftime("%Y/%m/%d")
+            except ValueError:
+                continue
+        return delivery_date_str
+
+    today_str = date.today().strftime("%Y/%m/%d")
+    output_rows = []
+    unmapped = []
+    for item in items:
+        customer_code = item.get("料件编号", "").strip()
+        product_info = mapping.get(customer_code)
+        match = MATCH_EXACT
+        if product_info is None and customer_code:
+            key = normalized.resolve(customer_code)
+            if key is not None:
+                product_info = mapping.get(key)
+                match = match_label(customer_code, key)
+
+        raw_qty = item.get("采购数量", "")
+        try:
+            qty = int(float(str(raw_qty).replace(",", ""))) + QUANTITY_SAFETY_MARGIN
+        except (ValueError, TypeError):
+            qty = raw_qty
+
+        end_date = resolve_end_date(item.get("出货日期", "").strip(), today_str)
+        row = {
+            "产品编号": "", "产品规格": customer_code, "数量": qty,
+            "计划开始时间": today_str, "工单分类": OUTPUT_ORDER_TYPE,
+            "产品名称": "", "计划结束时间": end_date, "工艺路线名称": "",
+            "工序列表": "", "备注": "", "更新": "", "供应商": "", "供应商名称": "",
+            "供应商联系人": "", "供应商联系电话": "", "收货地址": "", "采购单价": "",
+            "客户选择": "", "关联产品": "",
+            "_映射状态": "未映射", "_匹配方式": "", "_产品名称": "",
+            "_品名": item.get("品名", ""), "_图号": item.get("图号", ""),
+            "_规格": item.get("规格", ""), "_交期回复": item.get("交期回复", ""),
+            "_项次": item.get("项次", ""),
+        }
+        if product_info:
+            row["产品编号"] = product_info["产品编号"]
+            row["_产品名称"] = product_info["产品名称"]
+            row["_映射状态"] = "已映射"
+            row["_匹配方式"] = match
+        elif customer_code:
+            unmapped.append(customer_code)
+        output_rows.append(row)
+    return output_rows, unmapped
+
+
+def _generate_mapping_workbook(path, rows, sheets):
+    """生成与料号清单结构相同的测试映射表（标题行 + 表头行 + 数据，混合文本/数值料号）"""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    per_sheet = -(-rows // sheets)
+    n = 0
+    for s in range(sheets):
+        ws = wb.create_sheet(f"sheet{s + 1}")
+        ws.append([f"料号清单{s + 1}"])
+        ws.append(["序号", "久益料号", "生久料号", "品名规格", "备注"])
+        for i in range(min(per_sheet, rows - n)):
+            n += 1
+            customer = f"YY{60000000 + n}" if n % 5 else 2170000000 + n
+            ws.append([i + 1, f"J{n:08d}", customer, f"导线 {n % 97}# 规格{n}-A01", None])
+    wb.save(path)
+
+
+def _generate_order_pdfs(out_dir):
+    """生成 parity 用的测试采购单，返回文件路径列表"""
+    return [
+        _generate_order_pdf(os.path.join(out_dir, "po_basic.pdf"), items=25, per_page=10),
+        # 第1页最后一个项目的备注延续到下一页（该页只有表头和续行，没有项目行）
+        _generate_order_pdf(
+            os.path.join(out_dir, "po_continuation.pdf"), items=12, per_page=10,
+            continuation_page=True,
+        ),
+    ]
+
+
+def _generate_order_pdf(path, items, per_page, continuation_page=False):
+    """
+    用 reportlab 画一份生久格式的测试采购单（仅开发用）:
+    封面（头部信息）→ 明细页（每项主行 + 备注续行，6列带边框表格）→ 条款页（带签字栏表格）。
+    continuation_page=True 时在第1个明细页之后插入一页只有表头和备注续行的明细表（无项目行）。
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+    from reportlab.pdfgen import canvas
+
+    font = "STSong-Light"
+    pdfmetrics.registerFont(UnicodeCIDFont(font))
+    # 列边界；第2、3列之间无竖线（合并单元格，与真实采购单一致）
+    cols = [30, 60, 250, 280, 360, 450, 540]
+
+    def draw_table(c, rows, top):
+        y = top
+        c.setLineWidth(0.5)
+        for cells, height in rows:
+            c.line(cols[0], y, cols[-1], y)
+            for i, x in enumerate(cols):
+                if i != 2:
+                    c.line(x, y, x, y - height)
+            c.setFont(font, 7)
+            for i, text in enumerate(cells):
+                for j, line in enumerate(text.split("\n") if text else []):
+                    c.drawString(cols[i] + 2, y - 9 - j * 9, line)
+            y -= height
+        c.line(cols[0], y, cols[-1], y)
+
+    c = canvas.Canvas(path, pagesize=A4)
+    c.setFont(font, 10)
+    c.drawString(50, 800, "编号: B001  采购单号: PO2026001")
+    c.drawString(50, 780, "供应商: 久益电子  ")
+    c.drawString(50, 760, "采购日期: 2026/01/02")
+    c.drawString(50, 740, "封面说明 本页无明细")
+    c.showPage()
+
+    header_row = (["项次", "料件编号 规格\n品名\n图号", "", "单价\n数量\n单位",
+                   "金额\n日期\n税率", "交期回复"], 30)
+    k = 1
+    page = 0
+    while k <= items:
+        rows = [header_row]
+        for _ in range(per_page):
+            if k > items:
+                break
+            rows.append(([
+                str(k), f"YY{60030000 + k} RoHS/UL/24AWG;\n导线{k}\nDX-{k:04d}", "",
+                f"1.{k % 10}\n{100 * k}\nPCS", f"{k}.00\n2026/0{1 + k % 9}/1{k % 9}\n13%",
+                f"A0{k % 3}" if k % 4 == 0 else "",
+            ], 30))
+            rows.append((["", f"SA{k:03d} 备注", "", "", "", ""], 12))
+            k += 1
+        draw_table(c, rows, 740)
+        c.showPage()
+        page += 1
+        if continuation_page and page == 1:
+            draw_table(c, [header_row, (["", "跨页备注续行", "", "", "", ""], 12)], 740)
+            c.showPage()
+
+    c.setFont(font, 10)
+    c.drawString(50, 800, "条款 本页为条款页")
+    draw_table(c, [(["", "签字栏 审核", "", "签字栏 批准", "", ""], 20)], 740)
+    c.showPage()
+    c.save()
+    return path
+
+
+def _check_generated_remarks(items):
+    """校验测试采购单的备注: 项次k 为 SA{k} 备注（跨页续行追加在后），签字栏不得并入"""
+    problems = []
+    for item in items:
+        k = int(item["项次"])
+        remark = item["备注"]
+        if not remark.startswith(f"SA{k:03d} 备注") or "签字栏" in remark:
+            problems.append(f"项次{k} {remark!r}")
+    return problems
+
+
+def _collect_pdfs(paths):
+    """展开文件/目录/通配符参数为PDF文件列表"""
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            files.extend(sorted(glob.glob(os.path.join(p, "*.pdf"))))
+        else:
+            files.extend(sorted(glob.glob(p)))
+    return files
+
+
+def _diff_items(items_a, items_b):
+    """逐项逐字段比较，返回差异描述列表"""
+    diffs = []
+    if len(items_a) != len(items_b):
+        diffs.append(f"项目数不同: {len(items_a)} vs {len(items_b)}")
+    for a, b in zip(items_a, items_b):
+        for key in a:
+            if a.get(key) != b.get(key):
+                diffs.append(
+                    f"项次{a.get('项次')} {key}: {a.get(key)!r} vs {b.get(key)!r}"
+                )
+    return diffs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="工厂订单转换工具性能基准")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("parse", help="PDF解析: 串行 vs 多进程")
+    p.add_argument("pdf", help="采购单PDF路径")
+    p.add_argument("--workers", type=int, default=0, help="并行进程数（默认CPU核数）")
+    p.set_defaults(func=bench_parse)
+
+    p = sub.add_parser("parity", help="解析后端一致性: pdfplumber vs pdfium")
+    p.add_argument("paths", nargs="*",
+                   help="PDF文件、目录或通配符（不指定时生成测试采购单）")
+    p.set_defaults(func=bench_parity)
+
+    p = sub.add_parser("mapping", help="映射表读取: openpyxl vs 流式XML")
+    p.add_argument("--xlsx", default=None, help="映射表路径（默认生成测试映射表）")
+    p.add_argument("--rows", type=int, default=100000, help="生成的测试映射表行数")
+    p.add_argument("--sheets", type=int, default=5, help="生成的测试映射表sheet数")
+    p.set_defaults(func=bench_mapping)
+
+    p = sub.add_parser("apply", help="映射应用: 逐行字典 vs 列式映射")
+    p.add_argument("--rows", type=int, default=50000, help="订单行数")
+    p.add_argument("--codes", type=int, default=2000, help="映射表料号数")
+    p.set_defaults(func=bench_apply)
+
+    p = sub.add_parser("export", help="导出Excel: 逐格写入 vs 只写模式流式写出")
+    p.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000],
+                   help="订单行数（可指定多个）")
+    p.add_argument("--codes", type=int, default=2000, help="映射表料号数")
+    p.add_argument("--verify-rows", type=int, default=10000,
+                   help="行数不超过该值时逐格校验两种输出一致")
+    p.add_argument("--memory", action="store_true", help="另外测量峰值内存（较慢）")
+    p.set_defaults(func=bench_export)
+
+    p = sub.add_parser("xlsx", help="导出Excel: openpyxl只写模式 vs 直接写XML")
+    p.add_argument("--rows", type=int, nargs="+", default=[1000, 20000, 200000],
+                   help="订单行数（可指定多个）")
+    p.add_argument("--codes", type=int, default=2000, help="映射表料号数")
+    p.add_argument("--verify-rows", type=int, default=20000,
+                   help="行数不超过该值时逐格校验两种输出一致")
+    p.add_argument("--skip-openpyxl", action="store_true",
+                   help="只测直接写XML（超大行数时 openpyxl 较慢）")
+    p.add_argument("--memory", action="store_true", help="另外测量直接写XML的峰值内存")
+    p.set_defaults(func=bench_xlsx)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
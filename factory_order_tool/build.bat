@@ -37,6 +37,18 @@ echo.
 echo [3/4] 开始打包（单文件夹模式）...
 .venv\Scripts\python.exe -m PyInstaller --onedir --windowed --name "订单转换工具" ^
     --clean ^
+    --hidden-import parse_cache ^
+    --hidden-import pdfium_backend ^
+    --hidden-import pypdfium2 ^
+    --collect-all pypdfium2_raw ^
+    --hidden-import mapping_snapshot ^
+    --hidden-import mapping_store ^
+    --hidden-import mapping_suggest ^
+    --hidden-import code_mapper ^
+    --hidden-import excel_writer ^
+    --hidden-import chunked_export ^
+    --hidden-import daily_export ^
+    --hidden-import drawing_checker ^
     main.py
 
 echo.
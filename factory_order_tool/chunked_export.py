@@ -0,0 +1,178 @@
+"""分块导出模块 - 按行数把导出拆成多个文件，适应工厂系统导入的单文件行数限制
+
+「导入产品明细模板」导入过大的表会失败。分块导出把输出行按 N 行一块写成多个文件:
+  工厂订单_{采购单号}_001.xlsx、工厂订单_{采购单号}_002.xlsx ...
+  工厂订单_{采购单号}_manifest.json  - 清单: 每块的文件名、对应的行范围、行数、是否写出成功
+
+文件名只由采购单号和块序号决定（同一订单、同一块行数重新导出时文件名不变），
+导入失败时可按清单只重新导入（或用 only 参数只重新写出）对应的块。
+各块写入各自的文件，互不依赖，用进程池并行写出（写 xlsx 主要是 Python 代码，线程受 GIL 限制）。
+
+只支持拆分为多个文件，不拆分为同一工作簿的多个sheet: 导入模板只读取第一个sheet，
+且同一工作簿的多个sheet无法并行写出、也无法单独重试。
+"""
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from config import EXPORT_CHUNK_ROWS, EXPORT_CHUNK_WORKERS
+from excel_writer import write_output_file
+
+MANIFEST_VERSION = 1
+
+# Windows 文件名不允许的字符
+_UNSAFE_NAME_CHARS = re.compile(r'[\\/:*?"<>|]')
+
+
+def chunk_file_name(order_no, index, ext=".xlsx"):
+    """第 index 块（从1开始）的文件名"""
+    return f"工厂订单_{_safe_name(order_no)}_{index:03d}{ext}"
+
+
+def manifest_file_name(order_no):
+    """分块清单文件名"""
+    return f"工厂订单_{_safe_name(order_no)}_manifest.json"
+
+
+def count_chunks(total_rows, chunk_rows=None):
+    """总行数按每块行数拆分后的块数（chunk_rows 为 0 时不拆分，返回 1）"""
+    chunk_rows = EXPORT_CHUNK_ROWS if chunk_rows is None else chunk_rows
+    if chunk_rows <= 0 or total_rows <= chunk_rows:
+        return 1
+    return -(-total_rows // chunk_rows)
+
+
+def write_chunked_export(output_rows, output_dir, order_no, chunk_rows=None,
+                         ext=".xlsx", workers=None, only=None, backend=None):
+    """
+    分块导出，并写出清单文件。
+
+    参数:
+        output_rows: Iterable[dict] | MappedColumns - 同 write_output_excel
+        output_dir: str - 输出目录
+        order_no: str - 采购单号（用于文件名）
+        chunk_rows: int | None - 每块行数（None 使用 config.EXPORT_CHUNK_ROWS；0 不拆分）
+        ext: str - 导出格式扩展名（.xlsx / .csv / .jsonl，同 write_output_file）
+        workers: int | None - 并行进程数（None 使用 config.EXPORT_CHUNK_WORKERS；0 按CPU核数）
+        only: Iterable[int] | None - 只（重新）写出这些块（从1开始），其余块沿用已有清单中的记录
+        backend: str | None - Excel 写出方式（同 write_output_excel）
+
+    返回:
+        manifest: dict - 清单内容（同清单文件）:
+            order_no, format, chunk_rows, total_rows, created, manifest,
+            chunks: [{index, file, first_row, last_row, rows, status, error, seconds}]
+            （first_row/last_row 为数据行在完整导出中的行号，从1开始；status 为 ok / failed）
+    """
+    chunk_rows = EXPORT_CHUNK_ROWS if chunk_rows is None else chunk_rows
+    workers = EXPORT_CHUNK_WORKERS if workers is None else workers
+    workers = workers or os.cpu_count() or 1
+    if not hasattr(output_rows, "slice"):
+        output_rows = list(output_rows)
+    total = len(output_rows)
+    count = count_chunks(total, chunk_rows)
+    size = chunk_rows if count > 1 else total
+    os.makedirs(output_dir, exist_ok=True)
+
+    manifest_path = os.path.join(output_dir, manifest_file_name(order_no))
+    previous = _read_manifest(manifest_path) if only is not None else None
+    wanted = set(only) if only is not None else set(range(1, count + 1))
+
+    jobs = []
+    for index in range(1, count + 1):
+        if index not in wanted:
+            continue
+        start = (index - 1) * size
+        stop = min(start + size, total)
+        rows = (
+            output_rows.slice(start, stop) if hasattr(output_rows, "slice")
+            else output_rows[start:stop]
+        )
+        path = os.path.join(output_dir, chunk_file_name(order_no, index, ext))
+        jobs.append((index, start, stop, rows, path))
+
+    results = {}
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            futures = {
+                executor.submit(_write_chunk, rows, path, backend): index
+                for index, _, _, rows, path in jobs
+            }
+            for future, index in futures.items():
+                try:
+                    results[index] = future.result()
+                except Exception as e:  # 进程异常退出等
+                    results[index] = (str(e) or type(e).__name__, 0.0)
+    else:
+        for index, _, _, rows, path in jobs:
+            results[index] = _write_chunk(rows, path, backend)
+
+    chunks = []
+    kept = {c["index"]: c for c in (previous or {}).get("chunks", [])}
+    for index in range(1, count + 1):
+        if index not in results:
+            if index in kept:
+                chunks.append(kept[index])
+            continue
+        start = (index - 1) * size
+        stop = min(start + size, total)
+        error, seconds = results[index]
+        chunks.append({
+            "index": index,
+            "file": chunk_file_name(order_no, index, ext),
+            "first_row": start + 1,
+            "last_row": stop,
+            "rows": stop - start,
+            "status": "failed" if error else "ok",
+            "error": error,
+            "seconds": round(seconds, 3),
+        })
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "order_no": order_no,
+        "format": ext,
+        "chunk_rows": chunk_rows,
+        "total_rows": total,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "manifest": manifest_path,
+        "chunks": chunks,
+    }
+    _write_manifest(manifest_path, manifest)
+    return manifest
+
+
+def failed_chunks(manifest):
+    """清单中写出失败的块序号"""
+    return [c["index"] for c in manifest["chunks"] if c["status"] != "ok"]
+
+
+def _write_chunk(rows, path, backend):
+    """写出一块（在工作进程中执行），返回 (错误信息或None, 耗时秒)"""
+    start = time.perf_counter()
+    try:
+        write_output_file(rows, path, backend)
+    except Exception as e:
+        return str(e) or type(e).__name__, time.perf_counter() - start
+    return None, time.perf_counter() - start
+
+
+def _read_manifest(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(path, manifest):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _safe_name(text):
+    return _UNSAFE_NAME_CHARS.sub("_", str(text).strip()) or "订单"
@@ -0,0 +1,369 @@
+"""命令行入口 - 无界面转换，供计划任务/脚本调用（不导入 tkinter）
+
+用法（在程序目录下）:
+    python -m cli parse <采购单.pdf> [--items]
+    python -m cli map <采购单.pdf>
+    python -m cli export <采购单.pdf> -o <输出.xlsx|.csv|.jsonl> [--chunk-rows 5000]
+    python -m cli check-drawings <采购单.pdf> --drawing-dir <图纸库>
+    python -m cli batch <PDF目录或通配符> -o <输出目录> [--workers N] [--consolidated 汇总.xlsx] [--daily]
+    python -m cli append-daily <采购单.pdf> [--daily-dir 目录] [--compact]
+    python -m cli compact-daily [--daily-dir 目录] [--date 20260317] [--format xlsx]
+    python -m cli mapping-report [--mapping 映射表.xlsx] [--factory-code J00016025]
+
+输出: 标准输出打印一个 JSON 对象（UTF-8）
+退出码:
+    0 - 成功
+    1 - 出错（文件不存在、解析失败等）
+    2 - 存在未映射料号
+    3 - 图纸比对存在待处理项（版本不匹配/无图纸/命名不规范/无版本）
+
+重量级模块（pdfplumber/openpyxl）在子命令内部按需导入，保证启动和 --help 秒开。
+"""
+import argparse
+import json
+import os
+import sys
+
+from config import DAILY_EXPORT_DIR
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_UNMAPPED = 2
+EXIT_MISMATCH = 3
+
+
+# ========== 子命令 ==========
+
+def cmd_parse(args):
+    """仅解析PDF"""
+    header_info, items, stats = _parse(args)
+    result = {
+        "pdf": args.pdf,
+        "header_info": header_info,
+        "items": len(items),
+        "pages": stats.get("pages", 0),
+        "skipped_pages": stats.get("skipped_pages", 0),
+    }
+    if args.items:
+        result["item_list"] = [item.to_dict() for item in items]
+    return result, EXIT_OK
+
+
+def cmd_map(args):
+    """解析 + 映射（存在未映射料号时附带映射表中相近料号的建议）"""
+    from mapping_suggest import suggest_for_unmapped, suggestion_index_for
+
+    header_info, output_rows, unmapped, mapping = _parse_and_map(args, with_mapping=True)
+    result = _mapping_summary(args, header_info, output_rows, unmapped)
+    if unmapped:
+        result["suggestions"] = suggest_for_unmapped(
+            suggestion_index_for(mapping), mapping, result["unmapped_codes"]
+        )
+    return result, _map_exit(unmapped)
+
+
+def cmd_export(args):
+    """解析 + 映射 + 导出工厂Excel / CSV / JSON Lines（存在未映射料号时仍导出，但返回退出码2）"""
+    from excel_writer import write_output_file
+
+    header_info, output_rows, unmapped = _parse_and_map(args)
+    result = _mapping_summary(args, header_info, output_rows, unmapped)
+    if args.chunk_rows:
+        from chunked_export import failed_chunks, write_chunked_export
+
+        manifest = write_chunked_export(
+            output_rows,
+            os.path.dirname(os.path.abspath(args.output)),
+            header_info.get("采购单号", "") or os.path.splitext(os.path.basename(args.pdf))[0],
+            chunk_rows=args.chunk_rows,
+            ext=os.path.splitext(args.output)[1] or ".xlsx",
+            only=args.retry_chunk,
+            backend=args.writer,
+        )
+        result["chunks"] = manifest["chunks"]
+        result["manifest"] = manifest["manifest"]
+        if failed_chunks(manifest):
+            return result, EXIT_ERROR
+        return result, _map_exit(unmapped)
+
+    write_output_file(output_rows, args.output, args.writer)
+    result["output"] = os.path.abspath(args.output)
+    return result, _map_exit(unmapped)
+
+
+def cmd_check_drawings(args):
+    """解析 + 映射 + 图纸版本比对"""
+    from drawing_checker import check_drawings, get_check_stats
+
+    if not os.path.isdir(args.drawing_dir):
+        raise FileNotFoundError(f"图纸库目录不存在: {args.drawing_dir}")
+
+    header_info, output_rows, unmapped, code_index = _parse_and_map(args, with_index=True)
+    scan = {}
+    results, bad_names = check_drawings(
+        output_rows, args.drawing_dir, args.print_folder, code_index, stats=scan
+    )
+    stats = get_check_stats(results)
+
+    result = _mapping_summary(args, header_info, output_rows, unmapped)
+    result["drawing_stats"] = stats
+    result["drawing_results"] = [r.to_dict() for r in results]
+    result["bad_names"] = bad_names
+    result["drawing_scan"] = scan
+
+    actionable = (
+        stats["mismatch"] + stats["no_drawing"] + stats["bad_name"]
+        + stats["no_version"]
+    )
+    if actionable:
+        return result, EXIT_MISMATCH
+    return result, _map_exit(unmapped)
+
+
+def cmd_batch(args):
+    """批量转换文件夹"""
+    from batch import run_batch
+
+    summaries = run_batch(
+        args.source, args.output_dir, args.workers, args.consolidated,
+        daily_dir=args.daily,
+    )
+    result = {
+        "files": len(summaries),
+        "failed": sum(1 for s in summaries if s["error"]),
+        "rows": sum(s["rows"] for s in summaries),
+        "summaries": summaries,
+    }
+    if result["failed"]:
+        return result, EXIT_ERROR
+    if any(s["unmapped_codes"] for s in summaries):
+        return result, EXIT_UNMAPPED
+    return result, EXIT_OK
+
+
+def cmd_append_daily(args):
+    """解析 + 映射 + 追加到当日汇总（同一采购单再次追加时替换；--compact 同时整理出汇总文件）"""
+    from daily_export import append_order, compact_daily_log, daily_log_path
+
+    header_info, output_rows, unmapped = _parse_and_map(args)
+    result = _mapping_summary(args, header_info, output_rows, unmapped)
+    order_no = header_info.get("采购单号", "") or os.path.splitext(os.path.basename(args.pdf))[0]
+    log_path = daily_log_path(args.daily_dir)
+    result["daily"] = append_order(log_path, output_rows, order_no, os.path.abspath(args.pdf))
+    result["log"] = os.path.abspath(log_path)
+    if args.compact:
+        manifest = compact_daily_log(log_path, backend=args.writer)
+        result["output"] = manifest["output"]
+        result["manifest"] = manifest["manifest"]
+    return result, _map_exit(unmapped)
+
+
+def cmd_compact_daily(args):
+    """由当日汇总行日志写出汇总导入文件和清单（每份采购单的来源和行范围）"""
+    from daily_export import compact_daily_log, daily_log_path
+
+    log_path = daily_log_path(args.daily_dir, args.date)
+    if not os.path.exists(log_path):
+        raise FileNotFoundError(f"当日汇总行日志不存在: {log_path}")
+    output_path = log_path[: -len(".rows.jsonl")] + "." + args.format
+    return compact_daily_log(log_path, output_path, args.writer), EXIT_OK
+
+
+def cmd_mapping_report(args):
+    """
+    映射表报告: 条数和规范化冲突（多个料号仅全角/空白/大小写/数值形式不同）；
+    指定 --factory-code 时列出对应的全部客户料号及所在sheet
+    """
+    from code_mapper import NormalizedIndex
+    from mapping_store import load_mapping, load_mapping_with_index
+
+    index = None
+    if args.factory_code:
+        mapping, index = load_mapping_with_index(args.mapping, args.mapping_backend)
+    else:
+        mapping, _ = load_mapping(args.mapping, args.mapping_backend)
+    if hasattr(mapping, "collisions"):
+        collisions = mapping.collisions()
+    else:
+        collisions = NormalizedIndex(mapping).collisions()
+    result = {
+        "count": len(mapping),
+        "collision_groups": len(collisions),
+        "collisions": collisions,
+    }
+    if index is not None:
+        result["customer_codes"] = {
+            factory_code: [
+                {"code": code, "sheet": sheet}
+                for code, sheet in index.customer_codes(factory_code)
+            ]
+            for factory_code in args.factory_code
+        }
+    return result, EXIT_OK
+
+
+# ========== 公共步骤 ==========
+
+def _parse(args):
+    from pdf_parser import parse_purchase_order
+
+    if not os.path.isfile(args.pdf):
+        raise FileNotFoundError(f"PDF文件不存在: {args.pdf}")
+    stats = {}
+    header_info, items = parse_purchase_order(
+        args.pdf, workers=args.workers, stats=stats, backend=args.backend
+    )
+    return header_info, items, stats
+
+
+def _parse_and_map(args, with_mapping=False, with_index=False):
+    """解析 + 映射，按需在结果后附带映射和双向料号索引（映射表只加载一次）"""
+    from code_mapper import apply_mapping
+    from mapping_store import load_mapping, load_mapping_with_index
+
+    header_info, items, _ = _parse(args)
+    if with_index:
+        mapping, index = load_mapping_with_index(args.mapping, args.mapping_backend)
+    else:
+        mapping, _ = load_mapping(args.mapping, args.mapping_backend)
+    output_rows, unmapped = apply_mapping(items, mapping)
+    result = (header_info, output_rows, unmapped)
+    if with_mapping:
+        result += (mapping,)
+    if with_index:
+        result += (index,)
+    return result
+
+
+def _mapping_summary(args, header_info, output_rows, unmapped):
+    from code_mapper import MATCH_EXACT, get_mapping_stats
+
+    total, mapped, failed = get_mapping_stats(output_rows)
+    normalized = [
+        {"code": row["产品规格"], "match": row["_匹配方式"]}
+        for row in output_rows
+        if row["_映射状态"] == "已映射" and row["_匹配方式"] != MATCH_EXACT
+    ]
+    return {
+        "pdf": args.pdf,
+        "order_no": header_info.get("采购单号", ""),
+        "rows": total,
+        "mapped": mapped,
+        "unmapped": failed,
+        "unmapped_codes": sorted(set(unmapped)),
+        "normalized_matches": normalized,
+    }
+
+
+def _map_exit(unmapped):
+    return EXIT_UNMAPPED if unmapped else EXIT_OK
+
+
+# ========== 入口 ==========
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cli", description="工厂订单转换工具（命令行版）"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_pdf_args(p):
+        p.add_argument("pdf", help="采购单PDF路径")
+        p.add_argument("--backend", choices=["pdfplumber", "pdfium"], default=None,
+                       help="解析后端（默认取 config.PDF_PARSER_BACKEND）")
+        p.add_argument("--workers", type=int, default=None, help="解析进程数")
+
+    def add_daily_dir_arg(p):
+        p.add_argument("--daily-dir", default=None,
+                       help="当日汇总目录（默认程序目录下 daily_export）")
+        p.add_argument("--writer", choices=["openpyxl", "xml"], default=None,
+                       help="Excel写出方式（默认取 config.EXCEL_WRITER_BACKEND）")
+
+    def add_mapping_arg(p):
+        p.add_argument("--mapping", default=None, help="映射表路径（默认程序目录下 mapping_table.xlsx）")
+        p.add_argument("--mapping-backend", choices=["memory", "sqlite"], default=None,
+                       help="映射表存储后端（默认取 config.MAPPING_BACKEND）")
+
+    p = sub.add_parser("parse", help="解析采购单PDF")
+    add_pdf_args(p)
+    p.add_argument("--items", action="store_true", help="输出完整项目列表")
+    p.set_defaults(func=cmd_parse)
+
+    p = sub.add_parser("map", help="解析并映射，报告未映射料号")
+    add_pdf_args(p)
+    add_mapping_arg(p)
+    p.set_defaults(func=cmd_map)
+
+    p = sub.add_parser("export", help="解析、映射并导出工厂Excel / CSV / JSON Lines")
+    add_pdf_args(p)
+    add_mapping_arg(p)
+    p.add_argument("-o", "--output", required=True,
+                   help="输出路径（按扩展名选择格式: .xlsx / .csv / .jsonl）")
+    p.add_argument("--writer", choices=["openpyxl", "xml"], default=None,
+                   help="Excel写出方式（默认取 config.EXCEL_WRITER_BACKEND；xml 适合超大导出）")
+    p.add_argument("--chunk-rows", type=int, default=0,
+                   help="分块导出: 每个文件的行数（写到 -o 所在目录，文件名按采购单号编号，附清单）")
+    p.add_argument("--retry-chunk", type=int, action="append", default=None,
+                   help="分块导出时只重新写出第N块（可重复指定）")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("check-drawings", help="解析、映射并比对图纸版本")
+    add_pdf_args(p)
+    add_mapping_arg(p)
+    p.add_argument("--drawing-dir", required=True, help="图纸库目录")
+    p.add_argument("--print-folder", default=None, help="待打印文件夹（默认图纸库下）")
+    p.set_defaults(func=cmd_check_drawings)
+
+    p = sub.add_parser("mapping-report", help="映射表条数和规范化冲突报告")
+    add_mapping_arg(p)
+    p.add_argument("--factory-code", action="append", default=None,
+                   help="反查该久益料号对应的全部客户料号（可重复指定）")
+    p.set_defaults(func=cmd_mapping_report)
+
+    p = sub.add_parser("batch", help="批量转换文件夹中的采购单")
+    p.add_argument("source", nargs="+", help="PDF目录、通配符或文件")
+    p.add_argument("-o", "--output-dir", required=True, help="输出目录")
+    p.add_argument("--workers", type=int, default=None, help="进程数（默认CPU核数）")
+    p.add_argument("--consolidated", default=None, help="额外输出汇总Excel路径")
+    p.add_argument("--daily", nargs="?", const=DAILY_EXPORT_DIR, default=None,
+                   help="追加到当日汇总（可指定目录，默认程序目录下 daily_export）")
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser("append-daily", help="解析、映射并追加到当日汇总")
+    add_pdf_args(p)
+    add_mapping_arg(p)
+    add_daily_dir_arg(p)
+    p.add_argument("--compact", action="store_true", help="追加后整理出当日汇总Excel")
+    p.set_defaults(func=cmd_append_daily)
+
+    p = sub.add_parser("compact-daily", help="由当日汇总行日志写出汇总导入文件和清单")
+    add_daily_dir_arg(p)
+    p.add_argument("--date", default=None, help="日期 YYYYMMDD（默认今天）")
+    p.add_argument("--format", choices=["xlsx", "csv", "jsonl"], default="xlsx",
+                   help="汇总文件格式")
+    p.set_defaults(func=cmd_compact_daily)
+
+    return parser
+
+
+def main(argv=None):
+    # 计划任务重定向输出时统一使用UTF-8，避免中文料号/品名编码错误
+    try:
+        sys.stdout.reconfigure(encoding="utf-8")
+    except (AttributeError, ValueError):
+        pass
+
+    args = build_parser().parse_args(argv)
+    try:
+        result, code = args.func(args)
+    except Exception as e:
+        result, code = {"error": str(e) or type(e).__name__}, EXIT_ERROR
+
+    result["exit_code"] = code
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
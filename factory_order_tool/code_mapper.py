@@ -1,15 +1,28 @@
 """编码映射模块 - 读取料号清单Excel，执行客户编码到工厂编码的映射"""
+import hashlib
 import os
+import re
+import unicodedata
 from datetime import datetime, date
-from openpyxl import load_workbook
+from functools import lru_cache
+from itertools import islice
 from config import (
     MAPPING_TABLE_PATH,
+    MAPPING_HEADER_MARKER,
+    MAPPING_LOOKUP_BATCH,
     MAP_COL_IDX_JY_CODE,
     MAP_COL_IDX_CUSTOMER,
     MAP_COL_IDX_DESC,
     OUTPUT_ORDER_TYPE,
     QUANTITY_SAFETY_MARGIN,
 )
+from records import OutputRow
+from xlsx_reader import (
+    UnsupportedXlsxError,
+    iter_sheet_columns,
+    load_shared_strings,
+    read_workbook_parts,
+)
 
 
 def load_mapping_table(path=None):
@@ -24,53 +37,537 @@ def load_mapping_table(path=None):
     映射键: 客户料号（如 YY60030058）
     映射值: dict 包含产品编号(久益料号)、产品名称(品名规格)
 
+    优先用 xlsx_reader 直接流式解析XML（只取B/C/D三列）；
+    遇到其无法保证一致的单元格时回退 openpyxl，两条路径结果完全相同。
+    需要增量重新加载时使用 MappingTable。
+
     返回:
         mapping: dict - {客户料号: {产品编号, 产品名称}}
     """
-    path = path or MAPPING_TABLE_PATH
-    if not os.path.exists(path):
-        return {}
+    table = MappingTable(path)
+    table.reload()
+    return table.mapping
 
-    wb = load_workbook(path, read_only=True)
-    mapping = {}
 
-    for sheet_name in wb.sheetnames:
-        ws = wb[sheet_name]
-        header_row_found = False
+class MappingTable:
+    """
+    按 sheet 分别保存的映射表，支持增量重新加载。
 
-        for row in ws.iter_rows(values_only=True):
-            # 查找表头行（含"久益料号"的行）
-            if not header_row_found:
-                cells = [str(c).strip() if c else "" for c in row]
-                if any("久益料号" in c for c in cells):
-                    header_row_found = True
-                continue
+    每个 sheet 记录指纹: 工作表XML的 CRC32（取自xlsx压缩包目录）
+    + 本 sheet 用到的共享字符串前缀摘要（Excel 保存时会重排共享字符串表，
+    工作表XML未变但引用的字符串可能已经变了）。
+    重新加载时只重新读取指纹变化的 sheet，原地修补合并后的 mapping:
+    同一客户料号出现在多个 sheet 时以靠后的 sheet 为准（与整表读取一致）。
 
-            # 数据行
-            if row is None or len(row) <= MAP_COL_IDX_DESC:
-                continue
+    界面中分两步使用（读取文件在后台线程，修改 mapping 在主线程）:
+        update = table.read_update()
+        changes = table.apply_update(update)
 
-            raw_jy = row[MAP_COL_IDX_JY_CODE]
-            raw_customer = row[MAP_COL_IDX_CUSTOMER]
-            raw_desc = row[MAP_COL_IDX_DESC]
+    参数:
+        path: str | None - 映射表路径（None 使用 config.MAPPING_TABLE_PATH）
+        state: dict | None - get_state() 保存的状态（如从快照恢复）
+    """
 
-            # 转字符串，处理数值型客户料号（如 sheet 0005 中的整数）
-            jy_code = _to_str(raw_jy)
-            customer_code = _to_str(raw_customer)
-            desc = _to_str(raw_desc)
+    def __init__(self, path=None, state=None):
+        self.path = path or MAPPING_TABLE_PATH
+        self.mapping = {}       # 合并后的映射（对外使用，重新加载时原地修改）
+        self.sheets = []        # [{name, crc, sst_max, sst_digest, mapping}]，按工作簿顺序
+        self.styles_crc = None
+        self.sst_crc = None
+        if state:
+            self.sheets = state["sheets"]
+            self.styles_crc = state["styles_crc"]
+            self.sst_crc = state["sst_crc"]
+            for sheet in self.sheets:
+                self.mapping.update(sheet["mapping"])
+        # 规范化料号索引和双向料号索引，随 mapping 一起增量维护
+        self.normalized = NormalizedIndex(self.mapping)
+        self.codes = CodeIndex(self.sheets, self.normalized)
+
+    def get_state(self):
+        """可序列化的状态（各 sheet 指纹和映射）"""
+        return {
+            "sheets": self.sheets,
+            "styles_crc": self.styles_crc,
+            "sst_crc": self.sst_crc,
+        }
 
-            if not jy_code or not customer_code:
+    def reload(self):
+        """重新加载（只读取变化的 sheet），返回变化列表（同 apply_update）"""
+        return self.apply_update(self.read_update())
+
+    def read_update(self):
+        """
+        读取映射表的变化（不修改自身，可在后台线程调用）。
+
+        返回:
+            update: dict - 交给 apply_update 的新状态，未变化的 sheet 沿用原对象
+        """
+        if not os.path.exists(self.path):
+            return {"sheets": [], "styles_crc": None, "sst_crc": None}
+        try:
+            parts = read_workbook_parts(self.path)
+        except UnsupportedXlsxError:
+            return self._read_all_openpyxl()
+
+        crc = parts["crc"]
+        styles_crc = crc.get(parts["styles_path"])
+        sst_crc = crc.get(parts["sst_path"])
+        strings = _LazySharedStrings(self.path)
+        previous = {sheet["name"]: sheet for sheet in self.sheets}
+
+        sheets = []
+        stale = []
+        for name, xml_path in parts["sheets"]:
+            prev = previous.get(name)
+            if (
+                prev is not None
+                and prev["crc"] == crc[xml_path]
+                and styles_crc == self.styles_crc
+                and (sst_crc == self.sst_crc or _sst_prefix_unchanged(prev, strings))
+            ):
+                sheets.append(prev)
+            else:
+                sheets.append({"name": name, "crc": crc[xml_path]})
+                stale.append(name)
+
+        if stale:
+            self._read_sheets(stale, sheets, strings)
+        return {"sheets": sheets, "styles_crc": styles_crc, "sst_crc": sst_crc}
+
+    def apply_update(self, update):
+        """
+        应用 read_update 的结果，原地修补 self.mapping（须在使用 mapping 的线程调用）。
+
+        返回:
+            changes: list[dict] - 有变化的 sheet: {sheet, added, removed, changed}
+        """
+        old_sheets = self.sheets
+        new_sheets = update["sheets"]
+        old_by_name = {sheet["name"]: sheet for sheet in old_sheets}
+        new_names = {sheet["name"] for sheet in new_sheets}
+
+        changes = []
+        affected = set()
+        for sheet in new_sheets:
+            prev = old_by_name.get(sheet["name"])
+            if prev is sheet:
+                continue
+            change, keys = _diff_sheet(
+                sheet["name"], prev["mapping"] if prev else {}, sheet["mapping"]
+            )
+            affected |= keys
+            if keys:
+                changes.append(change)
+        for prev in old_sheets:
+            if prev["name"] not in new_names:
+                change, keys = _diff_sheet(prev["name"], prev["mapping"], {})
+                affected |= keys
+                if keys:
+                    changes.append(change)
+
+        # sheet 顺序变化会改变优先级，所有料号都需重新确定归属
+        common_old = [s["name"] for s in old_sheets if s["name"] in new_names]
+        common_new = [s["name"] for s in new_sheets if s["name"] in old_by_name]
+        if common_old != common_new:
+            for sheet in old_sheets + new_sheets:
+                affected.update(sheet["mapping"])
+
+        self.sheets = new_sheets
+        self.styles_crc = update["styles_crc"]
+        self.sst_crc = update["sst_crc"]
+
+        for key in affected:
+            for sheet in reversed(new_sheets):
+                value = sheet["mapping"].get(key)
+                if value is not None:
+                    if key not in self.mapping:
+                        self.normalized.add(key)
+                    self.mapping[key] = value
+                    self.codes.add(key, value["产品编号"], sheet["name"])
+                    break
+            else:
+                if self.mapping.pop(key, None) is not None:
+                    self.normalized.discard(key)
+                    self.codes.discard(key)
+        return changes
+
+    def _read_sheets(self, names, sheets, strings):
+        """重新读取指定 sheet，填入 sheets 中对应状态的映射和共享字符串指纹"""
+        usage = {}
+        shared = strings.get()
+        try:
+            if shared is None:
+                raise UnsupportedXlsxError("共享字符串表读取失败")
+            by_sheet = _build_sheet_mappings(
+                _iter_mapping_rows_fast(self.path, names, shared, usage), names
+            )
+        except UnsupportedXlsxError:
+            usage = {}
+            by_sheet = _build_sheet_mappings(
+                _iter_mapping_rows_openpyxl(self.path, names), names
+            )
+
+        for sheet in sheets:
+            if sheet["name"] not in by_sheet or "mapping" in sheet:
                 continue
+            sst_max = usage.get(sheet["name"])  # openpyxl 路径无法得知，视为依赖整个表
+            sheet["mapping"] = by_sheet[sheet["name"]]
+            sheet["sst_max"] = sst_max
+            sheet["sst_digest"] = (
+                _sst_digest(shared, sst_max) if sst_max is not None else None
+            )
+
+    def _read_all_openpyxl(self):
+        """xlsx 结构无法直接解析时整表用 openpyxl 读取（不记录指纹，下次仍整表读取）"""
+        by_sheet = _build_sheet_mappings(_iter_mapping_rows_openpyxl(self.path))
+        sheets = [
+            {"name": name, "crc": None, "sst_max": None, "sst_digest": None,
+             "mapping": mapping}
+            for name, mapping in by_sheet.items()
+        ]
+        return {"sheets": sheets, "styles_crc": None, "sst_crc": None}
+
+
+# ========== 料号规范化 ==========
+
+MATCH_EXACT = "精确"
+MATCH_NORMALIZED = "规范化"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_NUMERIC_FLOAT_RE = re.compile(r"^(\d+)\.0+$")
 
-            mapping[customer_code] = {
-                "产品编号": jy_code,
-                "产品名称": desc,
-            }
 
-    wb.close()
+def normalize_code(code):
+    """
+    客户料号规范化: 全角转半角(NFKC)、去除所有空白、转大写、数值型 "123.0" → "123"。
+
+    返回:
+        normalized: str - 规范化后的料号
+        steps: tuple[str] - 实际起作用的规范化步骤（全角/空白/大小写/数值）
+    """
+    text = str(code)
+    steps = []
+    folded = unicodedata.normalize("NFKC", text)
+    if folded != text:
+        steps.append("全角")
+    stripped = _WHITESPACE_RE.sub("", folded)
+    if stripped != folded:
+        steps.append("空白")
+    upper = stripped.upper()
+    if upper != stripped:
+        steps.append("大小写")
+    numeric = _NUMERIC_FLOAT_RE.sub(r"\1", upper)
+    if numeric != upper:
+        steps.append("数值")
+    return numeric, tuple(steps)
+
+
+def match_label(code, key):
+    """记录在行的 _匹配方式 中: 精确，或 规范化(全角+大小写) 等（双方起作用的步骤）"""
+    if code == key:
+        return MATCH_EXACT
+    steps = dict.fromkeys(normalize_code(code)[1] + normalize_code(key)[1])
+    return f"{MATCH_NORMALIZED}({'+'.join(steps)})"
+
+
+class NormalizedIndex:
+    """
+    映射表料号的规范化索引: 规范化料号 → 原始料号，O(1) 查找。
+
+    多个原始料号规范化后相同时（冲突）取字典序最小的一个，并由 collisions() 报告。
+
+    参数:
+        codes: Iterable[str] - 映射表中的客户料号
+    """
+
+    def __init__(self, codes=()):
+        self._keys = {}       # 规范化料号 → 原始料号（冲突时为字典序最小者）
+        self._conflicts = {}  # 规范化料号 → 原始料号集合（仅冲突的）
+        for code in codes:
+            self.add(code)
+
+    def add(self, code):
+        norm = normalize_code(code)[0]
+        current = self._keys.get(norm)
+        if current is None:
+            self._keys[norm] = code
+            return
+        if current == code:
+            return
+        group = self._conflicts.setdefault(norm, {current})
+        group.add(code)
+        self._keys[norm] = min(group)
+
+    def discard(self, code):
+        norm = normalize_code(code)[0]
+        group = self._conflicts.get(norm)
+        if group is None:
+            if self._keys.get(norm) == code:
+                del self._keys[norm]
+            return
+        group.discard(code)
+        self._keys[norm] = min(group)
+        if len(group) == 1:
+            del self._conflicts[norm]
+
+    def resolve(self, code):
+        """规范化后查找，返回映射表中的原始料号，找不到返回 None"""
+        return self._keys.get(normalize_code(code)[0])
+
+    def collisions(self):
+        """规范化引入的冲突: {规范化料号: [原始料号...]}（按规范化料号排序）"""
+        return {norm: sorted(self._conflicts[norm]) for norm in sorted(self._conflicts)}
+
+
+# ========== 双向料号索引 ==========
+
+class CodeIndex:
+    """
+    客户料号 ⇄ 久益料号（工厂编号）双向索引，两个方向均为 O(1) 查找。
+
+    一个久益料号可对应多个客户料号（不同客户/不同sheet），反向查找返回全部客户料号及所在sheet。
+    同一客户料号出现在多个 sheet 时以靠后的 sheet 为准（与合并映射一致）。
+
+    参数:
+        sheets: list[dict] - MappingTable.sheets（按工作簿顺序）
+        normalized: NormalizedIndex | None - 原样查不到时按规范化料号查找（与 apply_mapping 一致）
+    """
+
+    def __init__(self, sheets=(), normalized=None):
+        self._forward = {}   # 客户料号 → (久益料号, sheet名)
+        self._reverse = {}   # 久益料号 → {客户料号: sheet名}
+        self._normalized = normalized
+        for sheet in sheets:
+            for code, info in sheet["mapping"].items():
+                self.add(code, info["产品编号"], sheet["name"])
+
+    def add(self, customer_code, factory_code, sheet):
+        """加入或更新一个客户料号的归属"""
+        previous = self._forward.get(customer_code)
+        if previous is not None and previous[0] != factory_code:
+            self._unlink(customer_code, previous[0])
+        self._forward[customer_code] = (factory_code, sheet)
+        self._reverse.setdefault(factory_code, {})[customer_code] = sheet
+
+    def discard(self, customer_code):
+        """移除一个客户料号（不存在时忽略）"""
+        previous = self._forward.pop(customer_code, None)
+        if previous is not None:
+            self._unlink(customer_code, previous[0])
+
+    def factory_code(self, customer_code, default=""):
+        """客户料号 → 久益料号（原样查不到时按规范化料号查找），找不到返回 default"""
+        entry = self._forward.get(customer_code)
+        if entry is None and self._normalized is not None:
+            key = self._normalized.resolve(customer_code)
+            if key is not None:
+                entry = self._forward.get(key)
+        return entry[0] if entry is not None else default
+
+    def customer_codes(self, factory_code):
+        """久益料号 → [(客户料号, sheet名)]（按客户料号排序），无对应料号返回空列表"""
+        return sorted(self._reverse.get(factory_code, {}).items())
+
+    def __len__(self):
+        return len(self._forward)
+
+    def _unlink(self, customer_code, factory_code):
+        customers = self._reverse.get(factory_code)
+        if customers is not None:
+            customers.pop(customer_code, None)
+            if not customers:
+                del self._reverse[factory_code]
+
+
+def format_mapping_changes(changes):
+    """变化列表 → 可读文本，如 "0005: +3 / −0 / ~1" """
+    if not changes:
+        return "无变化"
+    return "；".join(
+        f"{c['sheet']}: +{c['added']} / −{c['removed']} / ~{c['changed']}"
+        for c in changes
+    )
+
+
+class _LazySharedStrings:
+    """共享字符串表按需读取一次（多数重新加载不需要它）"""
+
+    def __init__(self, path):
+        self.path = path
+        self._loaded = False
+        self._strings = None
+
+    def get(self):
+        """返回共享字符串列表，读取失败返回 None"""
+        if not self._loaded:
+            self._loaded = True
+            try:
+                self._strings = load_shared_strings(self.path)
+            except UnsupportedXlsxError:
+                self._strings = None
+        return self._strings
+
+
+def _sst_prefix_unchanged(sheet, strings):
+    """共享字符串表变化时，判断该 sheet 用到的前缀部分是否不变"""
+    sst_max = sheet.get("sst_max")
+    if sst_max is None:
+        return False
+    if sst_max < 0:
+        return True
+    shared = strings.get()
+    return (
+        shared is not None
+        and len(shared) > sst_max
+        and _sst_digest(shared, sst_max) == sheet["sst_digest"]
+    )
+
+
+def _sst_digest(shared, sst_max):
+    """共享字符串表前 sst_max+1 项的摘要"""
+    if sst_max < 0:
+        return ""
+    digest = hashlib.sha1()
+    for text in shared[:sst_max + 1]:
+        digest.update(text.encode("utf-8", "surrogatepass"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def _diff_sheet(name, old, new):
+    """
+    比较同一 sheet 的新旧映射。
+
+    返回:
+        change: dict - {sheet, added, removed, changed}
+        keys: set - 有变化的料号
+    """
+    added = new.keys() - old.keys()
+    removed = old.keys() - new.keys()
+    changed = {k for k in new.keys() & old.keys() if new[k] != old[k]}
+    change = {
+        "sheet": name,
+        "added": len(added),
+        "removed": len(removed),
+        "changed": len(changed),
+    }
+    return change, added | removed | changed
+
+
+def _build_mapping(rows):
+    """由 (sheet名, (久益料号, 客户料号, 品名规格)) 行构建合并映射字典（后出现的覆盖先出现的）"""
+    mapping = {}
+    for _, values in rows:
+        _add_mapping_row(mapping, values)
     return mapping
 
 
+def _build_sheet_mappings(rows, sheet_names=None):
+    """同 _build_mapping，但按 sheet 分别构建: {sheet名: 映射字典}"""
+    by_sheet = {name: {} for name in sheet_names or ()}
+    for sheet_name, values in rows:
+        mapping = by_sheet.get(sheet_name)
+        if mapping is None:
+            mapping = by_sheet[sheet_name] = {}
+        _add_mapping_row(mapping, values)
+    return by_sheet
+
+
+def iter_mapping_entries(path=None, with_sheet=False):
+    """
+    逐条产出映射表中的 (客户料号, {产品编号, 产品名称})，不构建映射字典。
+    with_sheet=True 时产出 (客户料号, {产品编号, 产品名称}, sheet名)。
+
+    按工作簿顺序产出，同一客户料号后出现的应覆盖先出现的（与 load_mapping_table 一致），
+    供 mapping_store 直接写入数据库。
+    流式XML路径中途遇到无法保证一致的单元格时，改用 openpyxl 从头重新产出，
+    因此部分料号可能重复出现；按覆盖语义处理时结果不受影响。
+    """
+    path = path or MAPPING_TABLE_PATH
+    try:
+        for sheet_name, values in _iter_mapping_rows_fast(path):
+            entry = _mapping_entry(values)
+            if entry is not None:
+                yield (*entry, sheet_name) if with_sheet else entry
+        return
+    except UnsupportedXlsxError:
+        pass
+    for sheet_name, values in _iter_mapping_rows_openpyxl(path):
+        entry = _mapping_entry(values)
+        if entry is not None:
+            yield (*entry, sheet_name) if with_sheet else entry
+
+
+def _add_mapping_row(mapping, values):
+    entry = _mapping_entry(values)
+    if entry is not None:
+        mapping[entry[0]] = entry[1]
+
+
+def _mapping_entry(values):
+    """(久益料号, 客户料号, 品名规格) 原始值 → (客户料号, 映射值)，无效行返回 None"""
+    raw_jy, raw_customer, raw_desc = values
+
+    # 转字符串，处理数值型客户料号（如 sheet 0005 中的整数）
+    jy_code = _to_str(raw_jy)
+    customer_code = _to_str(raw_customer)
+    desc = _to_str(raw_desc)
+
+    if not jy_code or not customer_code:
+        return None
+
+    return customer_code, {
+        "产品编号": jy_code,
+        "产品名称": desc,
+    }
+
+
+def _iter_mapping_rows_fast(path, sheet_names=None, shared_strings=None,
+                            sst_usage=None):
+    """流式XML路径: 逐行产出 (sheet名, B/C/D 三列原始值)"""
+    columns = (MAP_COL_IDX_JY_CODE, MAP_COL_IDX_CUSTOMER, MAP_COL_IDX_DESC)
+    return iter_sheet_columns(
+        path, columns, MAPPING_HEADER_MARKER,
+        sheet_names=sheet_names, shared_strings=shared_strings, sst_usage=sst_usage,
+    )
+
+
+def _iter_mapping_rows_openpyxl(path, sheet_names=None):
+    """openpyxl 路径: 逐行产出 (sheet名, B/C/D 三列原始值)"""
+    # openpyxl 导入较慢，仅在回退时导入（映射表快照命中时也无需加载）
+    from openpyxl import load_workbook
+
+    wanted = set(sheet_names) if sheet_names is not None else None
+    wb = load_workbook(path, read_only=True)
+    try:
+        for sheet_name in wb.sheetnames:
+            if wanted is not None and sheet_name not in wanted:
+                continue
+            ws = wb[sheet_name]
+            header_row_found = False
+
+            for row in ws.iter_rows(values_only=True):
+                # 查找表头行（含"久益料号"的行）
+                if not header_row_found:
+                    cells = [str(c).strip() if c else "" for c in row]
+                    if any(MAPPING_HEADER_MARKER in c for c in cells):
+                        header_row_found = True
+                    continue
+
+                # 数据行
+                if row is None or len(row) <= MAP_COL_IDX_DESC:
+                    continue
+
+                yield sheet_name, (
+                    row[MAP_COL_IDX_JY_CODE],
+                    row[MAP_COL_IDX_CUSTOMER],
+                    row[MAP_COL_IDX_DESC],
+                )
+    finally:
+        wb.close()
+
+
 def _to_str(value):
     """将单元格值安全转为字符串，处理 None / int / float"""
     if value is None:
@@ -83,7 +580,7 @@ def _to_str(value):
     return str(value).strip()
 
 
-def apply_mapping(items, mapping):
+def apply_mapping(items, mapping, normalized=None):
     """
     对解析出的订单项目应用编码映射，生成输出行。
 
@@ -92,81 +589,242 @@ def apply_mapping(items, mapping):
     - 其余14列留空
 
     参数:
-        items: list[dict] - PDF解析出的项目列表
-        mapping: dict - 映射字典
+        items: Iterable[dict] - PDF解析出的项目（列表或 iter_purchase_order_items 的流）
+        mapping: dict | mapping_store.SqliteMappingStore - 映射字典或映射库
+        normalized: NormalizedIndex | None - 映射字典的规范化索引（见 map_columns）
 
     返回:
-        output_rows: list[dict] - 输出模板格式的行列表
+        output_rows: list[OutputRow] - 输出模板格式的行列表（可按字典方式访问）
         unmapped: list[str] - 未找到映射的料件编号列表
     """
-    output_rows = []
-    unmapped = []
+    columns = map_columns(items, mapping, normalized)
+    return columns.rows(), columns.unmapped
 
-    today_str = date.today().strftime("%Y/%m/%d")
 
-    for item in items:
-        customer_code = item.get("料件编号", "").strip()
-        product_info = mapping.get(customer_code)
+def iter_mapped_rows(items, mapping, unmapped=None, normalized=None):
+    """
+    流式版 apply_mapping：逐条产出输出行，不构建完整列表。
 
-        # 数量 + 安全余量
-        raw_qty = item.get("采购数量", "")
-        try:
-            qty = int(float(str(raw_qty).replace(",", ""))) + QUANTITY_SAFETY_MARGIN
-        except (ValueError, TypeError):
-            qty = raw_qty  # 无法转换时保留原值
-
-        # 计划结束时间 = 订单交货日期（若早于今天则用今天）
-        delivery_date_str = item.get("出货日期", "").strip()
-        end_date = _resolve_end_date(delivery_date_str, today_str)
-
-        row = {
-            # ===== 5个必填字段 =====
-            "产品编号": "",
-            "产品规格": customer_code,
-            "数量": qty,
-            "计划开始时间": today_str,
-            "工单分类": OUTPUT_ORDER_TYPE,
-            # ===== 其余列留空 =====
-            "产品名称": "",
-            "计划结束时间": end_date,
-            "工艺路线名称": "",
-            "工序列表": "",
-            "备注": "",
-            "更新": "",
-            "供应商": "",
-            "供应商名称": "",
-            "供应商联系人": "",
-            "供应商联系电话": "",
-            "收货地址": "",
-            "采购单价": "",
-            "客户选择": "",
-            "关联产品": "",
-            # ===== 内部字段（预览/比对用，不写入导出Excel）=====
-            "_映射状态": "未映射",
-            "_产品名称": "",
-            "_品名": item.get("品名", ""),
-            "_图号": item.get("图号", ""),
-            "_规格": item.get("规格", ""),
-            "_交期回复": item.get("交期回复", ""),
-            "_项次": item.get("项次", ""),
-        }
+    可直接串联 pdf_parser.iter_purchase_order_items → 本函数 → write_output_excel。
+    内部按 MAPPING_LOOKUP_BATCH 条一批做列式映射，输出与 apply_mapping 完全相同。
+
+    参数:
+        items: Iterable[dict] - PDF解析出的项目
+        mapping: dict | mapping_store.SqliteMappingStore - 映射字典或映射库
+        unmapped: list | None - 若提供，未映射的料件编号会追加到该列表
+        normalized: NormalizedIndex | None - 映射字典的规范化索引（见 map_columns）
+
+    产出:
+        dict - 输出模板格式的行
+    """
+    items = iter(items)
+    while True:
+        batch = list(islice(items, MAPPING_LOOKUP_BATCH))
+        if not batch:
+            return
+        columns = map_columns(batch, mapping, normalized)
+        if unmapped is not None:
+            unmapped.extend(columns.unmapped)
+        if normalized is None and isinstance(mapping, dict):
+            normalized = columns.normalized  # 后续批次复用已构建的规范化索引
+        yield from columns.iter_rows()
+
+
+# ========== 列式映射 ==========
+
+def map_columns(items, mapping, normalized=None):
+    """
+    列式映射: 只保存各列的值列表，输出行字典在需要时（界面/导出）才生成。
+
+    同一料号、交货日期、数量只查找/解析一次；批量和汇总场景（数万行）
+    比逐行构建26键字典快，跨进程传递也更小（列名不随每行重复）。
+
+    先按原样料号查找，找不到再按规范化料号查找（全角/空白/大小写/数值差异），
+    行的 _匹配方式 记录命中方式（精确 / 规范化(...)）。
+
+    参数:
+        items: Iterable[dict] - PDF解析出的项目
+        mapping: dict | mapping_store.SqliteMappingStore - 映射字典或映射库
+                 （映射库按批用 get_many / get_many_normalized 查询，每批 MAPPING_LOOKUP_BATCH 条）
+        normalized: NormalizedIndex | None - 映射字典的规范化索引（如 MappingTable.normalized）；
+                    未提供时在首次原样查找失败时按 mapping 构建
 
-        if product_info:
-            row["产品编号"] = product_info["产品编号"]
-            row["_产品名称"] = product_info["产品名称"]
-            row["_映射状态"] = "已映射"
+    返回:
+        MappedColumns
+    """
+    columns = MappedColumns()
+    today_str = date.today().strftime("%Y/%m/%d")
+    codes = columns.customer_code
+    for item in items:
+        codes.append(item.get("料件编号", "").strip())
+        columns.raw_qty.append(item.get("采购数量", ""))
+        columns.delivery.append(item.get("出货日期", "").strip())
+        columns.name.append(item.get("品名", ""))
+        columns.drawing_no.append(item.get("图号", ""))
+        columns.spec.append(item.get("规格", ""))
+        columns.reply.append(item.get("交期回复", ""))
+        columns.line_no.append(item.get("项次", ""))
+    columns.start_date = [today_str] * len(codes)
+
+    resolved, columns.normalized = _resolve_codes(set(codes), mapping, normalized)
+    for code in codes:
+        found = resolved.get(code)
+        if found is None:
+            columns.info.append(None)
+            columns.match.append("")
+            if code:
+                columns.unmapped.append(code)
         else:
-            if customer_code:
-                unmapped.append(customer_code)
+            columns.info.append(found[0])
+            columns.match.append(found[1])
+    return columns
+
+
+class MappedColumns:
+    """
+    列式映射结果（map_columns 生成）。
+
+    每列一个列表，第 i 个元素属于第 i 行；只有 rows()/iter_rows() 才生成行字典，
+    字典内容与逐行映射的输出完全相同。数量和计划结束时间在生成行时按值缓存计算。
+    """
+
+    def __init__(self):
+        self.customer_code = []
+        self.raw_qty = []
+        self.delivery = []      # 订单交货日期（原始字符串）
+        self.start_date = []
+        self.info = []          # 映射值 {产品编号, 产品名称}，未映射为 None
+        self.match = []         # 匹配方式（未映射为空）
+        self.name = []
+        self.drawing_no = []
+        self.spec = []
+        self.reply = []
+        self.line_no = []
+        self.unmapped = []      # 未映射的料件编号（按出现顺序，可重复）
+        self.normalized = None  # 查找时使用/构建的规范化索引
+
+    def __len__(self):
+        return len(self.customer_code)
+
+    def extend(self, other):
+        """追加另一批映射结果（如汇总多份采购单）"""
+        for attr in (
+            "customer_code", "raw_qty", "delivery", "start_date", "info", "match",
+            "name", "drawing_no", "spec", "reply", "line_no", "unmapped",
+        ):
+            getattr(self, attr).extend(getattr(other, attr))
+
+    def slice(self, start, stop):
+        """第 start~stop-1 行组成的新结果（如分块导出；不含 unmapped 和规范化索引）"""
+        part = MappedColumns()
+        for attr in (
+            "customer_code", "raw_qty", "delivery", "start_date", "info", "match",
+            "name", "drawing_no", "spec", "reply", "line_no",
+        ):
+            setattr(part, attr, getattr(self, attr)[start:stop])
+        return part
+
+    def stats(self):
+        """(总数, 已映射, 未映射)，同 get_mapping_stats 但不生成行字典"""
+        total = len(self.info)
+        mapped = total - self.info.count(None)
+        return total, mapped, total - mapped
+
+    def rows(self):
+        return list(self.iter_rows())
+
+    def iter_rows(self):
+        """逐行生成输出行（OutputRow，可按字典方式访问）"""
+        qty_cache = {}
+        for i, customer_code in enumerate(self.customer_code):
+            # 数量 + 安全余量（同一原始值只转换一次）
+            raw_qty = self.raw_qty[i]
+            try:
+                qty = qty_cache[raw_qty]
+            except KeyError:
+                qty = qty_cache[raw_qty] = _add_safety_margin(raw_qty)
+            except TypeError:
+                qty = _add_safety_margin(raw_qty)
+
+            today_str = self.start_date[i]
+            info = self.info[i]
+            yield OutputRow(
+                # ===== 5个必填字段: 产品编号/产品规格/数量/计划开始时间/工单分类 =====
+                info["产品编号"] if info else "",
+                customer_code,
+                qty,
+                today_str,
+                OUTPUT_ORDER_TYPE,
+                # ===== 产品名称、计划结束时间及其余留空列（见 OutputRow.FIELDS）=====
+                "",
+                # 计划结束时间 = 订单交货日期（若早于今天则用今天）
+                _resolve_end_date(self.delivery[i], today_str),
+                "", "", "", "", "", "", "", "", "", "", "", "",
+                # ===== 内部字段（预览/比对用，不写入导出Excel）=====
+                "已映射" if info else "未映射",
+                self.match[i],
+                info["产品名称"] if info else "",
+                self.name[i],
+                self.drawing_no[i],
+                self.spec[i],
+                self.reply[i],
+                self.line_no[i],
+            )
+
+    def __getstate__(self):
+        # 规范化索引只在查找时使用，不随结果跨进程传递
+        state = self.__dict__.copy()
+        state["normalized"] = None
+        return state
+
+
+def _resolve_codes(codes, mapping, normalized):
+    """
+    批量查找料号（每个料号只查一次）。
+
+    返回:
+        resolved: dict - {料号: (映射值, 匹配方式)}，只含找到的料号
+        normalized: NormalizedIndex | None - 使用/构建的规范化索引
+    """
+    codes.discard("")
+    resolved = {}
+    if hasattr(mapping, "get_many"):
+        codes = list(codes)
+        for start in range(0, len(codes), MAPPING_LOOKUP_BATCH):
+            chunk = set(codes[start:start + MAPPING_LOOKUP_BATCH])
+            for code, info in mapping.get_many(chunk).items():
+                resolved[code] = (info, MATCH_EXACT)
+            for code, (key, info) in mapping.get_many_normalized(
+                chunk - resolved.keys()
+            ).items():
+                resolved[code] = (info, match_label(code, key))
+        return resolved, normalized
+
+    for code in codes:
+        info = mapping.get(code)
+        if info is not None:
+            resolved[code] = (info, MATCH_EXACT)
+            continue
+        if normalized is None:
+            normalized = NormalizedIndex(mapping)
+        key = normalized.resolve(code)
+        if key is not None:
+            resolved[code] = (mapping[key], match_label(code, key))
+    return resolved, normalized
 
-        output_rows.append(row)
 
-    return output_rows, unmapped
+def _add_safety_margin(raw_qty):
+    """采购数量 + 安全余量，无法转换时保留原值"""
+    try:
+        return int(float(str(raw_qty).replace(",", ""))) + QUANTITY_SAFETY_MARGIN
+    except (ValueError, TypeError):
+        return raw_qty
 
 
+@lru_cache(maxsize=4096)
 def _resolve_end_date(delivery_date_str, today_str):
     """
-    解析交货日期，若早于今天则返回今天。
+    解析交货日期，若早于今天则返回今天（按参数缓存，同一日期只解析一次）。
 
     支持格式: "2026/03/28", "2026-03-28" 等常见日期格式
 
@@ -196,7 +854,9 @@ def _resolve_end_date(delivery_date_str, today_str):
 
 
 def get_mapping_stats(output_rows):
-    """统计映射结果"""
+    """统计映射结果（也接受 MappedColumns）"""
+    if isinstance(output_rows, MappedColumns):
+        return output_rows.stats()
     total = len(output_rows)
     mapped = sum(1 for r in output_rows if r.get("_映射状态") == "已映射")
     return total, mapped, total - mapped
@@ -20,6 +20,22 @@ MAP_COL_PRODUCT_SPEC = "生久料号"      # 客户料件编号 (如 YY60030058)
 MAP_COL_IDX_JY_CODE = 1    # B列: 久益料号
 MAP_COL_IDX_CUSTOMER = 2   # C列: 客户料号（生久料号/甬阅料号/...）
 MAP_COL_IDX_DESC = 3       # D列: 品名规格
+MAPPING_HEADER_MARKER = "久益料号"  # 每个sheet中含此文本的行为表头行，其后为数据
+
+# 映射表自动重新加载（主界面轮询文件状态，Excel保存后自动加载并重新映射当前订单）
+MAPPING_WATCH_ENABLED = True
+MAPPING_WATCH_INTERVAL_MS = 2000    # 轮询间隔（毫秒）
+MAPPING_WATCH_SETTLE_SECONDS = 1.0  # 文件状态保持不变多久才视为保存完成
+
+# 映射表存储后端:
+#   "memory" - 读入内存字典（默认，配合 MAPPING_SNAPSHOT_DIR 下的映射表快照）
+#   "sqlite" - 转存为映射表旁带索引的 SQLite 库（mapping_table.db），按需查询，
+#              内存占用和启动时间与料号数量无关，适合多客户的超大料号目录
+MAPPING_BACKEND = "memory"
+MAPPING_DB_PATH = os.path.join(APP_DIR, "mapping_table.db")
+MAPPING_SNAPSHOT_DIR = os.path.join(APP_DIR, "mapping_snapshot")  # 映射表快照（只放本机，不放映射表旁）
+MAPPING_LOOKUP_BATCH = 500  # 映射库批量查询每批料号数（SQLite 单条语句参数上限 999）
+SUGGEST_TOP_K = 3           # 未映射提醒中每个料号显示的相近料号建议数
 
 # ===== PDF采购单中需要提取的字段 =====
 PDF_MAPPING_KEY = "料件编号"  # PDF中用于映射的字段名
@@ -51,5 +67,30 @@ OUTPUT_COLUMNS = [
     "关联产品",
 ]
 
+# 导出Excel写出方式: "openpyxl"（只写模式流式）/ "xml"（xlsx_writer 直接写XML，超大导出快一个数量级）
+EXCEL_WRITER_BACKEND = "openpyxl"
+EXPORT_CHUNK_ROWS = 5000    # 分块导出每个文件的行数上限（ERP 导入单个文件过大会失败；0=不分块）
+EXPORT_CHUNK_WORKERS = 0    # 分块导出并行进程数（0=按CPU核数自动，1=串行）
+CSV_WRITE_BOM = True        # CSV 导出带 UTF-8 BOM（Excel 直接打开不乱码；ERP 导入不接受 BOM 时关闭）
+DAILY_EXPORT_DIR = os.path.join(APP_DIR, "daily_export")  # 当日汇总（行日志、汇总导入文件和清单）所在目录
+
 # ===== 图纸比对相关 =====
 DRAWING_PRINT_FOLDER = "待打印"                          # 待打印文件夹名
+# 图纸库索引缓存（按目录修改时间和每个文件的大小/修改时间增量扫描，共享盘上的大图纸库不必每次全部列出）
+DRAWING_INDEX_CACHE_ENABLED = True
+DRAWING_INDEX_CACHE_DIR = os.path.join(APP_DIR, "drawing_index")
+
+# ===== PDF解析相关 =====
+PDF_PARSER_BACKEND = "pdfplumber"  # 解析后端: "pdfplumber" / "pdfium"（pypdfium2，更快）
+PDF_PARSE_WORKERS = 1          # 并行解析进程数（1=串行，0=按CPU核数自动）
+PDF_PARALLEL_MIN_PAGES = 20    # 页数达到该值才启用多进程（进程启动有固定开销）
+PDF_PAGE_TRIAGE_ENABLED = True  # 表格提取前先用文本特征跳过封面/条款/签字页
+
+# 表格列模板（按供应商学习的列边界，后续页面跳过整页表格检测）
+PDF_TABLE_TEMPLATE_ENABLED = True
+TABLE_TEMPLATE_PATH = os.path.join(APP_DIR, "table_templates.json")
+
+# 解析缓存（按PDF内容哈希，与exe同目录）
+PARSE_CACHE_DIR = os.path.join(APP_DIR, "parse_cache")
+PARSE_CACHE_MAX_ENTRIES = 200             # 最多缓存的采购单份数
+PARSE_CACHE_MAX_BYTES = 50 * 1024 * 1024  # 缓存总大小上限（50MB）
@@ -0,0 +1,288 @@
+"""当日汇总导出模块 - 把当天处理的各采购单追加到一个汇总导入文件
+
+计划员每天导入一个汇总文件，而不是每份采购单一个 工厂订单_{采购单号}.xlsx。
+每追加一份采购单都读回并重写不断变大的工作簿很慢，这里改为两步:
+
+  1. 追加 - 行写入旁路行日志 工厂订单_汇总_{日期}.rows.jsonl，只在文件末尾追加，不读写已有数据
+  2. 整理 - 需要导入文件时，由行日志一次流式写出 工厂订单_汇总_{日期}.xlsx（或 .csv/.jsonl），
+           并写出清单 工厂订单_汇总_{日期}_manifest.json，记录每份采购单的来源和在汇总中的行范围
+
+行日志格式（UTF-8，每行一个JSON）:
+  {"order_no": 采购单号, "source": 来源PDF, "appended": 时间, "columns": [...], "rows": N, "bytes": 数据字节数, "digest": 摘要}
+  [第1行的值, ...]      - 按 columns 顺序的N行值（与导出文件中的值相同，数量已转为数值）
+  ...
+
+同一采购单再次追加（重新处理）时以最后一次为准，在汇总中占据首次追加时的位置（原地替换），
+内容完全相同时不重复写入。写到一半中断（程序崩溃、断电）的块行数或字节数与块头不符，读取时忽略；
+下次追加前先把行日志截回到最后一个完整块的末尾，残缺数据不会与新块混在一起。
+
+界面和批量转换（batch --daily）可能同时追加到同一天的行日志: 追加的查重、截断和写入
+全程持有行日志旁的 .lock 文件锁，不会截掉另一进程正在写的块，也不会重复写入同一采购单。
+"""
+import hashlib
+import json
+import os
+from datetime import date, datetime
+
+from config import DAILY_EXPORT_DIR, OUTPUT_COLUMNS
+from excel_writer import iter_output_values, write_output_file
+from file_lock import file_lock
+
+MANIFEST_VERSION = 1
+
+
+def daily_file_name(day=None, ext=".xlsx"):
+    """当日汇总导入文件名（day: date / "YYYYMMDD" / None=今天）"""
+    return f"工厂订单_汇总_{_day_text(day)}{ext}"
+
+
+def daily_log_path(daily_dir=None, day=None):
+    """当日汇总行日志路径（daily_dir 为 None 使用 config.DAILY_EXPORT_DIR）"""
+    daily_dir = daily_dir or DAILY_EXPORT_DIR
+    return os.path.join(daily_dir, f"工厂订单_汇总_{_day_text(day)}.rows.jsonl")
+
+
+def append_order(log_path, output_rows, order_no, source=""):
+    """
+    把一份采购单的输出行追加到行日志（只在末尾追加；查重时只解析块头，不改写已有数据）。
+
+    参数:
+        log_path: str - 行日志路径（见 daily_log_path，目录不存在时创建）
+        output_rows: Iterable[dict] | MappedColumns - 同 write_output_excel；传入0行等于从汇总中移除该采购单
+        order_no: str - 采购单号（同一采购单再次追加时替换其全部行）
+        source: str - 来源（如PDF路径），记录在清单中
+
+    返回:
+        result: dict - order_no, rows, status（added 新增 / replaced 替换 / unchanged 内容相同未写入）
+    """
+    if not order_no:
+        raise ValueError("追加到当日汇总需要采购单号")
+    if hasattr(output_rows, "iter_rows"):
+        output_rows = output_rows.iter_rows()
+
+    lines = [
+        json.dumps(values, ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+        for values in iter_output_values(output_rows)
+    ]
+    digest = hashlib.sha1(b"".join(lines)).hexdigest()
+
+    os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+    with file_lock(log_path + ".lock"):
+        return _append_block(log_path, lines, digest, order_no, source)
+
+
+def list_daily_orders(log_path):
+    """
+    行日志中当前有效的采购单（每份采购单取最后一次追加，按首次追加的顺序）。
+
+    返回:
+        orders: list[dict] - order_no, source, appended, rows, first_row, last_row, replaced
+            （first_row/last_row 为在汇总文件中的数据行号，从1开始；0行的采购单两者为0；
+             replaced 为被重新追加替换的次数）
+    """
+    orders = []
+    next_row = 1
+    for block in _latest_blocks(_scan_blocks(log_path)).values():
+        header = block["header"]
+        rows = header["rows"]
+        orders.append({
+            "order_no": header["order_no"],
+            "source": header.get("source", ""),
+            "appended": header.get("appended", ""),
+            "rows": rows,
+            "first_row": next_row if rows else 0,
+            "last_row": next_row + rows - 1 if rows else 0,
+            "replaced": block["replaced"],
+        })
+        next_row += rows
+    return orders
+
+
+def compact_daily_log(log_path, output_path=None, backend=None):
+    """
+    由行日志写出汇总导入文件和清单（已是最新时不重写）。
+
+    参数:
+        log_path: str - 行日志路径
+        output_path: str | None - 汇总文件路径（None 为行日志旁的 工厂订单_汇总_{日期}.xlsx；
+                     按扩展名选择格式，同 write_output_file）
+        backend: str | None - Excel 写出方式（同 write_output_excel）
+
+    返回:
+        manifest: dict - 清单内容（同清单文件）:
+            output, manifest, total_rows, created, log_bytes, log_mtime_ns, compacted（本次是否重新写出）,
+            orders: 同 list_daily_orders
+    """
+    if output_path is None:
+        output_path = log_path[: -len(".rows.jsonl")] + ".xlsx"
+    stem, ext = os.path.splitext(output_path)
+    manifest_path = stem + "_manifest.json"
+
+    # 行日志只追加（截掉残缺块后才会变短），大小和修改时间不变即内容不变
+    st = os.stat(log_path)
+    log_bytes = st.st_size
+    previous = _read_json(manifest_path)
+    if (
+        previous is not None
+        and previous.get("log_bytes") == log_bytes
+        and previous.get("log_mtime_ns") == st.st_mtime_ns
+        and previous.get("output") == os.path.abspath(output_path)
+        and os.path.exists(output_path)
+    ):
+        previous["compacted"] = False
+        return previous
+
+    blocks = _latest_blocks(_scan_blocks(log_path))
+    tmp_path = f"{stem}.tmp{ext}"  # 保留扩展名，按格式写出
+    try:
+        write_output_file(_iter_block_rows(log_path, blocks.values()), tmp_path, backend)
+        os.replace(tmp_path, output_path)  # 汇总文件在 Excel 中打开时会失败，原文件保持不变
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    orders = list_daily_orders(log_path)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "output": os.path.abspath(output_path),
+        "manifest": manifest_path,
+        "log": os.path.abspath(log_path),
+        "log_bytes": log_bytes,
+        "log_mtime_ns": st.st_mtime_ns,
+        "total_rows": sum(o["rows"] for o in orders),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "orders": orders,
+    }
+    _write_json(manifest_path, manifest)
+    manifest["compacted"] = True
+    return manifest
+
+
+# ========== 行日志写入 ==========
+
+def _append_block(log_path, lines, digest, order_no, source):
+    """append_order 在文件锁内的部分: 查重、截掉残缺块、整块写入"""
+    blocks = _scan_blocks(log_path)
+    previous = _latest_blocks(blocks).get(order_no)
+    result = {"order_no": order_no, "rows": len(lines)}
+    if previous is not None and previous["header"].get("digest") == digest:
+        result["status"] = "unchanged"
+        return result
+
+    header = {
+        "order_no": order_no,
+        "source": source,
+        "appended": datetime.now().isoformat(timespec="seconds"),
+        "columns": OUTPUT_COLUMNS,
+        "rows": len(lines),
+        "bytes": sum(len(line) for line in lines),
+        "digest": digest,
+    }
+    block = json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n" + b"".join(lines)
+    valid_end = blocks[-1]["end"] if blocks else 0
+
+    with open(log_path, "ab") as f:
+        # 上次写到一半中断时末尾是残缺的块，先截掉，避免新块接在残缺行之后被当作其数据
+        if f.seek(0, os.SEEK_END) > valid_end:
+            f.truncate(valid_end)
+        f.write(block)  # 整块一次写入
+    result["status"] = "added" if previous is None else "replaced"
+    return result
+
+
+# ========== 行日志读取 ==========
+
+def _scan_blocks(log_path):
+    """
+    顺序扫描行日志，只解析块头，记录每块数据行的起始偏移。
+
+    返回:
+        blocks: list[dict] - header, offset（首个数据行的字节偏移）, end（块末尾的字节偏移）
+        （行数或字节数与块头不符的块 —— 写到一半中断 —— 不返回）
+    """
+    blocks = []
+    current = None
+    offset = 0
+    try:
+        f = open(log_path, "rb")
+    except FileNotFoundError:
+        return blocks
+    with f:
+        for line in f:
+            offset += len(line)
+            if not line.endswith(b"\n"):
+                break  # 末尾未写完的行
+            if line.startswith(b"{"):
+                _close_block(current, blocks)
+                try:
+                    current = {"header": json.loads(line), "offset": offset, "end": offset, "count": 0}
+                except ValueError:
+                    current = None
+            elif current is not None:
+                current["count"] += 1
+                current["end"] = offset
+    _close_block(current, blocks)
+    return blocks
+
+
+def _close_block(block, blocks):
+    if block is None or block["count"] != block["header"].get("rows"):
+        return
+    size = block["header"].get("bytes")  # 早期行日志的块头没有 bytes
+    if size is not None and block["end"] - block["offset"] != size:
+        return
+    blocks.append(block)
+
+
+def _latest_blocks(blocks):
+    """每份采购单的最后一块（{采购单号: 块}，按首次出现的顺序；块的 replaced 为被替换次数）"""
+    latest = {}
+    for block in blocks:
+        order_no = block["header"]["order_no"]
+        previous = latest.get(order_no)
+        block["replaced"] = previous["replaced"] + 1 if previous is not None else 0
+        latest[order_no] = block  # 已有的键重新赋值时保持原位置
+    return latest
+
+
+def _iter_block_rows(log_path, blocks):
+    """
+    按块顺序逐行读出 {列名: 值}（按块头的列名对应，导出列调整后旧日志仍可整理）。
+
+    无法解析的行（块头没有 bytes 的早期行日志中，残缺行补换行后可能被计入块内）跳过。
+    """
+    with open(log_path, "rb") as f:
+        for block in blocks:
+            header = block["header"]
+            columns = header["columns"]
+            f.seek(block["offset"])
+            for _ in range(header["rows"]):
+                try:
+                    values = json.loads(f.readline())
+                except ValueError:
+                    continue
+                yield dict(zip(columns, values))
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _day_text(day):
+    if day is None:
+        day = date.today()
+    if isinstance(day, (date, datetime)):
+        return day.strftime("%Y%m%d")
+    return str(day)
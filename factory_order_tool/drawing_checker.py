@@ -6,7 +6,7 @@
   - 解决扫描版PDF无法识别版本号的问题
 
 工作流:
-  1. build_drawing_index() 一次性扫描图纸库，构建索引
+  1. build_drawing_index() 一次性扫描图纸库，构建索引（索引缓存在程序目录下，只重新扫描变化的文件）
   2. 从订单数据中获取每个YY产品的「应有版本号」
   3. O(1) 字典查找替代逐个glob
   4. 严格字符串比对
@@ -20,11 +20,19 @@
 
 推荐命名: J00016025 YY60030362-A01.pdf（可选末尾追加产品类型: J00016025 YY60030362-A01导线.pdf）
 """
+import hashlib
+import json
 import os
 import re
 import shutil
+import time
 
-from config import DRAWING_PRINT_FOLDER
+from config import (
+    DRAWING_INDEX_CACHE_DIR,
+    DRAWING_INDEX_CACHE_ENABLED,
+    DRAWING_PRINT_FOLDER,
+)
+from records import DrawingResult
 
 
 # YY编号提取
@@ -36,6 +44,11 @@ _CLEAN_JY_PATTERN = re.compile(r"(?:J\d+|YY\d+)")
 # 版本号模式: 大写字母 + 可选分隔符 + 1位以上数字（兼容 A0/B0/A.1/A/0 等单位数格式）
 _VERSION_PATTERN = re.compile(r"([A-Z][/.]?\d+)")
 
+# 图纸索引缓存格式版本（文件名提取规则变化时须递增，使已有缓存失效）
+_DRAWING_CACHE_VERSION = 1
+# 修改时间距今不足该值的目录不信任其修改时间（纳秒）
+_DIR_MTIME_SETTLE_NS = 2 * 10**9
+
 
 # ========== 版本号提取 ==========
 
@@ -153,62 +166,180 @@ def generate_standard_name(factory_code, yy_code, version):
 
 # ========== 图纸索引 ==========
 
-def build_drawing_index(drawing_dir):
+def build_drawing_index(drawing_dir, stats=None, cache_dir=None):
     """
     预扫描图纸库目录，构建 {YY编号: (文件路径, 版本号)} 索引。
 
     一次性遍历目录中所有PDF文件，从文件名提取YY编号和版本号。
     时间复杂度: O(n) 单次遍历，n为PDF文件数量。
 
+    启用索引缓存（config.DRAWING_INDEX_CACHE_ENABLED）时，每个图纸库的扫描结果
+    （目录修改时间 + 每个PDF的文件名、大小、修改时间和提取结果）保存在程序目录下:
+      - 目录修改时间未变（没有增删/改名）: 不列目录，直接按缓存重放
+      - 已变化: 列一次目录（os.scandir，Windows 下大小/修改时间随目录列表一并返回，
+        不再逐个文件访问共享盘），只对新增或大小/修改时间变化的文件重新提取
+    缓存按目录列表顺序保存，重放结果（index / bad_names）与完整扫描完全一致。
+
     参数:
         drawing_dir: str - 图纸库目录路径
+        stats: dict | None - 若提供，填入扫描统计:
+            seconds 耗时, files PDF文件数, rescanned 重新提取的文件数, removed 删除的文件数,
+            cache 缓存情况（off 未启用 / built 首次建立 / updated 增量更新 / unchanged 目录未变化）
+        cache_dir: str | None - 索引缓存目录（None 使用 config.DRAWING_INDEX_CACHE_DIR）
 
     返回:
         index: dict - {yy_code: (file_path, version)}
             version 为 None 表示无法提取版本号
         bad_names: list[str] - 含YY编号但无法提取版本号的文件名列表
     """
+    start = time.perf_counter()
     index = {}
     bad_names = []
+    scan = {"files": 0, "rescanned": 0, "removed": 0, "cache": "off"}
+
+    if drawing_dir and os.path.isdir(drawing_dir):
+        if DRAWING_INDEX_CACHE_ENABLED:
+            entries = _cached_drawing_entries(
+                drawing_dir, cache_dir or DRAWING_INDEX_CACHE_DIR, scan
+            )
+        else:
+            entries = _scan_drawing_entries(drawing_dir, scan)
+        for fname, yy_code, version in entries:
+            _add_to_index(index, bad_names, drawing_dir, fname, yy_code, version)
+
+    if stats is not None:
+        stats.update(scan)
+        stats["seconds"] = time.perf_counter() - start
+    return index, bad_names
+
 
-    if not drawing_dir or not os.path.isdir(drawing_dir):
-        return index, bad_names
+def _add_to_index(index, bad_names, drawing_dir, fname, yy_code, version):
+    """按目录列表顺序逐个加入索引（同一YY编号多个文件时的取舍与顺序有关）"""
+    if not yy_code:
+        return  # 不含YY编号的PDF忽略
 
+    fpath = os.path.join(drawing_dir, fname)
+    if version:
+        # 同一YY编号多个文件时取文件名排序最后的
+        if yy_code not in index or fname > os.path.basename(index[yy_code][0]):
+            index[yy_code] = (fpath, version)
+    else:
+        # 有YY编号但无版本号
+        if yy_code not in index:
+            index[yy_code] = (fpath, None)
+        bad_names.append(fname)
+
+
+def _parse_drawing_name(fname):
+    """图纸文件名 → (YY编号, 版本号)（无YY编号时均为 None）"""
+    yy_match = YY_CODE_PATTERN.search(fname)
+    if not yy_match:
+        return None, None
+    # 提取版本号（宽容模式）
+    return yy_match.group(1), extract_version_from_filename(fname)
+
+
+def _scan_drawing_entries(drawing_dir, scan):
+    """完整扫描（不使用缓存）: [(文件名, YY编号, 版本号)]，按目录列表顺序"""
+    entries = []
     for fname in os.listdir(drawing_dir):
         # 只处理PDF文件
         if not fname.lower().endswith(".pdf"):
             continue
-
-        fpath = os.path.join(drawing_dir, fname)
-        if not os.path.isfile(fpath):
+        if not os.path.isfile(os.path.join(drawing_dir, fname)):
             continue
+        entries.append((fname, *_parse_drawing_name(fname)))
+    scan["files"] = scan["rescanned"] = len(entries)
+    return entries
+
+
+def _cached_drawing_entries(drawing_dir, cache_dir, scan):
+    """按索引缓存增量扫描: [(文件名, YY编号, 版本号)]，按目录列表顺序"""
+    cache_path = os.path.join(cache_dir, f"{_drawing_cache_key(drawing_dir)}.json")
+    cached = _read_drawing_cache(cache_path, drawing_dir)
+    # 先取目录修改时间再列目录: 扫描期间的改动会让下次检查时修改时间不一致
+    dir_mtime = os.stat(drawing_dir).st_mtime_ns
+
+    if cached is not None and cached["dir_mtime_ns"] == dir_mtime:
+        scan["cache"] = "unchanged"
+        scan["files"] = len(cached["entries"])
+        return [(fname, yy_code, version) for fname, _, _, yy_code, version in cached["entries"]]
+
+    known = {e[0]: e for e in cached["entries"]} if cached is not None else {}
+    records = []
+    with os.scandir(drawing_dir) as it:
+        for entry in it:
+            fname = entry.name
+            if not fname.lower().endswith(".pdf"):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            old = known.pop(fname, None)
+            if old is not None and old[1] == st.st_size and old[2] == st.st_mtime_ns:
+                records.append(old)
+            else:
+                records.append([fname, st.st_size, st.st_mtime_ns, *_parse_drawing_name(fname)])
+                scan["rescanned"] += 1
+
+    scan["cache"] = "updated" if cached is not None else "built"
+    scan["files"] = len(records)
+    scan["removed"] = len(known)
+    # 目录修改时间精度有限（FAT 2秒、部分共享盘1秒），刚修改过的目录下次仍重新列出
+    if time.time_ns() - dir_mtime < _DIR_MTIME_SETTLE_NS:
+        dir_mtime = None
+    _write_drawing_cache(cache_path, {
+        "version": _DRAWING_CACHE_VERSION,
+        "dir": os.path.abspath(drawing_dir),
+        "dir_mtime_ns": dir_mtime,
+        "entries": records,
+    })
+    return [(fname, yy_code, version) for fname, _, _, yy_code, version in records]
+
+
+def _drawing_cache_key(drawing_dir):
+    path = os.path.normcase(os.path.abspath(drawing_dir))
+    return hashlib.sha1(path.encode("utf-8")).hexdigest()[:16]
+
+
+def _read_drawing_cache(cache_path, drawing_dir):
+    """读取索引缓存；版本不符、目录不符或损坏时返回 None"""
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (
+        not isinstance(data, dict)
+        or data.get("version") != _DRAWING_CACHE_VERSION
+        or data.get("dir") != os.path.abspath(drawing_dir)
+    ):
+        return None
+    return data
 
-        # 提取YY编号
-        yy_match = YY_CODE_PATTERN.search(fname)
-        if not yy_match:
-            continue  # 不含YY编号的PDF忽略
-
-        yy_code = yy_match.group(1)
-
-        # 提取版本号（宽容模式）
-        version = extract_version_from_filename(fname)
 
-        if version:
-            # 同一YY编号多个文件时取文件名排序最后的
-            if yy_code not in index or fname > os.path.basename(index[yy_code][0]):
-                index[yy_code] = (fpath, version)
-        else:
-            # 有YY编号但无版本号
-            if yy_code not in index:
-                index[yy_code] = (fpath, None)
-            bad_names.append(fname)
-
-    return index, bad_names
+def _write_drawing_cache(cache_path, data):
+    """原子写入索引缓存（先写临时文件再替换），写入失败不影响比对结果"""
+    tmp_path = cache_path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
 
 
 # ========== 核心比对逻辑 ==========
 
-def check_drawings(output_rows, drawing_dir, print_folder=None):
+def check_drawings(output_rows, drawing_dir, print_folder=None, code_index=None,
+                   stats=None):
     """
     对订单中的YY产品执行图纸版本比对（v1.2.0 文件名索引版）。
 
@@ -221,9 +352,12 @@ def check_drawings(output_rows, drawing_dir, print_folder=None):
         output_rows: list[dict] - apply_mapping 输出的行列表
         drawing_dir: str - 图纸库目录路径
         print_folder: str | None - 待打印文件夹路径（None则在drawing_dir下创建）
+        code_index: CodeIndex | SqliteMappingStore | None - 双向料号索引（code_mapper.CodeIndex）:
+            行中无工厂编号时据此补全；缺失图纸时提示同一工厂编号下其它客户料号的图纸
+        stats: dict | None - 若提供，填入图纸库扫描统计（同 build_drawing_index）
 
     返回:
-        results: list[dict] - 每个项目的比对结果
+        results: list[DrawingResult] - 每个项目的比对结果（可按字典方式访问）
           status: match / mismatch / no_version / no_drawing / bad_name / skipped
         bad_names: list[str] - 无法提取版本号的文件列表
     """
@@ -246,7 +380,7 @@ def check_drawings(output_rows, drawing_dir, print_folder=None):
         os.makedirs(print_folder, exist_ok=True)
 
     # 一次性构建索引
-    drawing_index, bad_names = build_drawing_index(drawing_dir)
+    drawing_index, bad_names = build_drawing_index(drawing_dir, stats)
 
     # 去重: 同一个YY编号只比对一次
     seen_codes = set()
@@ -254,18 +388,20 @@ def check_drawings(output_rows, drawing_dir, print_folder=None):
     for row in output_rows:
         yy_code = row.get("产品规格", "").strip()
         factory_code = row.get("产品编号", "").strip()
+        if not factory_code and code_index is not None:
+            factory_code = code_index.factory_code(yy_code)
 
         # 跳过非YY产品
         if not yy_code.startswith("YY"):
-            results.append({
-                "yy_code": yy_code,
-                "order_version": "",
-                "local_version": "",
-                "drawing_path": "",
-                "status": "skipped",
-                "message": "非YY产品，跳过",
-                "suggested_name": "",
-            })
+            results.append(DrawingResult(
+                yy_code=yy_code,
+                order_version="",
+                local_version="",
+                drawing_path="",
+                status="skipped",
+                message="非YY产品，跳过",
+                suggested_name="",
+            ))
             continue
 
         # 去重
@@ -279,30 +415,34 @@ def check_drawings(output_rows, drawing_dir, print_folder=None):
             order_version = extract_version_from_name(row.get("_产品名称", ""))
 
         if not order_version:
-            results.append({
-                "yy_code": yy_code,
-                "order_version": "",
-                "local_version": "",
-                "drawing_path": "",
-                "status": "no_version",
-                "message": "未提供版本号",
-                "suggested_name": "",
-            })
+            results.append(DrawingResult(
+                yy_code=yy_code,
+                order_version="",
+                local_version="",
+                drawing_path="",
+                status="no_version",
+                message="未提供版本号",
+                suggested_name="",
+            ))
             continue
 
         # 2. 从索引查找（O(1)）
         entry = drawing_index.get(yy_code)
         if not entry:
             suggested = generate_standard_name(factory_code, yy_code, order_version)
-            results.append({
-                "yy_code": yy_code,
-                "order_version": order_version,
-                "local_version": "",
-                "drawing_path": "",
-                "status": "no_drawing",
-                "message": "未找到图纸",
-                "suggested_name": suggested,
-            })
+            message = "未找到图纸"
+            sibling = _sibling_drawing(code_index, factory_code, yy_code, drawing_index)
+            if sibling:
+                message += f"（同工厂编号的 {sibling} 有图纸）"
+            results.append(DrawingResult(
+                yy_code=yy_code,
+                order_version=order_version,
+                local_version="",
+                drawing_path="",
+                status="no_drawing",
+                message=message,
+                suggested_name=suggested,
+            ))
             continue
 
         drawing_path, local_version = entry
@@ -310,15 +450,15 @@ def check_drawings(output_rows, drawing_dir, print_folder=None):
         # 3. 文件名版本号缺失
         if not local_version:
             suggested = generate_standard_name(factory_code, yy_code, order_version)
-            results.append({
-                "yy_code": yy_code,
-                "order_version": order_version,
-                "local_version": "",
-                "drawing_path": drawing_path,
-                "status": "bad_name",
-                "message": "文件名中无法识别版本号",
-                "suggested_name": suggested,
-            })
+            results.append(DrawingResult(
+                yy_code=yy_code,
+                order_version=order_version,
+                local_version="",
+                drawing_path=drawing_path,
+                status="bad_name",
+                message="文件名中无法识别版本号",
+                suggested_name=suggested,
+            ))
             continue
 
         # 4. 严格字符串比对
@@ -329,32 +469,42 @@ def check_drawings(output_rows, drawing_dir, print_folder=None):
             except Exception:
                 pass
 
-            results.append({
-                "yy_code": yy_code,
-                "order_version": order_version,
-                "local_version": local_version,
-                "drawing_path": drawing_path,
-                "status": "match",
-                "message": f"版本一致: {local_version}",
-                "suggested_name": "",
-            })
+            results.append(DrawingResult(
+                yy_code=yy_code,
+                order_version=order_version,
+                local_version=local_version,
+                drawing_path=drawing_path,
+                status="match",
+                message=f"版本一致: {local_version}",
+                suggested_name="",
+            ))
         else:
             suggested = generate_standard_name(factory_code, yy_code, order_version)
-            results.append({
-                "yy_code": yy_code,
-                "order_version": order_version,
-                "local_version": local_version,
-                "drawing_path": drawing_path,
-                "status": "mismatch",
-                "message": f"本地: {local_version} → 最新: {order_version}",
-                "suggested_name": suggested,
-            })
+            results.append(DrawingResult(
+                yy_code=yy_code,
+                order_version=order_version,
+                local_version=local_version,
+                drawing_path=drawing_path,
+                status="mismatch",
+                message=f"本地: {local_version} → 最新: {order_version}",
+                suggested_name=suggested,
+            ))
 
     return results, bad_names
 
 
 # ========== 统计 ==========
 
+def _sibling_drawing(code_index, factory_code, yy_code, drawing_index):
+    """同一工厂编号下其它客户料号中第一个在图纸库有图纸的料号，没有返回空字符串"""
+    if code_index is None or not factory_code:
+        return ""
+    for customer_code, _ in code_index.customer_codes(factory_code):
+        if customer_code != yy_code and customer_code in drawing_index:
+            return customer_code
+    return ""
+
+
 def get_check_stats(results):
     """
     统计比对结果。
@@ -1,70 +1,178 @@
-"""Excel输出模块 - 按「导入产品明细模板」格式输出xlsx"""
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-from config import OUTPUT_COLUMNS
+"""Excel输出模块 - 按「导入产品明细模板」格式输出xlsx
 
+两种写出方式（config.EXCEL_WRITER_BACKEND），输出的单元格值、列宽和格式一致:
+  openpyxl - 默认。只写模式（write_only）流式写出: 行逐个写入临时文件，不在内存中保留整张表，
+             合并汇总数万行时内存基本不随行数增长。表头/数据单元格的样式注册为共享命名样式，
+             每个单元格只引用样式名，不再逐格创建 Alignment / Border 对象。
+  xml      - xlsx_writer 直接把工作表XML写入压缩流，不导入 openpyxl，适合数十万行的超大导出。
+"""
+import os
+from operator import attrgetter
 
-def write_output_excel(output_rows, output_path):
+from config import EXCEL_WRITER_BACKEND, OUTPUT_COLUMNS
+
+# 共享命名样式（每个工作簿注册一次）
+_HEADER_STYLE = "导出表头"
+_DATA_STYLE = "导出数据"
+
+# 列宽（未列出的列为 12）
+_COLUMN_WIDTHS = {
+    "产品编号": 14, "产品名称": 35, "产品规格": 14, "数量": 10,
+    "计划开始时间": 14, "计划结束时间": 14, "工艺路线名称": 18,
+    "工序列表": 10, "备注": 30, "更新": 6, "工单分类": 10,
+    "供应商": 10, "供应商名称": 15, "供应商联系人": 12,
+    "供应商联系电话": 14, "收货地址": 15, "采购单价": 10,
+    "客户选择": 10, "关联产品": 10,
+}
+
+
+def write_output_excel(output_rows, output_path, backend=None):
     """
-    将映射后的订单数据按工厂系统模板格式写入Excel。
+    将映射后的订单数据按工厂系统模板格式写入Excel（流式写出）。
 
     参数:
-        output_rows: list[dict] - 包含OUTPUT_COLUMNS字段的行列表
+        output_rows: Iterable[dict] - 包含OUTPUT_COLUMNS字段的行（列表、生成器或 iter_mapped_rows 的流），
+                     也可直接传入 code_mapper.MappedColumns（逐行生成，不保留行字典）
         output_path: str - 输出文件路径
+        backend: str | None - "openpyxl" / "xml"（None 使用 config.EXCEL_WRITER_BACKEND）
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Sheet1"
+    backend = backend or EXCEL_WRITER_BACKEND
+    if hasattr(output_rows, "iter_rows"):
+        output_rows = output_rows.iter_rows()
 
-    # 样式
-    header_font = Font(bold=True, size=11)
-    thin_border = Border(
-        left=Side(style="thin"),
-        right=Side(style="thin"),
-        top=Side(style="thin"),
-        bottom=Side(style="thin"),
-    )
+    if backend == "xml":
+        from xlsx_writer import write_table_xlsx
 
-    # 写入表头（与模板完全一致）
-    for col_idx, col_name in enumerate(OUTPUT_COLUMNS, 1):
-        cell = ws.cell(row=1, column=col_idx, value=col_name)
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-        cell.border = thin_border
+        write_table_xlsx(
+            output_path,
+            OUTPUT_COLUMNS,
+            iter_output_values(output_rows),
+            widths=[_COLUMN_WIDTHS.get(col_name, 12) for col_name in OUTPUT_COLUMNS],
+        )
+    elif backend == "openpyxl":
+        _write_openpyxl(output_rows, output_path)
+    else:
+        raise ValueError(f"未知的Excel写出方式: {backend}")
 
-    # 写入数据行
-    for row_idx, row_data in enumerate(output_rows, 2):
-        for col_idx, col_name in enumerate(OUTPUT_COLUMNS, 1):
-            value = row_data.get(col_name, "")
-
-            # 数字字段转换
-            if col_name == "数量" and value:
-                try:
-                    value = float(str(value).replace(",", ""))
-                except (ValueError, TypeError):
-                    pass
-
-            cell = ws.cell(row=row_idx, column=col_idx, value=value)
-            cell.border = thin_border
-            cell.alignment = Alignment(vertical="center")
-
-    # 设置列宽
-    col_widths = {
-        "产品编号": 14, "产品名称": 35, "产品规格": 14, "数量": 10,
-        "计划开始时间": 14, "计划结束时间": 14, "工艺路线名称": 18,
-        "工序列表": 10, "备注": 30, "更新": 6, "工单分类": 10,
-        "供应商": 10, "供应商名称": 15, "供应商联系人": 12,
-        "供应商联系电话": 14, "收货地址": 15, "采购单价": 10,
-        "客户选择": 10, "关联产品": 10,
-    }
+
+# 导出格式（文件扩展名 → 说明），界面保存对话框按此顺序列出
+EXPORT_FORMATS = {
+    ".xlsx": "Excel文件",
+    ".csv": "CSV文件（ERP批量导入）",
+    ".jsonl": "JSON Lines文件",
+}
+
+
+def write_output_file(output_rows, output_path, backend=None):
+    """
+    按文件扩展名选择导出格式: .csv → CSV，.jsonl / .ndjson → JSON Lines，其它 → Excel。
+
+    参数:
+        output_rows: Iterable[dict] | MappedColumns - 同 write_output_excel
+        output_path: str - 输出文件路径
+        backend: str | None - Excel 写出方式（同 write_output_excel，文本格式忽略）
+    """
+    ext = os.path.splitext(output_path)[1].lower()
+    if ext == ".csv":
+        from text_writer import write_output_csv
+
+        write_output_csv(output_rows, output_path)
+    elif ext in (".jsonl", ".ndjson"):
+        from text_writer import write_output_jsonl
+
+        write_output_jsonl(output_rows, output_path)
+    else:
+        write_output_excel(output_rows, output_path, backend)
+
+
+def iter_output_values(output_rows):
+    """
+    输出行 → 按 OUTPUT_COLUMNS 顺序的值列表（数量转为数值），逐行产出。
+
+    参数:
+        output_rows: Iterable[dict] - 包含OUTPUT_COLUMNS字段的行
+    """
+    qty_idx = OUTPUT_COLUMNS.index("数量") if "数量" in OUTPUT_COLUMNS else -1
+    getters = {}
+    for row_data in output_rows:
+        getter = getters.get(type(row_data))
+        if getter is None:
+            getter = getters[type(row_data)] = _values_getter(type(row_data))
+        values = getter(row_data)
+
+        # 数字字段转换
+        if qty_idx >= 0 and values[qty_idx]:
+            try:
+                values[qty_idx] = float(str(values[qty_idx]).replace(",", ""))
+            except (ValueError, TypeError):
+                pass
+        yield values
+
+
+def _values_getter(row_type):
+    """按 OUTPUT_COLUMNS 取值的函数: 记录类型（records.OutputRow）直接按字段读取，其它按 get"""
+    fields = getattr(row_type, "FIELDS", ())
+    if set(OUTPUT_COLUMNS) <= set(fields):
+        get_values = attrgetter(*OUTPUT_COLUMNS)
+        return lambda row: list(get_values(row))
+    return lambda row: [row.get(col_name, "") for col_name in OUTPUT_COLUMNS]
+
+
+def _write_openpyxl(output_rows, output_path):
+    """openpyxl 只写模式写出"""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    def styled_cell(value, style):
+        cell = WriteOnlyCell(ws, value)
+        cell.style = style
+        return cell
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    _register_styles(wb)
+
+    # 只写模式下列宽须在写入第一行之前设置
     for col_idx, col_name in enumerate(OUTPUT_COLUMNS, 1):
         letter = _col_letter(col_idx)
-        ws.column_dimensions[letter].width = col_widths.get(col_name, 12)
+        ws.column_dimensions[letter].width = _COLUMN_WIDTHS.get(col_name, 12)
+
+    # 写入表头（与模板完全一致）
+    ws.append([styled_cell(col_name, _HEADER_STYLE) for col_name in OUTPUT_COLUMNS])
+
+    # 写入数据行
+    for values in iter_output_values(output_rows):
+        ws.append([styled_cell(value, _DATA_STYLE) for value in values])
 
     wb.save(output_path)
     wb.close()
 
 
+def _register_styles(wb):
+    """注册表头和数据单元格的共享命名样式"""
+    from openpyxl.styles import Alignment, Border, Font, NamedStyle, Side
+    from openpyxl.styles.fonts import DEFAULT_FONT
+
+    thin_border = Border(
+        left=Side(style="thin"),
+        right=Side(style="thin"),
+        top=Side(style="thin"),
+        bottom=Side(style="thin"),
+    )
+    wb.add_named_style(NamedStyle(
+        name=_HEADER_STYLE,
+        font=Font(bold=True, size=11),
+        alignment=Alignment(horizontal="center", vertical="center"),
+        border=thin_border,
+    ))
+    wb.add_named_style(NamedStyle(
+        name=_DATA_STYLE,
+        font=DEFAULT_FONT,  # 与普通单元格相同的工作簿默认字体
+        alignment=Alignment(vertical="center"),
+        border=thin_border,
+    ))
+
+
 def _col_letter(col_idx):
     """将列号转为Excel列字母（1=A, 27=AA）"""
     result = ""
@@ -0,0 +1,32 @@
+"""跨进程文件锁模块 - 多个进程（界面、命令行、批量转换的工作进程）读改写同一文件时互斥
+
+锁加在单独的锁文件（如 table_templates.json.lock）首字节上，不影响被保护文件本身的替换和截断。
+"""
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def file_lock(lock_path):
+    """跨进程排他锁（锁文件首字节加锁；Windows 下等待约10秒仍未获得时抛出 OSError）"""
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if os.name == "nt":
+            import msvcrt
+
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
@@ -1,17 +1,32 @@
 """工厂订单PDF转Excel工具 - 主界面 v1.2.0"""
+import startup_timing  # 最先导入: 记录启动计时起点
+
 import os
-import sys
 import json
+import multiprocessing
 import subprocess
+import threading
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
 from version import VERSION, APP_NAME, BUILD_DATE
-from config import MAPPING_TABLE_PATH, APP_DIR, DRAWING_PRINT_FOLDER
-from pdf_parser import parse_purchase_order
-from code_mapper import load_mapping_table, apply_mapping, get_mapping_stats
-from excel_writer import write_output_excel
-from drawing_checker import check_drawings, get_check_stats, merge_and_print
+from config import (
+    MAPPING_TABLE_PATH,
+    APP_DIR,
+    DRAWING_PRINT_FOLDER,
+    EXPORT_CHUNK_ROWS,
+    MAPPING_BACKEND,
+    MAPPING_WATCH_ENABLED,
+    MAPPING_WATCH_INTERVAL_MS,
+)
+from mapping_watcher import MappingWatcher
+from startup_timing import lazy_import
+
+# parse_cache(pdfplumber) / mapping_snapshot / mapping_store / mapping_suggest
+# / code_mapper / excel_writer(openpyxl) / daily_export / drawing_checker
+# 均在首次使用时通过 lazy_import 导入，窗口无需等待这些库加载即可显示
+# （按名称动态导入，PyInstaller 需在 build.bat 中用 --hidden-import 声明）
+startup_timing.mark("基础模块导入")
 
 # 用户设置文件（与exe同目录）
 SETTINGS_PATH = os.path.join(APP_DIR, "settings.json")
@@ -119,9 +134,19 @@ class OrderConverterApp:
         self.pdf_path = tk.StringVar()
         self.drawing_dir = tk.StringVar()
         self.header_info = {}
+        self.items = []                # 解析出的订单项目（映射表热重载后重新映射用）
         self.output_rows = []
         self.mapping = {}
+        self.mapping_table = None      # code_mapper.MappingTable，重新加载时只读取变化的sheet
+        self.suggestion_index = None   # mapping_suggest.SuggestionIndex（映射加载后在后台构建）或映射库本身
+        self.mapping_generation = 0    # 每次映射加载完成加1（丢弃过期的后台建议索引）
         self.drawing_results = []
+        self.parse_cache_hits = 0
+        self.parse_cache_misses = 0
+        self.mapping_loading = False   # 映射表正在后台加载
+        self.parse_pending = False     # 映射表加载期间点击了解析，加载完成后自动执行
+        self.mapping_watcher = MappingWatcher()
+        self.mapping_watch_busy = False  # 正在后台检查映射表文件状态
         self.status_text = tk.StringVar(value="就绪 - 请选择PDF文件")
 
         # 加载用户设置（图纸库路径等）
@@ -131,7 +156,49 @@ class OrderConverterApp:
             self.drawing_dir.set(saved_dir)
 
         self._build_ui()
+        # 先显示窗口，首次绘制后再在后台加载映射表
+        self._map_binding = self.root.bind("<Map>", self._on_map, add="+")
+
+    def _on_map(self, event):
+        """主窗口映射到屏幕: 处理完挂起的重绘后再记为首次绘制（after_idle 不保证窗口已绘制）"""
+        if event.widget is not self.root:
+            return
+        self.root.unbind("<Map>", self._map_binding)
+        self.root.update_idletasks()
+        self.root.after(0, self._on_first_paint)
+
+    def _on_first_paint(self):
+        """窗口首次绘制完成: 记录启动时间并开始后台加载映射表"""
+        startup_timing.mark("首次绘制")
         self._load_mapping()
+        if MAPPING_WATCH_ENABLED:
+            self.root.after(MAPPING_WATCH_INTERVAL_MS, self._poll_mapping_watch)
+
+    def _run_in_background(self, work, on_done, on_error, interval=50):
+        """在后台线程执行 work()，通过 after 轮询在主线程回调 on_done/on_error
+
+        Tk 控件只能在主线程操作，回调中可安全更新界面。
+        """
+        result = {}
+
+        def target():
+            try:
+                result["value"] = work()
+            except Exception as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+
+        def poll():
+            if thread.is_alive():
+                self.root.after(interval, poll)
+            elif "error" in result:
+                on_error(result["error"])
+            else:
+                on_done(result["value"])
+
+        self.root.after(interval, poll)
 
     def _build_ui(self):
         """构建界面"""
@@ -171,6 +238,9 @@ class OrderConverterApp:
         ttk.Button(
             tool_frame, text="导出工厂Excel", command=self._export_excel
         ).pack(side=tk.RIGHT, padx=2)
+        ttk.Button(
+            tool_frame, text="追加到当日汇总", command=self._append_daily
+        ).pack(side=tk.RIGHT, padx=2)
         ttk.Button(tool_frame, text="关于", command=self._show_about).pack(
             side=tk.RIGHT, padx=2
         )
@@ -368,40 +438,63 @@ class OrderConverterApp:
             messagebox.showwarning("提示", "请先选择有效的PDF文件")
             return
 
+        if self.mapping_loading:
+            self.parse_pending = True
+            self.status_text.set("映射表加载中，加载完成后自动解析...")
+            return
+
         self.status_text.set("正在解析PDF...")
         self.root.update()
 
+        parse_cache = lazy_import("parse_cache")
+        code_mapper = lazy_import("code_mapper")
+        parse_stats = {}
         try:
-            self.header_info, items = parse_purchase_order(path)
+            self.header_info, items, cache_hit = (
+                parse_cache.parse_purchase_order_cached(path, stats=parse_stats)
+            )
         except Exception as e:
             messagebox.showerror("解析错误", f"PDF解析失败:\n{e}")
             self.status_text.set("解析失败")
             return
 
+        if cache_hit:
+            self.parse_cache_hits += 1
+        else:
+            self.parse_cache_misses += 1
+
         if not items:
             messagebox.showwarning("提示", "未从PDF中解析到任何订单数据")
             self.status_text.set("未解析到数据")
             return
 
         # 应用映射
-        self.output_rows, unmapped = apply_mapping(items, self.mapping)
-        total, mapped, failed = get_mapping_stats(self.output_rows)
+        self.items = items
+        self.output_rows, unmapped = code_mapper.apply_mapping(
+            items, self.mapping, self._normalized_index()
+        )
+        total, mapped, failed = code_mapper.get_mapping_stats(self.output_rows)
 
         # 刷新表格
         self._refresh_table()
 
+        skipped_pages = parse_stats.get("skipped_pages", 0)
         self.status_text.set(
-            f"解析完成: 共{total}条 | 映射成功{mapped}条 | 未映射{failed}条"
+            f"解析完成: 共{total}条 | 映射成功{mapped}条 | 未映射{failed}条 | "
+            f"跳过{skipped_pages}/{parse_stats.get('pages', 0)}页无表格页 | "
+            f"解析缓存: {'命中' if cache_hit else '未命中'}"
+            f"（累计命中{self.parse_cache_hits}/未命中{self.parse_cache_misses}）"
         )
 
         if unmapped:
             self._highlight_btn(self.open_mapping_btn, "打开映射表(Excel)")
             unique_unmapped = sorted(set(unmapped))
-            unmapped_str = "\n".join(unique_unmapped)
+            unmapped_str = self._format_unmapped(unique_unmapped)
             messagebox.showinfo(
                 "映射提醒",
                 f"以下{len(unique_unmapped)}个料件编号未找到映射:\n\n{unmapped_str}\n\n"
-                f"请在映射表中添加后，点击「重新加载映射表」再重新解析",
+                f"请在映射表中添加后，点击「重新加载映射表」再重新解析"
+                + ("（保存映射表后也会自动重新加载并重新映射）" if MAPPING_WATCH_ENABLED else ""),
             )
         else:
             self._unhighlight_btn(self.open_mapping_btn, "打开映射表(Excel)")
@@ -416,34 +509,153 @@ class OrderConverterApp:
             tag = "mapped" if row_data.get("_映射状态") == "已映射" else "unmapped"
             self.tree.insert("", tk.END, values=values, tags=(tag,))
 
-    def _load_mapping(self, auto_reprocess=False):
+    def _load_mapping(self, auto_reprocess=False, hot_reload=False):
         """加载映射表
 
         参数:
             auto_reprocess: bool - 加载成功后是否自动重新解析并比对
                             用户点击"重新加载映射表"时为True，初始化时为False
+            hot_reload: bool - 由文件监视触发，加载成功后对当前订单重新映射（不重新解析）
+
+        映射表在后台线程读取，界面保持响应；完成后在主线程回调 _on_mapping_loaded
         """
+        if self.mapping_loading:
+            return
+
         if not os.path.exists(MAPPING_TABLE_PATH):
             self.mapping = {}
+            self.mapping_table = None
             self.mapping_label.config(
                 text=f"映射表: 未找到 ({MAPPING_TABLE_PATH})"
             )
             self.status_text.set(
                 f"映射表文件不存在，请将料号清单Excel放到: {MAPPING_TABLE_PATH}"
             )
+            self._finish_mapping_load()
             return
 
-        try:
-            self.mapping = load_mapping_table()
-            count = len(self.mapping)
-            self.mapping_label.config(text=f"映射表: 已加载 {count} 条")
-            self.status_text.set(f"映射表已加载: {count}条映射规则")
-            # 加载成功，取消"重新加载"高亮
-            self._unhighlight_btn(self.reload_mapping_btn, "重新加载映射表")
-        except Exception as e:
-            self.mapping = {}
-            self.mapping_label.config(text="映射表: 加载失败")
-            messagebox.showerror("错误", f"映射表加载失败:\n{e}")
+        self.mapping_loading = True
+        self.reload_mapping_btn.config(state=tk.DISABLED)
+        self.mapping_label.config(text="映射表: 加载中...")
+        self.status_text.set("正在加载映射表...")
+
+        table = self.mapping_table
+        watcher = self.mapping_watcher
+        if MAPPING_BACKEND == "sqlite":
+            # 映射库: 后台检查映射表是否变化（变化时重建映射库），之后按需查询，不读入内存
+            def work():
+                watcher.mark_current()
+                stats = {}
+                store, _ = lazy_import("mapping_store").open_mapping_store(stats=stats)
+                stats["collisions"] = store.collisions()
+                return store, stats
+
+            self._run_in_background(
+                work,
+                lambda result: self._on_mapping_store_opened(
+                    *result, auto_reprocess, hot_reload
+                ),
+                lambda error: self._on_mapping_failed(error, hot_reload),
+            )
+        elif table is None:
+            # 首次加载: 映射表未变化时直接加载快照；已变化时以快照为基础在后台增量读取并重建快照
+            def work():
+                watcher.mark_current()
+                stats = {}
+                loaded, _ = lazy_import("mapping_snapshot").load_mapping_table_cached(
+                    stats=stats
+                )
+                return loaded, stats
+
+            self._run_in_background(
+                work,
+                lambda result: self._on_mapping_loaded(*result, auto_reprocess, hot_reload),
+                lambda error: self._on_mapping_failed(error, hot_reload),
+            )
+        else:
+            # 重新加载: 后台只读取变化的sheet，主线程原地修补映射
+            def work():
+                watcher.mark_current()
+                return lazy_import("mapping_snapshot").read_update(table)
+
+            self._run_in_background(
+                work,
+                lambda result: self._on_mapping_updated(
+                    table, *result, auto_reprocess, hot_reload
+                ),
+                lambda error: self._on_mapping_failed(error, hot_reload),
+            )
+
+    def _on_mapping_loaded(self, table, stats, auto_reprocess, hot_reload=False):
+        """映射表后台加载成功（主线程）"""
+        self.mapping_table = table
+        self.mapping = table.mapping
+        if stats.get("snapshot") == "hit":
+            source = "快照"
+        elif stats.get("changes"):
+            changes = lazy_import("code_mapper").format_mapping_changes(stats["changes"])
+            source = f"已更新快照: {changes}"
+        else:
+            source = "已重建快照"
+        self._mapping_ready(
+            f"映射表已加载: {len(self.mapping)}条映射规则（{source}）"
+            + self._collision_note(table.normalized.collisions()),
+            auto_reprocess,
+            hot_reload,
+        )
+
+    def _on_mapping_store_opened(self, store, stats, auto_reprocess, hot_reload=False):
+        """映射库打开成功（主线程）: 替换映射并关闭旧的映射库连接"""
+        old = self.mapping
+        self.mapping = store
+        self.mapping_table = None
+        if old is not store and hasattr(old, "close"):
+            old.close()
+        source = "映射库" if stats.get("store") == "hit" else "已重建映射库"
+        self._mapping_ready(
+            f"映射表已加载: {len(store)}条映射规则（{source}）"
+            + self._collision_note(stats["collisions"]),
+            auto_reprocess,
+            hot_reload,
+        )
+
+    def _on_mapping_updated(self, table, signature, update, auto_reprocess,
+                            hot_reload=False):
+        """映射表变化读取完成（主线程）: 原地修补映射，后台保存快照"""
+        snapshot = lazy_import("mapping_snapshot")
+        changes = lazy_import("code_mapper").format_mapping_changes(
+            table.apply_update(update)
+        )
+        state = table.get_state()
+        self._run_in_background(
+            lambda: snapshot.save_mapping_snapshot(table.path, state, signature),
+            lambda _: None,
+            lambda _: None,  # 快照写入失败不影响映射结果
+        )
+        self._mapping_ready(
+            f"映射表已重新加载: {len(self.mapping)}条映射规则（{changes}）"
+            + self._collision_note(table.normalized.collisions()),
+            auto_reprocess,
+            hot_reload,
+        )
+
+    def _mapping_ready(self, status, auto_reprocess, hot_reload=False):
+        """映射表可用后更新界面，并继续待执行的解析/自动重新处理链"""
+        self.mapping_label.config(text=f"映射表: 已加载 {len(self.mapping)} 条")
+        self.status_text.set(status)
+        # 加载成功，取消"重新加载"高亮
+        self._unhighlight_btn(self.reload_mapping_btn, "重新加载映射表")
+        parse_pending = self._finish_mapping_load()
+        self._build_suggestion_index()
+
+        # 加载期间用户点击了解析
+        if parse_pending and not auto_reprocess:
+            self._parse_pdf()
+            return
+
+        # 文件监视触发的热重载: 对已解析的订单重新映射，不弹窗、不打断当前操作
+        if hot_reload and self.items:
+            self._reapply_mapping(status)
             return
 
         # 自动重新处理链: 映射表重载 → 重新解析PDF → 重新比对图纸
@@ -453,6 +665,146 @@ class OrderConverterApp:
             if self.output_rows and self.drawing_dir.get().strip():
                 self._check_drawings()
 
+    def _normalized_index(self):
+        """当前映射字典的规范化料号索引（映射库自带规范化查询，返回 None）"""
+        if self.mapping_table is not None:
+            return self.mapping_table.normalized
+        return None
+
+    def _code_index(self):
+        """
+        当前映射的双向料号索引（code_mapper.CodeIndex；映射库自身提供相同的查询），
+        映射尚未加载时返回 None。
+        """
+        if self.mapping_table is not None:
+            return self.mapping_table.codes
+        if hasattr(self.mapping, "customer_codes"):
+            return self.mapping
+        return None
+
+    def _factory_code(self, customer_code):
+        """客户料号 → 久益料号（未映射或映射未加载返回空字符串）"""
+        index = self._code_index()
+        return index.factory_code(customer_code.strip()) if index is not None else ""
+
+    @staticmethod
+    def _collision_note(collisions):
+        """规范化冲突说明（多个料号仅全角/空白/大小写不同，原样查不到时取字典序最小者）"""
+        if not collisions:
+            return ""
+        groups = [" = ".join(codes) for codes in collisions.values()]
+        shown = "；".join(groups[:3]) + (" 等" if len(groups) > 3 else "")
+        return f" | ⚠ 规范化冲突{len(groups)}组: {shown}"
+
+    def _build_suggestion_index(self):
+        """在后台为当前映射构建料号建议索引（未映射提醒中的"可能是"）"""
+        self.mapping_generation += 1
+        generation = self.mapping_generation
+        self.suggestion_index = None
+        if not isinstance(self.mapping, dict):
+            # 映射库在 SQL 中查找建议，不把料号读入内存构建索引
+            suggest = lazy_import("mapping_suggest")
+            self.suggestion_index = suggest.suggestion_index_for(self.mapping)
+            return
+        # 映射字典会在主线程原地修补，先复制料号
+        codes = list(self.mapping)
+
+        def on_done(index):
+            if generation == self.mapping_generation:
+                self.suggestion_index = index
+
+        self._run_in_background(
+            lambda: lazy_import("mapping_suggest").SuggestionIndex(codes),
+            on_done,
+            lambda _: None,  # 建议索引构建失败时提醒中不显示建议
+        )
+
+    def _format_unmapped(self, unique_unmapped):
+        """未映射料号列表文本，索引已就绪时附带相近料号建议"""
+        suggestions = {}
+        if self.suggestion_index is not None:
+            suggestions = lazy_import("mapping_suggest").suggest_for_unmapped(
+                self.suggestion_index, self.mapping, unique_unmapped
+            )
+        lines = []
+        for code in unique_unmapped:
+            lines.append(code)
+            for s in suggestions.get(code, []):
+                lines.append(
+                    f"    可能是: {s['客户料号']} → {s['产品编号']}  {s['产品名称']}"
+                )
+        return "\n".join(lines)
+
+    def _reapply_mapping(self, status):
+        """对已解析的订单项目重新应用映射（无需重新解析PDF）"""
+        code_mapper = lazy_import("code_mapper")
+        self.output_rows, unmapped = code_mapper.apply_mapping(
+            self.items, self.mapping, self._normalized_index()
+        )
+        total, mapped, failed = code_mapper.get_mapping_stats(self.output_rows)
+        self._refresh_table()
+
+        if unmapped:
+            self._highlight_btn(self.open_mapping_btn, "打开映射表(Excel)")
+        else:
+            self._unhighlight_btn(self.open_mapping_btn, "打开映射表(Excel)")
+
+        status = f"{status} | 已重新映射: 共{total}条 | 映射成功{mapped}条 | 未映射{failed}条"
+        if self.drawing_results:
+            status += " | 图纸比对结果可能已过期，请重新比对"
+        self.status_text.set(status)
+
+    def _poll_mapping_watch(self):
+        """定时检查映射表文件是否被修改（文件状态在后台线程读取，网络盘慢时不卡界面）"""
+        if self.mapping_loading or self.mapping_watch_busy:
+            self.root.after(MAPPING_WATCH_INTERVAL_MS, self._poll_mapping_watch)
+            return
+
+        def on_done(changed):
+            self.mapping_watch_busy = False
+            if changed:
+                if self.mapping_loading:
+                    # 手动重新加载已在进行，可能读到的是旧文件: 加载完成后再检查一次
+                    self.mapping_watcher.reset()
+                else:
+                    self._load_mapping(hot_reload=True)
+            self.root.after(MAPPING_WATCH_INTERVAL_MS, self._poll_mapping_watch)
+
+        def on_error(_):
+            self.mapping_watch_busy = False
+            self.root.after(MAPPING_WATCH_INTERVAL_MS, self._poll_mapping_watch)
+
+        self.mapping_watch_busy = True
+        self._run_in_background(self.mapping_watcher.poll, on_done, on_error)
+
+    def _on_mapping_failed(self, error, hot_reload=False):
+        """映射表后台加载失败（主线程）"""
+        if hot_reload:
+            # 自动重新加载失败: 保留当前映射，不弹窗打断操作，下次保存时再次尝试
+            self._finish_mapping_load()
+            self.mapping_label.config(text=f"映射表: 已加载 {len(self.mapping)} 条")
+            self.status_text.set(f"映射表自动重新加载失败，仍使用当前映射: {error}")
+            return
+
+        old = self.mapping
+        self.mapping = {}
+        self.mapping_table = None
+        self.suggestion_index = None  # 可能就是下面关闭的映射库
+        if hasattr(old, "close"):
+            old.close()  # 映射库连接（含 WAL 文件句柄）
+        self.mapping_label.config(text="映射表: 加载失败")
+        self._finish_mapping_load()
+        messagebox.showerror("错误", f"映射表加载失败:\n{error}")
+
+    def _finish_mapping_load(self):
+        """结束加载状态，返回加载期间是否有待执行的解析"""
+        self.mapping_loading = False
+        self.reload_mapping_btn.config(state=tk.NORMAL)
+        startup_timing.mark("映射表加载完成")
+        startup_timing.report_if_enabled(APP_DIR)
+        parse_pending, self.parse_pending = self.parse_pending, False
+        return parse_pending
+
     def _open_mapping_table(self):
         """用系统默认程序打开映射表"""
         if not os.path.exists(MAPPING_TABLE_PATH):
@@ -489,22 +841,110 @@ class OrderConverterApp:
         order_no = self.header_info.get("采购单号", "订单")
         default_name = f"工厂订单_{order_no}.xlsx"
 
+        excel_writer = lazy_import("excel_writer")
         path = filedialog.asksaveasfilename(
             title="保存工厂系统Excel",
             defaultextension=".xlsx",
             initialfile=default_name,
-            filetypes=[("Excel文件", "*.xlsx")],
+            filetypes=[
+                (label, f"*{ext}") for ext, label in excel_writer.EXPORT_FORMATS.items()
+            ],
         )
         if not path:
             return
 
+        if self._export_chunked(path, order_no):
+            return
+
         try:
-            write_output_excel(self.output_rows, path)
+            excel_writer.write_output_file(self.output_rows, path)
             self.status_text.set(f"导出成功: {path}")
-            messagebox.showinfo("成功", f"Excel已导出:\n{path}")
+            messagebox.showinfo("成功", f"已导出:\n{path}")
         except Exception as e:
             messagebox.showerror("导出错误", f"导出失败:\n{e}")
 
+    def _export_chunked(self, path, order_no):
+        """
+        行数超过导入文件上限（config.EXPORT_CHUNK_ROWS）时询问是否分块导出。
+
+        返回:
+            bool - 是否已按分块方式处理（含用户选择分块后导出失败）
+        """
+        chunked_export = lazy_import("chunked_export")
+        total = len(self.output_rows)
+        chunks = chunked_export.count_chunks(total)
+        if chunks <= 1:
+            return False
+        if not messagebox.askyesno(
+            "分块导出",
+            f"共{total}行，超过单个导入文件上限{EXPORT_CHUNK_ROWS}行。\n\n"
+            f"是否拆分为{chunks}个文件（{order_no}_001 ~ {chunks:03d}）并生成清单？\n"
+            f"选择「否」则导出为单个文件。",
+        ):
+            return False
+
+        try:
+            manifest = chunked_export.write_chunked_export(
+                self.output_rows,
+                os.path.dirname(path),
+                order_no,
+                ext=os.path.splitext(path)[1] or ".xlsx",
+            )
+        except Exception as e:
+            messagebox.showerror("导出错误", f"分块导出失败:\n{e}")
+            return True
+
+        failed = chunked_export.failed_chunks(manifest)
+        if failed:
+            self.status_text.set(f"分块导出: {len(failed)}个文件失败，见清单")
+            messagebox.showerror(
+                "导出错误",
+                f"以下分块导出失败（可重新导出）: {', '.join(map(str, failed))}\n\n"
+                f"清单: {manifest['manifest']}",
+            )
+        else:
+            self.status_text.set(f"分块导出成功: {chunks}个文件 → {os.path.dirname(path)}")
+            messagebox.showinfo(
+                "成功",
+                f"已拆分导出为{chunks}个文件:\n{os.path.dirname(path)}\n\n"
+                f"清单: {os.path.basename(manifest['manifest'])}",
+            )
+        return True
+
+    def _append_daily(self):
+        """把当前订单追加到当日汇总（同一采购单再次追加时替换），并在后台整理出汇总Excel"""
+        if not self.output_rows:
+            messagebox.showwarning("提示", "没有数据可追加，请先解析PDF")
+            return
+
+        daily_export = lazy_import("daily_export")
+        pdf_path = self.pdf_path.get().strip()
+        order_no = (
+            self.header_info.get("采购单号", "")
+            or os.path.splitext(os.path.basename(pdf_path))[0]
+        )
+        output_rows = self.output_rows
+        log_path = daily_export.daily_log_path()
+
+        def work():
+            result = daily_export.append_order(log_path, output_rows, order_no, pdf_path)
+            return result, daily_export.compact_daily_log(log_path)
+
+        def on_done(value):
+            result, manifest = value
+            action = {"added": "已追加", "replaced": "已替换", "unchanged": "内容未变化"}
+            self.status_text.set(
+                f"当日汇总: {order_no} {action[result['status']]}（{result['rows']}行），"
+                f"共{len(manifest['orders'])}单 {manifest['total_rows']}行 → {manifest['output']}"
+            )
+
+        def on_error(e):
+            self.status_text.set("追加到当日汇总失败")
+            messagebox.showerror("导出错误", f"追加到当日汇总失败:\n{e}")
+
+        self.status_text.set("正在追加到当日汇总...")
+        self._run_in_background(work, on_done, on_error)
+
     # ========== 图纸比对功能 ==========
 
     def _select_drawing_dir(self):
@@ -531,12 +971,15 @@ class OrderConverterApp:
         self.status_text.set("正在比对图纸版本...")
         self.root.update()
 
+        drawing_checker = lazy_import("drawing_checker")
+
         # 待打印文件夹在图纸库下
         print_folder = os.path.join(drawing_dir, DRAWING_PRINT_FOLDER)
 
+        scan = {}
         try:
-            self.drawing_results, bad_names = check_drawings(
-                self.output_rows, drawing_dir, print_folder
+            self.drawing_results, bad_names = drawing_checker.check_drawings(
+                self.output_rows, drawing_dir, print_folder, self._code_index(), scan
             )
         except Exception as e:
             messagebox.showerror("比对错误", f"图纸比对失败:\n{e}")
@@ -550,7 +993,7 @@ class OrderConverterApp:
         self.check_btn.config(text="我已完成最新图纸文件下载")
 
         # 统计
-        stats = get_check_stats(self.drawing_results)
+        stats = drawing_checker.get_check_stats(self.drawing_results)
 
         stat_parts = [f"{stats['match']}匹配"]
         if stats["mismatch"]:
@@ -587,6 +1030,7 @@ class OrderConverterApp:
             self._unhighlight_btn(self.check_btn, "我已完成最新图纸文件下载")
             self.status_text.set(
                 f"图纸比对完成: 全部匹配！共{stats['match']}个图纸已复制到待打印文件夹"
+                + self._drawing_scan_note(scan)
             )
         else:
             self.print_all_btn.config(state=tk.DISABLED)
@@ -596,17 +1040,14 @@ class OrderConverterApp:
             if stats["mismatch"] > 0:
                 self.status_text.set(
                     f"图纸比对完成: {stats['mismatch']}个版本不匹配，请更新后重新比对"
+                    + self._drawing_scan_note(scan)
                 )
             else:
-                self.status_text.set("图纸比对完成")
+                self.status_text.set("图纸比对完成" + self._drawing_scan_note(scan))
 
         # 检查是否有未映射物料 → 高亮"打开映射表"
-        code_map = {
-            row.get("产品规格", "").strip(): row.get("产品编号", "").strip()
-            for row in self.output_rows
-        }
         has_unmapped = any(
-            not code_map.get(r["yy_code"])
+            not self._factory_code(r["yy_code"])
             for r in self.drawing_results
             if r.get("status") in ("mismatch", "no_drawing", "bad_name")
         )
@@ -631,6 +1072,24 @@ class OrderConverterApp:
         if actionable_count > 0:
             self._show_naming_helper()
 
+    @staticmethod
+    def _drawing_scan_note(scan):
+        """图纸库扫描耗时说明（状态栏）"""
+        if not scan:
+            return ""
+        seconds = scan.get("seconds", 0.0)
+        files = scan.get("files", 0)
+        cache = scan.get("cache")
+        if cache == "unchanged":
+            detail = "图纸库未变化"
+        elif cache == "updated":
+            detail = f"重新扫描{scan['rescanned']}个, 移除{scan['removed']}个"
+        elif cache == "built":
+            detail = "已建立索引缓存"
+        else:
+            detail = "完整扫描"
+        return f" | 图纸库{files}个文件, 扫描{seconds:.2f}s（{detail}）"
+
     def _refresh_drawing_table(self):
         """刷新图纸比对结果表格"""
         for row in self.drawing_tree.get_children():
@@ -662,18 +1121,11 @@ class OrderConverterApp:
             messagebox.showinfo("提示", "没有需要处理的图纸")
             return
 
-        # 构建工厂编号映射（从映射表补全）
-        code_map = {}
-        for row in self.output_rows:
-            yy = row.get("产品规格", "").strip()
-            jy = row.get("产品编号", "").strip()
-            if yy and jy:
-                code_map[yy] = jy
+        # 工厂编号从双向料号索引补全
+        factory_codes = {r["yy_code"]: self._factory_code(r["yy_code"]) for r in actionable}
 
         # 检查未映射的物料
-        unmapped_yy = [
-            r["yy_code"] for r in actionable if r["yy_code"] not in code_map
-        ]
+        unmapped_yy = [r["yy_code"] for r in actionable if not factory_codes[r["yy_code"]]]
 
         # 处理方式映射
         action_labels = {
@@ -790,7 +1242,7 @@ class OrderConverterApp:
             status = r.get("status", "")
             yy_code = r["yy_code"]
             version = r.get("order_version", "")
-            factory_code = code_map.get(yy_code, "???")
+            factory_code = factory_codes[yy_code] or "???"
             name = r["suggested_name"]
             action = action_labels.get(status, "")
             all_names.append(name)
@@ -880,7 +1332,9 @@ class OrderConverterApp:
         self.status_text.set("正在合并图纸...")
         self.root.update()
 
-        count, merged_path = merge_and_print(ordered_paths)
+        count, merged_path = lazy_import("drawing_checker").merge_and_print(
+            ordered_paths
+        )
 
         if count == 0:
             messagebox.showerror("错误", "图纸合并或打印失败，请重试")
@@ -956,7 +1410,8 @@ class OrderConverterApp:
             f"  2. 图纸版本比对 + 一键打印\n\n"
             f"图纸命名规则: 工厂编号 客户料号-版本号.pdf\n"
             f"映射表: {MAPPING_TABLE_PATH}\n\n"
-            f"如遇问题请联系开发人员并提供版本号",
+            f"如遇问题请联系开发人员并提供版本号\n\n"
+            f"{startup_timing.format_report()}",
         )
 
 
@@ -979,9 +1434,11 @@ def main():
     elif "clam" in available_themes:
         style.theme_use("clam")
 
-    app = OrderConverterApp(root)
+    OrderConverterApp(root)
     root.mainloop()
 
 
 if __name__ == "__main__":
+    # PyInstaller 打包后使用多进程解析需要
+    multiprocessing.freeze_support()
     main()
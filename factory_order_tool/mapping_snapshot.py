@@ -0,0 +1,224 @@
+"""映射表快照模块 - 把解析好的映射表保存为二进制快照，启动时跳过 openpyxl
+
+mapping_table.xlsx 有数万行、多个sheet，每次用 openpyxl 逐行读取需要数秒。
+首次读取后将映射表（各 sheet 的指纹和映射，见 code_mapper.MappingTable）
+用 marshal 保存到本机程序目录下的 mapping_snapshot/（见 snapshot_path_for），
+之后只要映射表未变化，直接加载快照（毫秒级）。
+
+快照有效性: 映射表的 大小 + 修改时间 + SHA-256
+  - 大小和修改时间都一致 → 直接使用（不读取xlsx）
+  - 修改时间变化但内容哈希一致（如复制/另存为未改动）→ 仍然有效，并刷新记录的修改时间
+  - 否则视为过期: 以快照中各 sheet 的指纹为基础增量重新读取（只读变化的 sheet），并重建快照
+快照版本（SNAPSHOT_VERSION）= 快照格式版本 + 映射读取/规范化代码（code_mapper、xlsx_reader）
+的字节码摘要，格式或读取逻辑变化时快照自动失效，无需手动改版本号。
+
+安全: 映射表可能放在共享目录，快照不放在映射表旁边，只在本机程序目录内生成和读取；
+marshal 只能还原基本类型（dict/list/str/数值），不会像 pickle 那样在加载时执行代码。
+"""
+import hashlib
+import marshal
+import os
+
+import code_mapper
+import xlsx_reader
+from config import MAPPING_SNAPSHOT_DIR, MAPPING_TABLE_PATH
+from code_mapper import MappingTable
+
+SNAPSHOT_FORMAT = 3
+SNAPSHOT_SUFFIX = ".snapshot"
+
+
+def _logic_fingerprint(*modules):
+    """模块字节码的摘要（取不到字节码时为空，仅按格式版本区分）"""
+    digest = hashlib.sha256()
+    for module in modules:
+        try:
+            code = module.__spec__.loader.get_code(module.__name__)
+            digest.update(marshal.dumps(code))
+        except Exception:
+            return ""
+    return digest.hexdigest()[:16]
+
+
+SNAPSHOT_VERSION = f"{SNAPSHOT_FORMAT}-{_logic_fingerprint(code_mapper, xlsx_reader)}"
+
+
+def load_mapping_cached(path=None, stats=None):
+    """
+    带快照的 load_mapping_table。
+
+    参数:
+        path: str | None - 映射表路径（None 使用 config.MAPPING_TABLE_PATH）
+        stats: dict | None - 若提供，填入 snapshot ("hit" / "rebuilt" / "none")
+
+    返回:
+        mapping: dict - 同 load_mapping_table
+        hit: bool - 是否命中快照
+    """
+    table, hit = load_mapping_table_cached(path, stats)
+    return table.mapping, hit
+
+
+def load_mapping_table_cached(path=None, stats=None):
+    """
+    同 load_mapping_cached，但返回 MappingTable（可继续增量重新加载）。
+
+    快照过期时以快照为基础只重新读取变化的 sheet，
+    若提供 stats 还会填入 changes（各 sheet 的变化，见 MappingTable.apply_update）。
+
+    返回:
+        table: MappingTable
+        hit: bool - 是否命中快照
+    """
+    path = path or MAPPING_TABLE_PATH
+    if not os.path.exists(path):
+        if stats is not None:
+            stats["snapshot"] = "none"
+        return MappingTable(path), False
+
+    snapshot_path = snapshot_path_for(path)
+    state, fresh = _read_snapshot(path, snapshot_path)
+    table = MappingTable(path, state)
+    if fresh:
+        if stats is not None:
+            stats["snapshot"] = "hit"
+        return table, True
+
+    signature, update = read_update(table)
+    changes = table.apply_update(update)
+    save_mapping_snapshot(path, table.get_state(), signature)
+    if stats is not None:
+        stats["snapshot"] = "rebuilt"
+        stats["changes"] = changes
+    return table, False
+
+
+def read_update(table):
+    """
+    读取映射表变化（不修改 table，可在后台线程调用）。
+
+    返回:
+        signature: dict - 读取前的文件签名，应用后连同 table.get_state() 交给 save_mapping_snapshot
+        update: dict - 交给 table.apply_update
+    """
+    # 先取文件签名再读取内容: 读取期间映射表被改写时，签名与内容不符，下次自动重新读取
+    signature = file_signature(table.path, with_hash=True)
+    return signature, table.read_update()
+
+
+def save_mapping_snapshot(path, state, signature):
+    """
+    保存映射表快照。
+
+    参数:
+        path: str - 映射表路径
+        state: dict - MappingTable.get_state()（在修改映射的线程取得，保存可放到后台）
+        signature: dict - read_update 返回的文件签名
+    """
+    _write_snapshot(snapshot_path_for(path), signature, state)
+
+
+def snapshot_path_for(path):
+    """
+    映射表对应的快照路径: config.MAPPING_SNAPSHOT_DIR 下 {映射表名}_{完整路径摘要}.snapshot
+    （不同目录的同名映射表互不影响）
+    """
+    full_path = os.path.normcase(os.path.abspath(path))
+    key = hashlib.sha1(full_path.encode("utf-8")).hexdigest()[:12]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(MAPPING_SNAPSHOT_DIR, f"{stem}_{key}{SNAPSHOT_SUFFIX}")
+
+
+def clear_mapping_snapshot(path=None):
+    """删除映射表快照，返回是否删除了文件"""
+    snapshot_path = snapshot_path_for(path or MAPPING_TABLE_PATH)
+    try:
+        os.remove(snapshot_path)
+        return True
+    except OSError:
+        return False
+
+
+def file_signature(path, with_hash=False):
+    """映射表签名: 大小、修改时间（纳秒），可选内容哈希"""
+    st = os.stat(path)
+    signature = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if with_hash:
+        signature["sha256"] = file_hash(path)
+    return signature
+
+
+def file_hash(path):
+    """映射表内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ========== 快照读写 ==========
+
+def _read_snapshot(path, snapshot_path):
+    """
+    读取并校验快照。
+
+    快照文件依次存放两个 marshal 对象: 签名头 和 映射表状态。
+
+    返回:
+        state: dict | None - 映射表状态（过期的快照也返回，作为增量重新读取的基础）
+        fresh: bool - 快照是否与映射表一致
+    """
+    if not os.path.exists(snapshot_path):
+        return None, False
+    try:
+        with open(snapshot_path, "rb") as f:
+            header = marshal.load(f)
+            if header.get("version") != SNAPSHOT_VERSION:
+                return None, False
+
+            current = file_signature(path)
+            fresh = current["size"] == header["size"]
+            refresh = False
+            if fresh and current["mtime_ns"] != header["mtime_ns"]:
+                fresh = file_hash(path) == header["sha256"]
+                refresh = fresh
+
+            state = marshal.load(f)
+            if not isinstance(state, dict) or not isinstance(state.get("sheets"), list):
+                raise ValueError("快照内容无效")
+    except Exception:
+        # 快照损坏或格式不兼容: 删除后重建
+        _remove_quietly(snapshot_path)
+        return None, False
+
+    if refresh:
+        header.update(current)
+        _write_snapshot(snapshot_path, header, state)
+    return state, fresh
+
+
+def _write_snapshot(snapshot_path, signature, state):
+    """原子写入快照（先写临时文件再替换），写入失败不影响映射结果"""
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "size": signature["size"],
+        "mtime_ns": signature["mtime_ns"],
+        "sha256": signature["sha256"],
+    }
+    tmp_path = snapshot_path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            marshal.dump(header, f)
+            marshal.dump(state, f)
+        os.replace(tmp_path, snapshot_path)
+    except OSError:
+        _remove_quietly(tmp_path)
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,471 @@
+"""SQLite 映射库模块 - 把映射表转存为带索引的 SQLite 文件，按需查询
+
+内存后端（默认）每个程序实例都要把整张映射表读入字典，内存和启动时间随料号数量增长。
+config.MAPPING_BACKEND = "sqlite" 时改用映射表旁的 mapping_table.db:
+  - 客户料号为主键（WITHOUT ROWID 表，按主键聚簇存储），单条/批量 IN (...) 查询
+  - 规范化料号（code_mapper.normalize_code）单独建索引，原样查不到时按规范化料号查询
+  - 久益料号单独建索引，可反查对应的全部客户料号及所在sheet（同 code_mapper.CodeIndex）
+  - 料号三元组和比较用料号在重建时写入库中，未映射料号的相近料号建议在 SQL 中查找
+    （同 mapping_suggest.SuggestionIndex，不在内存中构建索引）
+  - 不把映射读入内存，打开映射库只需读取元数据，启动时间与料号数量无关
+  - WAL 模式: 重建期间其它进程（多个界面实例、批量转换的工作进程）仍可读取旧数据
+
+映射库有效性与映射表快照相同（见 mapping_snapshot）: 映射表的 大小 + 修改时间 + SHA-256。
+映射表变化后由首个发现的进程重建（写事务内再次检查，多个进程不会重复重建）。
+
+注意: WAL 依赖共享内存，映射库应放在本机磁盘；映射表本身可以在共享目录。
+"""
+import os
+import sqlite3
+import threading
+from urllib.request import pathname2url
+
+from config import (
+    MAPPING_BACKEND,
+    MAPPING_DB_PATH,
+    MAPPING_LOOKUP_BATCH,
+    MAPPING_TABLE_PATH,
+    SUGGEST_TOP_K,
+)
+from code_mapper import iter_mapping_entries, normalize_code
+from mapping_suggest import (
+    MAX_CANDIDATES,
+    PREFIX_NEIGHBOURS,
+    code_grams,
+    max_gram_df,
+    rank_suggestions,
+    suggestion_key,
+)
+from mapping_snapshot import (
+    file_hash,
+    file_signature,
+    load_mapping_cached,
+    load_mapping_table_cached,
+)
+
+SCHEMA_VERSION = 4
+_BUSY_TIMEOUT = 30  # 秒，等待其它进程的写事务
+
+
+def load_mapping(path=None, backend=None, stats=None):
+    """
+    按配置的后端加载映射。
+
+    参数:
+        path: str | None - 映射表路径（None 使用 config.MAPPING_TABLE_PATH）
+        backend: str | None - "memory" / "sqlite"（None 使用 config.MAPPING_BACKEND）
+        stats: dict | None - 同 load_mapping_cached / open_mapping_store
+
+    返回:
+        mapping: dict | SqliteMappingStore - 可直接传给 apply_mapping
+        hit: bool - 是否无需重新读取映射表
+    """
+    backend = backend or MAPPING_BACKEND
+    if backend == "sqlite":
+        return open_mapping_store(path, stats=stats)
+    if backend == "memory":
+        return load_mapping_cached(path, stats)
+    raise ValueError(f"未知的映射表后端: {backend}")
+
+
+def load_code_index(path=None, backend=None):
+    """
+    按配置的后端加载双向料号索引（客户料号 ⇄ 久益料号）。
+
+    返回:
+        index: CodeIndex | SqliteMappingStore - 映射库自身提供相同的 factory_code / customer_codes
+    """
+    backend = backend or MAPPING_BACKEND
+    if backend == "sqlite":
+        return open_mapping_store(path)[0]
+    if backend == "memory":
+        return load_mapping_table_cached(path)[0].codes
+    raise ValueError(f"未知的映射表后端: {backend}")
+
+
+def load_mapping_with_index(path=None, backend=None):
+    """
+    按配置的后端同时取得映射和双向料号索引（映射表只加载一次）。
+
+    返回:
+        mapping: dict | SqliteMappingStore - 同 load_mapping
+        index: CodeIndex | SqliteMappingStore - 同 load_code_index
+    """
+    backend = backend or MAPPING_BACKEND
+    if backend == "sqlite":
+        store = open_mapping_store(path)[0]
+        return store, store
+    if backend == "memory":
+        table = load_mapping_table_cached(path)[0]
+        return table.mapping, table.codes
+    raise ValueError(f"未知的映射表后端: {backend}")
+
+
+def open_mapping_store(path=None, db_path=None, stats=None):
+    """
+    打开映射库，映射表有变化时先重建。
+
+    参数:
+        path: str | None - 映射表路径（None 使用 config.MAPPING_TABLE_PATH）
+        db_path: str | None - 映射库路径（None: 默认映射表对应 config.MAPPING_DB_PATH，
+                 其它映射表为同目录同名 .db）
+        stats: dict | None - 若提供，填入 store ("hit" / "rebuilt" / "none")
+
+    返回:
+        store: SqliteMappingStore
+        hit: bool - 映射库是否已是最新（无需重建）
+    """
+    path = path or MAPPING_TABLE_PATH
+    if db_path is None:
+        if os.path.abspath(path) == os.path.abspath(MAPPING_TABLE_PATH):
+            db_path = MAPPING_DB_PATH
+        else:
+            db_path = os.path.splitext(path)[0] + ".db"
+
+    if not os.path.exists(path):
+        # 只有映射库（如单独分发的库文件）时直接使用
+        status = "hit" if os.path.exists(db_path) else "none"
+        if status == "none":
+            _ensure_schema(db_path)
+    else:
+        status = "hit" if _sync_store(path, db_path) else "rebuilt"
+
+    if stats is not None:
+        stats["store"] = status
+    return SqliteMappingStore(db_path), status == "hit"
+
+
+class SqliteMappingStore:
+    """
+    只读映射库，接口与映射字典兼容（get / [] / in / len / 遍历料号），另有批量查询 get_many，
+    与 code_mapper.CodeIndex 相同的双向查询 factory_code / customer_codes，
+    以及与 mapping_suggest.SuggestionIndex 相同的相近料号建议 suggest。
+
+    连接可跨线程使用（内部加锁）；跨进程传递时按路径重新打开（可直接用作进程池初始化参数）。
+
+    参数:
+        db_path: str - 映射库路径
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        uri = "file:" + pathname2url(os.path.abspath(db_path)) + "?mode=ro"
+        self._conn = sqlite3.connect(
+            uri, uri=True, timeout=_BUSY_TIMEOUT, check_same_thread=False
+        )
+        self._count = None
+
+    def get(self, customer_code, default=None):
+        """查询单个客户料号，返回 {产品编号, 产品名称}"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT product_code, product_name FROM mapping WHERE customer_code = ?",
+                (customer_code,),
+            ).fetchone()
+        if row is None:
+            return default
+        return {"产品编号": row[0], "产品名称": row[1]}
+
+    def get_many(self, customer_codes):
+        """
+        批量查询。
+
+        参数:
+            customer_codes: Iterable[str] - 客户料号（可重复）
+
+        返回:
+            dict - {客户料号: {产品编号, 产品名称}}，只含找到的料号
+        """
+        codes = list(set(customer_codes))
+        found = {}
+        with self._lock:
+            for start in range(0, len(codes), MAPPING_LOOKUP_BATCH):
+                chunk = codes[start:start + MAPPING_LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    "SELECT customer_code, product_code, product_name FROM mapping "
+                    f"WHERE customer_code IN ({placeholders})",
+                    chunk,
+                )
+                for code, product_code, product_name in rows:
+                    found[code] = {"产品编号": product_code, "产品名称": product_name}
+        return found
+
+    def get_many_normalized(self, customer_codes):
+        """
+        按规范化料号批量查询（规范化后对应多个料号时取字典序最小者，与 NormalizedIndex 一致）。
+
+        返回:
+            dict - {查询料号: (映射库中的原始料号, {产品编号, 产品名称})}，只含找到的料号
+        """
+        by_norm = {}
+        for code in customer_codes:
+            by_norm.setdefault(normalize_code(code)[0], []).append(code)
+        norms = list(by_norm)
+        found = {}
+        with self._lock:
+            for start in range(0, len(norms), MAPPING_LOOKUP_BATCH):
+                chunk = norms[start:start + MAPPING_LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    "SELECT normalized_code, MIN(customer_code) FROM mapping "
+                    f"WHERE normalized_code IN ({placeholders}) GROUP BY normalized_code",
+                    chunk,
+                )
+                for norm, key in rows:
+                    for code in by_norm[norm]:
+                        found[code] = key
+        result = {}
+        infos = self.get_many(found.values())
+        for code, key in found.items():
+            result[code] = (key, infos[key])
+        return result
+
+    def factory_code(self, customer_code, default=""):
+        """客户料号 → 久益料号（原样查不到时按规范化料号查找），找不到返回 default"""
+        info = self.get(customer_code)
+        if info is None:
+            found = self.get_many_normalized([customer_code]).get(customer_code)
+            info = found[1] if found else None
+        return info["产品编号"] if info is not None else default
+
+    def customer_codes(self, factory_code):
+        """久益料号 → [(客户料号, sheet名)]，按客户料号排序"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT customer_code, sheet FROM mapping WHERE product_code = ? "
+                "ORDER BY customer_code",
+                (factory_code,),
+            ).fetchall()
+
+    def suggest(self, code, k=SUGGEST_TOP_K):
+        """
+        查找最接近的已知料号（规则同 SuggestionIndex.suggest，候选在 SQL 中查找）。
+
+        返回:
+            list[tuple[str, int]] - [(客户料号, 编辑距离)]，按接近程度排序，最多k个
+        """
+        query = suggestion_key(code)
+        max_df = max_gram_df(len(self))
+        if not query or not len(self):
+            return []
+        grams = list(code_grams(query))
+        placeholders = ",".join("?" * len(grams))
+        with self._lock:
+            # 共享片段最多的料号（同数时按料号排序，与 SuggestionIndex 一致）
+            candidates = self._conn.execute(
+                "SELECT m.customer_code, m.suggest_key FROM ("
+                "SELECT g.customer_code, COUNT(*) AS shared FROM suggest_gram g "
+                "JOIN suggest_gram_df d ON d.gram = g.gram "
+                f"WHERE g.gram IN ({placeholders}) AND d.df <= ? "
+                "GROUP BY g.customer_code ORDER BY shared DESC, g.customer_code LIMIT ?"
+                ") c JOIN mapping m ON m.customer_code = c.customer_code",
+                grams + [max_df, MAX_CANDIDATES],
+            ).fetchall()
+            # 字典序相邻的料号（相邻流水号/版本）
+            candidates += self._conn.execute(
+                "SELECT customer_code, suggest_key FROM mapping WHERE suggest_key < ? "
+                "ORDER BY suggest_key DESC LIMIT ?",
+                (query, PREFIX_NEIGHBOURS),
+            ).fetchall()
+            candidates += self._conn.execute(
+                "SELECT customer_code, suggest_key FROM mapping WHERE suggest_key >= ? "
+                "ORDER BY suggest_key LIMIT ?",
+                (query, PREFIX_NEIGHBOURS),
+            ).fetchall()
+        return rank_suggestions(query, {(key, code) for code, key in candidates}, k)
+
+    def collisions(self):
+        """规范化引入的冲突: {规范化料号: [原始料号...]}（同 NormalizedIndex.collisions）"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT normalized_code, customer_code FROM mapping WHERE normalized_code IN ("
+                "SELECT normalized_code FROM mapping GROUP BY normalized_code "
+                "HAVING COUNT(*) > 1) ORDER BY normalized_code, customer_code"
+            ).fetchall()
+        result = {}
+        for norm, code in rows:
+            result.setdefault(norm, []).append(code)
+        return result
+
+    def __getitem__(self, customer_code):
+        value = self.get(customer_code)
+        if value is None:
+            raise KeyError(customer_code)
+        return value
+
+    def __contains__(self, customer_code):
+        return self.get(customer_code) is not None
+
+    def __iter__(self):
+        """遍历全部客户料号（先一次取出，遍历期间不占用连接）"""
+        with self._lock:
+            codes = [row[0] for row in self._conn.execute("SELECT customer_code FROM mapping")]
+        return iter(codes)
+
+    def __len__(self):
+        # 条数在重建时写入元数据，避免每次 COUNT(*) 扫描全表
+        if self._count is None:
+            with self._lock:
+                meta = _read_meta(self._conn)
+            self._count = int(meta.get("count", 0))
+        return self._count
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __getstate__(self):
+        return {"db_path": self.db_path}
+
+    def __setstate__(self, state):
+        self.__init__(state["db_path"])
+
+
+# ========== 映射库读写 ==========
+
+def _sync_store(path, db_path):
+    """映射库与映射表一致时返回 True；否则重建映射库并返回 False"""
+    signature = file_signature(path)
+    conn = _connect_writer(db_path)
+    try:
+        meta = _read_meta(conn)
+        if _meta_fresh(meta, signature, path, conn):
+            return True
+
+        # 写事务内再次检查: 多个进程同时发现过期时只有第一个重建
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            meta = _read_meta(conn)
+            if _meta_fresh(meta, signature, path, conn):
+                conn.execute("COMMIT")
+                return True
+            _rebuild(conn, path)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return False
+    finally:
+        conn.close()
+
+
+def _meta_fresh(meta, signature, path, conn):
+    """元数据记录的映射表签名是否与当前一致（修改时间变化但内容未变时刷新记录）"""
+    if meta.get("schema") != str(SCHEMA_VERSION):
+        return False
+    if meta.get("size") != str(signature["size"]):
+        return False
+    if meta.get("mtime_ns") == str(signature["mtime_ns"]):
+        return True
+    if meta.get("sha256") != file_hash(path):
+        return False
+    _write_meta(conn, {"mtime_ns": signature["mtime_ns"]})
+    return True
+
+
+def _rebuild(conn, path):
+    """在当前写事务内用映射表内容替换映射库数据"""
+    # 先取签名再读取内容: 读取期间映射表被改写时，签名与内容不符，下次自动重建
+    signature = file_signature(path, with_hash=True)
+    conn.execute("DELETE FROM mapping")
+    conn.execute("DELETE FROM suggest_gram")
+    conn.execute("DELETE FROM suggest_gram_df")
+    # 同一客户料号后出现的覆盖先出现的，与内存映射字典一致
+    conn.executemany(
+        "INSERT OR REPLACE INTO mapping "
+        "(customer_code, normalized_code, suggest_key, product_code, product_name, sheet) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            (code, normalize_code(code)[0], suggestion_key(code),
+             info["产品编号"], info["产品名称"], sheet)
+            for code, info, sheet in iter_mapping_entries(path, with_sheet=True)
+        ),
+    )
+    # 建议用的三元组倒排表（按片段聚簇）和各片段的料号数
+    conn.executemany(
+        "INSERT INTO suggest_gram (gram, customer_code) VALUES (?, ?)",
+        (
+            (gram, code)
+            for code, key in conn.execute("SELECT customer_code, suggest_key FROM mapping")
+            for gram in code_grams(key)
+        ),
+    )
+    conn.execute(
+        "INSERT INTO suggest_gram_df (gram, df) "
+        "SELECT gram, COUNT(*) FROM suggest_gram GROUP BY gram"
+    )
+    count = conn.execute("SELECT COUNT(*) FROM mapping").fetchone()[0]
+    _write_meta(conn, {
+        "schema": SCHEMA_VERSION,
+        "size": signature["size"],
+        "mtime_ns": signature["mtime_ns"],
+        "sha256": signature["sha256"],
+        "count": count,
+    })
+
+
+def _connect_writer(db_path):
+    """打开可写连接（不存在时建表），启用 WAL"""
+    conn = sqlite3.connect(db_path, timeout=_BUSY_TIMEOUT, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+    )
+    if _read_meta(conn).get("schema") not in (None, str(SCHEMA_VERSION)):
+        # 表结构版本变化: 删除旧表，随后按映射表重建
+        conn.execute("DROP TABLE IF EXISTS mapping")
+        conn.execute("DROP TABLE IF EXISTS suggest_gram")
+        conn.execute("DROP TABLE IF EXISTS suggest_gram_df")
+        conn.execute("DELETE FROM meta")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS mapping ("
+        "customer_code TEXT PRIMARY KEY, "
+        "normalized_code TEXT NOT NULL, "
+        "suggest_key TEXT NOT NULL, "
+        "product_code TEXT NOT NULL, "
+        "product_name TEXT NOT NULL, "
+        "sheet TEXT NOT NULL"
+        ") WITHOUT ROWID"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS mapping_normalized ON mapping (normalized_code)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS mapping_product ON mapping (product_code)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS mapping_suggest_key ON mapping (suggest_key)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS suggest_gram ("
+        "gram TEXT NOT NULL, "
+        "customer_code TEXT NOT NULL, "
+        "PRIMARY KEY (gram, customer_code)"
+        ") WITHOUT ROWID"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS suggest_gram_df ("
+        "gram TEXT PRIMARY KEY, "
+        "df INTEGER NOT NULL"
+        ") WITHOUT ROWID"
+    )
+    return conn
+
+
+def _ensure_schema(db_path):
+    """创建空映射库（映射表不存在时，保证只读连接可以打开）"""
+    _connect_writer(db_path).close()
+
+
+def _read_meta(conn):
+    return dict(conn.execute("SELECT key, value FROM meta"))
+
+
+def _write_meta(conn, values):
+    conn.executemany(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+        [(key, str(value)) for key, value in values.items()],
+    )
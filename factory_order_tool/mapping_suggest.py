@@ -0,0 +1,209 @@
+"""料号建议模块 - 为未映射的客户料号查找映射表中最接近的已知料号
+
+未映射多因手输错字或相邻版本/流水号（如 YY60030058 写成 YY60030085、YY6003058），
+映射加载后构建一次索引，每个未映射料号毫秒级给出最接近的几个候选:
+
+  1. 三元组（3-gram）倒排索引: 统计与查询共享片段最多的料号作为候选
+     （出现在大量料号中的片段如 "^YY" 区分度低，跳过以保证10万+料号时仍然很快）
+  2. 排序后的料号表: 按前缀二分查找，补充字典序相邻的料号（相邻流水号/版本）
+  3. 候选按编辑距离排序，距离相同时公共前缀长的优先；距离过大的不作为建议
+
+比较时忽略大小写和首尾空白。
+
+SQLite 映射库（mapping_store）在重建时把三元组写入库中，由 SqliteMappingStore.suggest
+按同样的规则在 SQL 中查找候选，不把料号读入内存; 两者共用这里的片段和排序规则。
+"""
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from config import SUGGEST_TOP_K
+
+_GRAM_SIZE = 3
+MAX_CANDIDATES = 50       # 按共享片段数取前N个候选再计算编辑距离
+PREFIX_NEIGHBOURS = 2     # 字典序前后各取N个相邻料号
+_MAX_GRAM_RATIO = 0.05    # 出现在超过该比例料号中的片段视为区分度低
+_MIN_GRAM_CUTOFF = 200    # 料号较少时不跳过片段
+
+
+class SuggestionIndex:
+    """
+    客户料号建议索引（构建后只读，可在后台线程构建）。
+
+    参数:
+        codes: Iterable[str] - 映射表中的全部客户料号（映射字典/映射库可直接传入）
+    """
+
+    def __init__(self, codes):
+        pairs = sorted({(suggestion_key(code), str(code)) for code in codes})
+        self._keys = [key for key, _ in pairs]    # 规范化后的料号（已排序）
+        self._codes = [code for _, code in pairs]  # 原始料号
+
+        postings = {}
+        for idx, key in enumerate(self._keys):
+            for gram in code_grams(key):
+                ids = postings.get(gram)
+                if ids is None:
+                    ids = postings[gram] = array("I")
+                ids.append(idx)
+        self._postings = postings
+        self._max_df = max_gram_df(len(self._keys))
+
+    def __len__(self):
+        return len(self._keys)
+
+    def suggest(self, code, k=SUGGEST_TOP_K):
+        """
+        查找最接近的已知料号。
+
+        返回:
+            list[tuple[str, int]] - [(客户料号, 编辑距离)]，按接近程度排序，最多k个
+        """
+        query = suggestion_key(code)
+        if not query or not self._keys:
+            return []
+
+        counts = Counter()
+        for gram in code_grams(query):
+            ids = self._postings.get(gram)
+            if ids is not None and len(ids) <= self._max_df:
+                counts.update(ids)
+        # 共享片段最多的料号（同数时按料号排序，与 SqliteMappingStore.suggest 一致）
+        top = heapq.nsmallest(
+            MAX_CANDIDATES, counts.items(), key=lambda kv: (-kv[1], self._codes[kv[0]])
+        )
+        candidates = {idx for idx, _ in top}
+
+        pos = bisect_left(self._keys, query)
+        candidates.update(range(
+            max(0, pos - PREFIX_NEIGHBOURS),
+            min(len(self._keys), pos + PREFIX_NEIGHBOURS),
+        ))
+        return rank_suggestions(
+            query, ((self._keys[idx], self._codes[idx]) for idx in candidates), k
+        )
+
+
+def suggestion_index_for(mapping):
+    """
+    当前映射对应的建议索引: 映射库自身在 SQL 中查找建议（不读入料号），映射字典构建 SuggestionIndex。
+
+    返回:
+        SuggestionIndex | SqliteMappingStore - 均提供 suggest(code, k)
+    """
+    if hasattr(mapping, "suggest"):
+        return mapping
+    return SuggestionIndex(mapping)
+
+
+def suggest_for_unmapped(index, mapping, unmapped, k=SUGGEST_TOP_K):
+    """
+    为未映射料号生成建议（附带映射表中的久益料号和品名规格）。
+
+    参数:
+        index: SuggestionIndex | SqliteMappingStore - 见 suggestion_index_for
+        mapping: dict | SqliteMappingStore - 当前映射
+        unmapped: Iterable[str] - 未映射的客户料号
+
+    返回:
+        dict - {未映射料号: [{客户料号, 产品编号, 产品名称, 距离}]}，无建议的料号不在其中
+    """
+    suggested = {}
+    for code in dict.fromkeys(unmapped):
+        matches = index.suggest(code, k)
+        if matches:
+            suggested[code] = matches
+
+    wanted = {match for matches in suggested.values() for match, _ in matches}
+    if hasattr(mapping, "get_many"):
+        found = mapping.get_many(wanted)
+    else:
+        found = {match: mapping.get(match) for match in wanted}
+
+    result = {}
+    for code, matches in suggested.items():
+        rows = []
+        for match, distance in matches:
+            info = found.get(match)
+            if info is None:
+                continue  # 索引构建后映射已变化
+            rows.append({
+                "客户料号": match,
+                "产品编号": info["产品编号"],
+                "产品名称": info["产品名称"],
+                "距离": distance,
+            })
+        if rows:
+            result[code] = rows
+    return result
+
+
+def suggestion_key(code):
+    """比较用的料号（忽略大小写和首尾空白）"""
+    return str(code).strip().upper()
+
+
+def code_grams(key):
+    """料号（suggestion_key）的3-gram集合（首尾加边界符，短料号也至少有一个片段）"""
+    padded = f"^{key}$"
+    if len(padded) <= _GRAM_SIZE:
+        return {padded}
+    return {padded[i:i + _GRAM_SIZE] for i in range(len(padded) - _GRAM_SIZE + 1)}
+
+
+def max_gram_df(count):
+    """出现在超过该数量料号中的片段区分度低，查找候选时跳过"""
+    return max(_MIN_GRAM_CUTOFF, int(count * _MAX_GRAM_RATIO))
+
+
+def rank_suggestions(query, candidates, k=SUGGEST_TOP_K):
+    """
+    候选按编辑距离排序，距离相同时公共前缀长的优先；距离过大的不作为建议。
+
+    参数:
+        query: str - suggestion_key 规范化后的查询料号
+        candidates: Iterable[tuple[str, str]] - [(规范化料号, 原始料号)]
+
+    返回:
+        list[tuple[str, int]] - [(原始料号, 编辑距离)]，最多k个
+    """
+    max_distance = max(1, len(query) // 3)
+    scored = []
+    for key, code in candidates:
+        distance = _edit_distance(query, key, max_distance)
+        if distance <= max_distance:
+            scored.append((distance, -_common_prefix(query, key), key, code))
+    scored.sort()
+    return [(code, distance) for distance, _, _, code in scored[:k]]
+
+
+# ========== 内部工具 ==========
+
+
+def _edit_distance(a, b, limit):
+    """Levenshtein 编辑距离（超过 limit 时提前返回 limit+1）"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _common_prefix(a, b):
+    n = 0
+    for ca, cb in zip(a, b):
+        if ca != cb:
+            break
+        n += 1
+    return n
@@ -0,0 +1,104 @@
+"""映射表监视模块 - 轮询映射表文件状态，Excel 保存完成后通知重新加载
+
+使用 os.stat 轮询（不依赖文件系统通知），映射表放在 SMB 共享目录时同样有效。
+poll() 可能因网络盘而变慢，应在后台线程调用；是否重新加载由调用方决定。
+
+判定"保存完成"的条件:
+  1. 文件大小/修改时间与上次加载时不同
+  2. 连续两次轮询间隔至少 settle 秒内大小/修改时间不再变化（Excel 仍在写入时会持续变化）
+  3. 文件可以打开并读取 xlsx 目录（Excel 保存过程中文件可能被锁定、暂时不存在或不完整）
+"""
+import os
+import threading
+import time
+import zipfile
+
+from config import MAPPING_TABLE_PATH, MAPPING_WATCH_SETTLE_SECONDS
+
+
+class MappingWatcher:
+    """
+    映射表文件变化检测（线程安全）。
+
+    用法:
+        watcher.mark_current()   # 开始加载映射表前调用，记录当前文件状态
+        if watcher.poll():       # 定时在后台线程调用
+            ...重新加载映射表...
+
+    参数:
+        path: str | None - 映射表路径（None 使用 config.MAPPING_TABLE_PATH）
+        settle: float - 文件状态保持不变多少秒后才视为保存完成
+    """
+
+    def __init__(self, path=None, settle=MAPPING_WATCH_SETTLE_SECONDS):
+        self.path = path or MAPPING_TABLE_PATH
+        self.settle = settle
+        self._lock = threading.Lock()
+        self._known = None          # 最近一次加载时的文件状态
+        self._pending = None        # 检测到的新状态（等待稳定）
+        self._pending_since = 0.0
+
+    def mark_current(self):
+        """记录当前文件状态为已加载（之后的变化才会触发 poll）"""
+        signature = _stat_signature(self.path)
+        with self._lock:
+            self._known = signature
+            self._pending = None
+
+    def reset(self):
+        """忘记已加载的状态: 下次 poll 文件稳定后必定返回 True"""
+        with self._lock:
+            self._known = object()
+            self._pending = None
+
+    def poll(self):
+        """
+        检查映射表是否已变化且保存完成。
+
+        返回:
+            bool - True 表示应重新加载（同一变化只返回一次）
+        """
+        signature = _stat_signature(self.path)
+        now = time.monotonic()
+        with self._lock:
+            if signature == self._known:
+                self._pending = None
+                return False
+            if signature is None:
+                # Excel 另存时会短暂删除/重命名原文件，等待新文件出现
+                return False
+            if signature != self._pending:
+                self._pending = signature
+                self._pending_since = now
+                return False
+            if now - self._pending_since < self.settle:
+                return False
+
+        if not _is_readable(self.path):
+            return False
+
+        with self._lock:
+            if signature != self._pending:
+                return False
+            self._known = signature
+            self._pending = None
+        return True
+
+
+def _stat_signature(path):
+    """文件状态: (大小, 修改时间纳秒)，文件不存在或无法访问返回 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _is_readable(path):
+    """文件能否打开并读取 xlsx 压缩包目录（写入未完成或被锁定时返回 False）"""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            archive.infolist()
+    except (OSError, zipfile.BadZipFile):
+        return False
+    return True
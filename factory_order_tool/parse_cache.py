@@ -0,0 +1,148 @@
+"""采购单解析缓存模块 - 按PDF内容哈希缓存解析结果
+
+重新加载映射表后会自动重新解析同一份PDF，而PDF本身并未改变。
+将 header_info 和 items 以JSON形式缓存到程序目录下，命中时直接返回。
+
+缓存键: PDF内容的 SHA-256 + 解析器版本号 + 解析后端（解析逻辑变化时自动失效）
+淘汰策略: LRU（按文件访问时间），超过条数或总大小上限时删除最久未用的条目
+"""
+import hashlib
+import json
+import os
+
+from config import (
+    PARSE_CACHE_DIR,
+    PARSE_CACHE_MAX_ENTRIES,
+    PARSE_CACHE_MAX_BYTES,
+    PDF_PARSER_BACKEND,
+)
+from pdf_parser import PARSER_VERSION, parse_purchase_order
+from records import OrderItem
+
+
+def parse_purchase_order_cached(pdf_path, cache_dir=None, stats=None):
+    """
+    带缓存的 parse_purchase_order。
+
+    参数:
+        pdf_path: str - PDF文件路径
+        cache_dir: str | None - 缓存目录（None 使用 config.PARSE_CACHE_DIR）
+        stats: dict | None - 若提供，填入解析统计（同 parse_purchase_order，命中时取缓存值）
+
+    返回:
+        header_info: dict - 采购单头部信息
+        items: list[OrderItem] - 每行项目（可按字典方式访问）
+        hit: bool - 是否命中缓存
+    """
+    cache_dir = cache_dir or PARSE_CACHE_DIR
+    cache_path = os.path.join(cache_dir, f"{_cache_key(pdf_path)}.json")
+
+    cached = _read_entry(cache_path)
+    if cached is not None:
+        if stats is not None:
+            stats.update(cached.get("stats", {}))
+        items = [OrderItem.from_dict(item) for item in cached["items"]]
+        return cached["header_info"], items, True
+
+    parse_stats = {}
+    header_info, items = parse_purchase_order(pdf_path, stats=parse_stats)
+    if stats is not None:
+        stats.update(parse_stats)
+    _write_entry(
+        cache_path,
+        {
+            "header_info": header_info,
+            "items": [item.to_dict() for item in items],
+            "stats": parse_stats,
+        },
+    )
+    _evict(cache_dir)
+    return header_info, items, False
+
+
+def clear_parse_cache(cache_dir=None):
+    """清空解析缓存，返回删除的条目数"""
+    cache_dir = cache_dir or PARSE_CACHE_DIR
+    removed = 0
+    for path, _, _ in _list_entries(cache_dir):
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def _cache_key(pdf_path):
+    """PDF内容哈希 + 解析器版本 + 解析后端"""
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return f"{digest.hexdigest()}_v{PARSER_VERSION}_{PDF_PARSER_BACKEND}"
+
+
+def _read_entry(cache_path):
+    """读取缓存条目，命中时刷新访问时间（LRU）；损坏的条目直接删除"""
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        os.utime(cache_path)
+        return data
+    except (OSError, ValueError):
+        try:
+            os.remove(cache_path)
+        except OSError:
+            pass
+        return None
+
+
+def _write_entry(cache_path, data):
+    """原子写入缓存条目（先写临时文件再替换），写入失败不影响解析结果"""
+    tmp_path = cache_path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _list_entries(cache_dir):
+    """列出缓存条目: [(路径, 大小, 访问时间)]"""
+    entries = []
+    if not os.path.isdir(cache_dir):
+        return entries
+    for fname in os.listdir(cache_dir):
+        if not fname.endswith(".json"):
+            continue
+        path = os.path.join(cache_dir, fname)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((path, st.st_size, st.st_mtime))
+    return entries
+
+
+def _evict(cache_dir):
+    """超过条数或总大小上限时，按最久未使用顺序删除"""
+    entries = sorted(_list_entries(cache_dir), key=lambda e: e[2])
+    total = sum(size for _, size, _ in entries)
+    count = len(entries)
+
+    for path, size, _ in entries:
+        if count <= PARSE_CACHE_MAX_ENTRIES and total <= PARSE_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        count -= 1
+        total -= size
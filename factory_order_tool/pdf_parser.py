@@ -1,39 +1,400 @@
-"""PDF采购单解析模块 - 使用pdfplumber提取表格数据
+"""PDF采购单解析模块 - 使用pdfplumber（或可选的pypdfium2后端）提取表格数据
 
 生久科技采购单PDF表格结构（6列，每个项目占2行）：
   主行:   [项次, "YY编号 规格\n品名\n图号", None, "单价\n数量\n单位", "金额\n日期\n税率", 交期回复]
   续行:   [None, "备注内容", None, None, None, None]
 
 注: 交期回复列（最后一列）通常为空，用户可通过PDF编辑器在此列填写最新图纸版本号
+
+解析后端（config.PDF_PARSER_BACKEND）:
+  pdfplumber - 默认，基于 pdfminer 版面分析
+  pdfium     - 基于 pypdfium2 文本框和表格线坐标重建（见 pdfium_backend），不导入 pdfplumber
 """
-import pdfplumber
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+
+from config import (
+    PDF_PARSER_BACKEND,
+    PDF_PARSE_WORKERS,
+    PDF_PARALLEL_MIN_PAGES,
+    PDF_PAGE_TRIAGE_ENABLED,
+    PDF_TABLE_TEMPLATE_ENABLED,
+    TABLE_TEMPLATE_PATH,
+)
+from records import OrderItem
+from table_template import TemplateExtractor, load_template, save_template
+
+# 解析器版本号：解析逻辑或输出字段变化时递增，使 parse_cache 中的旧结果失效
+PARSER_VERSION = 7
 
+# 明细表页面特征：表头关键字、客户料号或单位列（封面、条款页、签字页不含这些内容）
+# PCS 与 _parse_main_row 定位"单价/数量/单位"列的依据一致，覆盖无表头且料号非YY的续页
+_TABLE_PAGE_MARKERS = re.compile(r"项次|料件编号|YY\d+|(?i:PCS)")
 
-def parse_purchase_order(pdf_path):
+
+def parse_purchase_order(pdf_path, workers=None, stats=None, backend=None):
     """
     解析生久科技采购单PDF。
 
+    参数:
+        pdf_path: str - PDF文件路径
+        workers: int | None - 并行解析进程数（None 取 config.PDF_PARSE_WORKERS，
+                 0 表示按CPU核数自动选择，1 表示串行；pdfium 后端始终串行）
+        stats: dict | None - 若提供，填入解析统计 {pages, skipped_pages}
+        backend: str | None - 解析后端 "pdfplumber" / "pdfium"
+                 （None 取 config.PDF_PARSER_BACKEND；含旋转/裁剪页面的文档 pdfium 后端回退 pdfplumber）
+
     返回:
         header_info: dict - 采购单头部信息
-        items: list[dict] - 每行项目的字段字典
+        items: list[OrderItem] - 每行项目（可按字典方式访问）
     """
-    header_info = {}
-    items = []
+    if _use_pdfium(pdf_path, backend):
+        header_info = {}
+        items = list(_iter_items_pdfium(pdf_path, header_info, stats))
+        return header_info, items
+
+    import pdfplumber
 
     with pdfplumber.open(pdf_path) as pdf:
         first_page_text = pdf.pages[0].extract_text() or ""
         header_info = _extract_header(first_page_text)
+        page_count = len(pdf.pages)
+        page_indices = _triage_pages(pdf_path, page_count)
+        extractor = _create_extractor(header_info)
+
+        workers = _resolve_workers(workers, len(page_indices))
+        if workers <= 1:
+            pages = [pdf.pages[i] for i in page_indices]
+            page_results = list(_iter_page_results(pages, extractor))
+            learned = extractor.template if extractor and extractor.learned else None
+
+    if workers > 1:
+        template = extractor.template if extractor else None
+        page_results, learned = _parse_pages_parallel(
+            pdf_path, page_indices, workers, template
+        )
+
+    _save_learned_template(header_info, learned)
+    items = list(_iter_merged_items(page_results))
+
+    if stats is not None:
+        stats["pages"] = page_count
+        stats["skipped_pages"] = page_count - len(page_indices)
+    return header_info, items
 
-        for page in pdf.pages:
-            tables = page.extract_tables()
-            if not tables:
-                continue
-            for table in tables:
-                page_items = _parse_table(table)
-                items.extend(page_items)
 
-    return header_info, items
+def iter_purchase_order_items(pdf_path, header_info=None, backend=None):
+    """
+    流式解析采购单PDF，逐页产出项目（OrderItem）。
+
+    与 parse_purchase_order 结果一致，但不构建完整列表；
+    每页处理完立即释放 pdfplumber 的页面缓存，内存占用与页数无关。
+    可直接传给 code_mapper.iter_mapped_rows / apply_mapping。
+
+    参数:
+        pdf_path: str - PDF文件路径
+        header_info: dict | None - 若提供，在产出第一个项目前填入采购单头部信息
+        backend: str | None - 解析后端（同 parse_purchase_order）
+
+    产出:
+        OrderItem - 每行项目（可按字典方式访问，按项次顺序）
+    """
+    if _use_pdfium(pdf_path, backend):
+        yield from _iter_items_pdfium(pdf_path, header_info)
+        return
+
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path) as pdf:
+        first_page_text = pdf.pages[0].extract_text() or ""
+        header = _extract_header(first_page_text)
+        if header_info is not None:
+            header_info.update(header)
+
+        page_indices = _triage_pages(pdf_path, len(pdf.pages))
+        pages = (pdf.pages[i] for i in page_indices)
+
+        extractor = _create_extractor(header)
+        yield from _iter_merged_items(_iter_page_results(pages, extractor))
+        if extractor and extractor.learned:
+            _save_learned_template(header, extractor.template)
+
+
+def _use_pdfium(pdf_path, backend=None):
+    """选择 pdfium 后端且文档页面均未旋转/裁剪时走 pdfium，否则回退 pdfplumber"""
+    if (backend or PDF_PARSER_BACKEND) != "pdfium":
+        return False
+    import pdfium_backend
+
+    return pdfium_backend.is_plain_document(pdf_path)
+
+
+def _iter_items_pdfium(pdf_path, header_info=None, stats=None):
+    """
+    pypdfium2 后端: 逐页取纯文本用于页面分拣（头部信息按 pdfplumber 的文本规则由首页字符重建），
+    对候选页按表格线和字符坐标重建表格行，再走与 pdfplumber 相同的行解析逻辑。
+    """
+    import pdfium_backend
+
+    doc = pdfium_backend.open_document(pdf_path)
+    page_count = len(doc)
+    skipped = 0
+
+    def page_results():
+        nonlocal skipped
+        previous_kept = False
+        for i in range(page_count):
+            page = doc[i]
+            try:
+                text = pdfium_backend.page_text(page)
+                if i == 0 and header_info is not None:
+                    header_info.update(_extract_header(pdfium_backend.page_layout_text(page)))
+                if PDF_PAGE_TRIAGE_ENABLED and not _keep_page(text, page, previous_kept):
+                    skipped += 1
+                    previous_kept = False
+                    continue
+                previous_kept = True
+                tables = pdfium_backend.extract_page_tables(page)
+            finally:
+                page.close()
+            yield _parse_tables(tables)
+
+    try:
+        yield from _iter_merged_items(page_results())
+    finally:
+        doc.close()
+
+    if stats is not None:
+        stats["pages"] = page_count
+        stats["skipped_pages"] = skipped
+
+
+def _triage_pages(pdf_path, page_count):
+    """
+    页面分拣：用 pypdfium2 快速提取每页纯文本，只保留含明细表特征的页面
+    （以及紧跟在保留页之后、带表格的页面，见 _keep_page）。
+
+    pdfium 文本提取为C实现，每页仅需毫秒级；被跳过的页面不会进入
+    pdfplumber 的版面解析和表格检测。pypdfium2 不可用或打开失败时不分拣。
+
+    返回:
+        list[int] - 需要做表格提取的页码索引（0-based，升序）
+    """
+    all_pages = list(range(page_count))
+    if not PDF_PAGE_TRIAGE_ENABLED:
+        return all_pages
+
+    try:
+        import pypdfium2 as pdfium
+
+        doc = pdfium.PdfDocument(pdf_path)
+    except Exception:
+        return all_pages
+
+    candidates = []
+    try:
+        for i in range(len(doc)):
+            page = doc[i]
+            try:
+                textpage = page.get_textpage()
+                text = textpage.get_text_range()
+                textpage.close()
+                previous_kept = bool(candidates) and candidates[-1] == i - 1
+                if _keep_page(text, page, previous_kept):
+                    candidates.append(i)
+            finally:
+                page.close()
+    except Exception:
+        return all_pages
+    finally:
+        doc.close()
+    return candidates
+
+
+def _keep_page(text, page, previous_kept):
+    """
+    页面分拣规则: 含明细表特征的页面保留；紧跟在保留页之后、带表格线的页面也保留 ——
+    这类页面可能只有上一页最后一个项目的备注续行，不含任何特征文字，
+    跳过会丢失跨页续行（分拣结果须与不分拣时一致）。
+
+    参数:
+        text: str - 页面纯文本
+        page: pypdfium2.PdfPage - 页面（仅在需要时检查表格线）
+        previous_kept: bool - 上一页是否保留
+    """
+    if _TABLE_PAGE_MARKERS.search(text):
+        return True
+    if not previous_kept:
+        return False
+    import pdfium_backend
+
+    return pdfium_backend.has_table(page)
+
+
+def _resolve_workers(workers, page_count):
+    """确定实际使用的进程数（页数较少时进程启动开销大于收益，直接串行）"""
+    if workers is None:
+        workers = PDF_PARSE_WORKERS
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if page_count < PDF_PARALLEL_MIN_PAGES:
+        return 1
+    return max(1, min(workers, page_count))
+
+
+def _parse_pages_parallel(pdf_path, page_indices, workers, template=None):
+    """
+    多进程解析：将待解析页码按连续区间切分给各进程，结果按页码顺序返回。
+
+    每个进程独立打开PDF，只处理分配到的页区间；
+    跨页续行由 _iter_merged_items 在主进程中统一归位。
+    无列模板时各进程在自己的页区间内独立学习。
+
+    返回:
+        page_results: list - 每页的 (页首续行, 项目列表)
+        learned: dict | None - 某个进程新学习到的列模板
+    """
+    chunk = -(-len(page_indices) // workers)  # 向上取整
+    ranges = [
+        page_indices[start:start + chunk]
+        for start in range(0, len(page_indices), chunk)
+    ]
+
+    page_results = []
+    learned = None
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [
+            executor.submit(_parse_page_range, pdf_path, indices, template)
+            for indices in ranges
+        ]
+        # 按提交顺序收集，保证页码顺序
+        for future in futures:
+            results, range_learned = future.result()
+            page_results.extend(results)
+            learned = learned or range_learned
+    return page_results, learned
+
+
+def _parse_page_range(pdf_path, page_indices, template=None):
+    """
+    子进程入口: 解析指定页码（0-based）的页面。
+
+    返回:
+        results: list - 每页的 (页首续行, 项目列表)
+        learned: dict | None - 本进程新学习到的列模板
+    """
+    import pdfplumber
+
+    extractor = None
+    if PDF_TABLE_TEMPLATE_ENABLED:
+        extractor = TemplateExtractor(template, accept_table=_is_items_table)
+    with pdfplumber.open(pdf_path) as pdf:
+        pages = [pdf.pages[i] for i in page_indices]
+        results = list(_iter_page_results(pages, extractor))
+    learned = extractor.template if extractor and extractor.learned else None
+    return results, learned
+
+
+def _iter_page_results(pages, extractor=None):
+    """逐页解析，每页解析完即释放该页缓存的版面对象"""
+    for page in pages:
+        result = _parse_page(page, extractor)
+        page.close()
+        yield result
+
+
+def _parse_page(page, extractor=None):
+    """
+    解析单页中的所有表格（见 _parse_tables）。
+
+    提供 extractor 时按列模板快速提取，模板不适用时自动回退 extract_tables。
+
+    返回:
+        leading: list[list[str]] - 本页首个项目之前的续行（属于上一页最后一个项目）
+        items: list[OrderItem] - 本页解析出的项目
+    """
+    if extractor is not None:
+        tables = extractor.extract_tables(page)
+    else:
+        tables = page.extract_tables()
+    return _parse_tables(tables)
+
+
+def _parse_tables(tables):
+    """
+    逐个解析一页中的表格，合并结果。
+
+    明细表中首个项目之前的续行（如备注跨表、跨页）归属到前一个表格的最后一个项目，
+    本页尚无项目时交由调用方归属到上一页。其它表格（页眉信息框、条款、签字栏等）
+    首个项目之前的行直接丢弃，不会被当作备注补充到上一个项目。
+
+    返回:
+        leading: list[list[str]] - 本页首个项目之前的续行
+        items: list[OrderItem] - 本页解析出的项目
+    """
+    leading = []
+    items = []
+    for table in tables:
+        table_leading, table_items = _parse_rows(table)
+        if table_leading and _is_items_table(table):
+            if items:
+                for cells in table_leading:
+                    _parse_continuation(items[-1], cells)
+            else:
+                leading.extend(table_leading)
+        items.extend(table_items)
+    return leading, items
+
+
+def _create_extractor(header_info):
+    """按供应商加载已缓存的列模板，创建表格提取器（未启用模板时返回 None）"""
+    if not PDF_TABLE_TEMPLATE_ENABLED:
+        return None
+    template = load_template(TABLE_TEMPLATE_PATH, _template_key(header_info))
+    return TemplateExtractor(template, accept_table=_is_items_table)
+
+
+def _save_learned_template(header_info, template):
+    """持久化新学习到的列模板，下次同一供应商的采购单首页即可走快速路径"""
+    if template:
+        save_template(TABLE_TEMPLATE_PATH, _template_key(header_info), template)
+
+
+def _template_key(header_info):
+    """列模板按供应商区分"""
+    return header_info.get("供应商") or "_default"
+
+
+def _is_items_table(rows):
+    """判断表格是否为订单明细表（含明细表头行）"""
+    for row in rows:
+        cells = [str(c).strip() if c else "" for c in row]
+        if _is_header_row(cells):
+            return True
+    return False
+
+
+def _iter_merged_items(page_results):
+    """
+    按页码顺序合并各页结果，逐条产出项目。
+
+    页首续行（如备注跨页）补充到上一页的最后一个项目，
+    保证与整份文档连续解析时项次归属一致。
+    每页最后一个项目要等下一页的页首续行处理完才产出。
+    """
+    pending = None
+    for leading, page_items in page_results:
+        if pending is not None:
+            for cells in leading:
+                _parse_continuation(pending, cells)
+        if page_items:
+            if pending is not None:
+                yield pending
+            yield from page_items[:-1]
+            pending = page_items[-1]
+    if pending is not None:
+        yield pending
 
 
 def _extract_header(text):
@@ -55,12 +416,19 @@ def _extract_header(text):
     return header
 
 
-def _parse_table(table):
-    """解析一个PDF表格，提取所有订单项目"""
+def _parse_rows(rows):
+    """
+    解析一个表格的行序列。
+
+    返回:
+        leading: list[list[str]] - 第一个项目之前出现的续行（清洗后的单元格）
+        items: list[OrderItem] - 解析出的项目
+    """
+    leading = []
     items = []
     current_item = None
 
-    for row in table:
+    for row in rows:
         if not row or len(row) < 4:
             continue
 
@@ -82,14 +450,18 @@ def _parse_table(table):
             if current_item:
                 items.append(current_item)
             current_item = _parse_main_row(cells)
-        elif current_item and cells[1]:
-            # 续行 - 补充备注
-            _parse_continuation(current_item, cells)
+        elif cells[1]:
+            if current_item:
+                # 续行 - 补充备注
+                _parse_continuation(current_item, cells)
+            else:
+                # 尚未出现项目的续行，交由调用方归属到上一页的项目
+                leading.append(cells)
 
     if current_item:
         items.append(current_item)
 
-    return items
+    return leading, items
 
 
 def _is_header_row(cells):
@@ -105,21 +477,7 @@ def _parse_main_row(cells):
     6列结构: [项次, "YY编号 规格\n品名\n图号", 空, "单价\n数量\n单位", "金额\n日期\n税率", 交期]
     7列结构: [项次, "YY编号 规格\n品名\n图号", 空, 空, "单价\n数量\n单位", "金额\n日期\n税率", 交期]
     """
-    item = {
-        "项次": cells[0],
-        "料件编号": "",
-        "品名": "",
-        "图号": "",
-        "规格": "",
-        "单价": "",
-        "采购数量": "",
-        "采购单位": "",
-        "含税金额": "",
-        "出货日期": "",
-        "税率": "",
-        "备注": "",
-        "交期回复": "",
-    }
+    item = OrderItem(cells[0], "", "", "", "", "", "", "", "", "", "", "", "")
 
     # ===== 解析列2: "YY编号 规格\n品名\n图号" =====
     col1 = cells[1] if len(cells) > 1 else ""
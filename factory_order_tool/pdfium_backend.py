@@ -0,0 +1,264 @@
+"""pypdfium2 解析后端 - 用 pdfium（C实现）的文本框和线段坐标重建采购单表格
+
+pdfplumber 基于纯Python的 pdfminer 做版面分析，长采购单大部分时间耗在这里。
+本后端直接读取 pdfium 的字符坐标和路径对象（表格线），
+按表格线的连通关系找出表格、再复用 table_template.build_grid_rows 切分单元格，
+输出与 Table.extract() 相同格式的行，交给 pdf_parser._parse_tables 解析。
+
+运行时不导入 pdfplumber。与 pdfplumber 路径的一致性用 benchmark.py parity 校验。
+
+坐标统一换算为 pdfplumber 约定: x0/x1 为左右，top/bottom 为距页面顶部的距离。
+换算只覆盖未旋转、裁剪框与媒体框相同的页面；含其它页面的文档由调用方改走 pdfplumber（见 is_plain_document）。
+"""
+import ctypes
+
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+
+from table_template import (
+    EDGE_TOLERANCE,
+    TEXT_SETTINGS,
+    build_grid_rows,
+    cluster_coords,
+)
+
+
+def open_document(pdf_path):
+    """打开PDF文档（调用方负责 close）"""
+    return pdfium.PdfDocument(pdf_path)
+
+
+def is_plain_document(pdf_path):
+    """
+    文档的所有页面是否都未旋转（/Rotate 为0）且裁剪框与媒体框相同。
+
+    旋转或裁剪后 pdfplumber 的坐标原点和可见区域随之变化，本后端不做对应换算，
+    这类文档应交给 pdfplumber 解析，保证两个后端结果一致。
+    """
+    doc = open_document(pdf_path)
+    try:
+        for i in range(len(doc)):
+            page = doc[i]
+            try:
+                if page.get_rotation() % 360:
+                    return False
+                cropbox = page.get_cropbox()
+                mediabox = page.get_mediabox()
+                if any(abs(a - b) > 0.01 for a, b in zip(cropbox, mediabox)):
+                    return False
+            finally:
+                page.close()
+    finally:
+        doc.close()
+    return True
+
+
+def page_text(page):
+    """提取整页纯文本（统一换行符为 \\n）"""
+    textpage = page.get_textpage()
+    try:
+        return textpage.get_text_range().replace("\r\n", "\n").replace("\r", "\n")
+    finally:
+        textpage.close()
+
+
+def page_layout_text(page):
+    """
+    按 pdfplumber extract_text 的规则（_chars_to_text）由字符坐标重建整页文本。
+
+    page_text 保留 pdfium 原样的行尾空格等，用于页面分拣足够；
+    头部信息（供应商决定列模板，采购单号决定输出文件名）须由此提取，与 pdfplumber 后端一致。
+    """
+    return _chars_to_text(_extract_chars(page, page.get_height()))
+
+
+def extract_page_tables(page):
+    """
+    提取页面中的所有表格（按从上到下顺序）。
+
+    返回:
+        list[list[list[str | None]]] - 每个表格的行列表，与 pdfplumber Table.extract() 格式相同
+    """
+    height = page.get_height()
+    chars = _extract_chars(page, height)
+    horizontals, verticals = _extract_edges(page, height)
+
+    tables = []
+    for h_edges, v_edges in _group_tables(horizontals, verticals):
+        x_edges = cluster_coords([e["x0"] for e in v_edges])
+        if len(x_edges) < 2:
+            continue
+        table_rows = build_grid_rows(
+            chars, h_edges, v_edges, x_edges, _chars_to_text
+        )
+        if table_rows:
+            tables.append(table_rows)
+    return tables
+
+
+def has_table(page):
+    """页面是否含有带边框的表格（至少一组相交的横线和竖线）"""
+    horizontals, verticals = _extract_edges(page, page.get_height())
+    return bool(_group_tables(horizontals, verticals))
+
+
+# ========== 字符 ==========
+
+def _extract_chars(page, height):
+    """读取页面全部字符及其坐标（跳过 pdfium 自动生成的空格/换行）"""
+    textpage = page.get_textpage()
+    chars = []
+    try:
+        for i in range(textpage.count_chars()):
+            if pdfium_c.FPDFText_IsGenerated(textpage.raw, i) == 1:
+                continue
+            code = pdfium_c.FPDFText_GetUnicode(textpage.raw, i)
+            if code in (0, 0x0D, 0x0A):
+                continue
+            left, bottom, right, top = textpage.get_charbox(i, loose=True)
+            chars.append({
+                "text": chr(code),
+                "x0": left,
+                "x1": right,
+                "top": height - top,
+                "bottom": height - bottom,
+            })
+    finally:
+        textpage.close()
+    return chars
+
+
+def _chars_to_text(chars):
+    """
+    单元格字符 → 文本，规则与 pdfplumber extract_text 一致:
+    按 top 聚成行（容差3），行内按x排序，间距超过3或遇空格处断词，
+    词间以空格连接，行间以换行连接。
+    """
+    x_tol = TEXT_SETTINGS["x_tolerance"]
+    y_tol = TEXT_SETTINGS["y_tolerance"]
+
+    lines = []
+    for char in sorted(chars, key=lambda c: c["top"]):
+        if lines and char["top"] - lines[-1][-1]["top"] <= y_tol:
+            lines[-1].append(char)
+        else:
+            lines.append([char])
+
+    text_lines = []
+    for line in lines:
+        words = []
+        current = ""
+        prev_x1 = None
+        for char in sorted(line, key=lambda c: c["x0"]):
+            if char["text"].isspace():
+                if current:
+                    words.append(current)
+                current = ""
+                prev_x1 = None
+                continue
+            if prev_x1 is not None and char["x0"] > prev_x1 + x_tol and current:
+                words.append(current)
+                current = ""
+            current += char["text"]
+            prev_x1 = char["x1"]
+        if current:
+            words.append(current)
+        text_lines.append(" ".join(words))
+    return "\n".join(text_lines)
+
+
+# ========== 表格线 ==========
+
+def _extract_edges(page, height):
+    """
+    从路径对象中提取水平/竖直线段（含矩形的四条边）。
+
+    返回:
+        horizontals: list[dict] - {x0, x1, top, bottom}
+        verticals: list[dict] - {x0, x1, top, bottom}
+    """
+    horizontals = []
+    verticals = []
+    for obj in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_PATH]):
+        for (x0, y0), (x1, y1) in _path_segments(obj.raw):
+            if abs(y0 - y1) < 1 and abs(x1 - x0) >= EDGE_TOLERANCE:
+                top = height - y0
+                horizontals.append({
+                    "x0": min(x0, x1), "x1": max(x0, x1), "top": top, "bottom": top,
+                })
+            elif abs(x0 - x1) < 1 and abs(y1 - y0) >= EDGE_TOLERANCE:
+                verticals.append({
+                    "x0": x0, "x1": x0,
+                    "top": height - max(y0, y1), "bottom": height - min(y0, y1),
+                })
+    return horizontals, verticals
+
+
+def _path_segments(raw_obj):
+    """遍历路径对象中的直线段，返回页面坐标下的 ((x0, y0), (x1, y1)) 列表"""
+    matrix = pdfium_c.FS_MATRIX()
+    if not pdfium_c.FPDFPageObj_GetMatrix(raw_obj, matrix):
+        return []
+    a, b, c, d, e, f = matrix.a, matrix.b, matrix.c, matrix.d, matrix.e, matrix.f
+
+    def transform(x, y):
+        return a * x + c * y + e, b * x + d * y + f
+
+    segments = []
+    start = prev = None
+    x, y = ctypes.c_float(), ctypes.c_float()
+    for i in range(pdfium_c.FPDFPath_CountSegments(raw_obj)):
+        seg = pdfium_c.FPDFPath_GetPathSegment(raw_obj, i)
+        if not pdfium_c.FPDFPathSegment_GetPoint(seg, x, y):
+            continue
+        point = transform(x.value, y.value)
+        seg_type = pdfium_c.FPDFPathSegment_GetType(seg)
+        if seg_type == pdfium_c.FPDF_SEGMENT_MOVETO:
+            start = point
+        elif seg_type == pdfium_c.FPDF_SEGMENT_LINETO and prev is not None:
+            segments.append((prev, point))
+        prev = point
+        if pdfium_c.FPDFPathSegment_GetClose(seg) and start is not None:
+            segments.append((point, start))
+            prev = start
+    return segments
+
+
+def _group_tables(horizontals, verticals):
+    """
+    按线段相交关系把表格线分组，每组即一个表格（按从上到下排序）。
+
+    返回:
+        list[(h_edges, v_edges)]
+    """
+    edges = horizontals + verticals
+    n_h = len(horizontals)
+    parent = list(range(len(edges)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    tol = EDGE_TOLERANCE
+    for hi, h in enumerate(horizontals):
+        for vi, v in enumerate(verticals, start=n_h):
+            if (h["x0"] - tol <= v["x0"] <= h["x1"] + tol
+                    and v["top"] - tol <= h["top"] <= v["bottom"] + tol):
+                parent[find(hi)] = find(vi)
+
+    groups = {}
+    for i in range(len(edges)):
+        groups.setdefault(find(i), []).append(i)
+
+    tables = []
+    for members in groups.values():
+        h_edges = [edges[i] for i in members if i < n_h]
+        v_edges = [edges[i] for i in members if i >= n_h]
+        if len(h_edges) >= 2 and len(v_edges) >= 2:
+            top = min(e["top"] for e in v_edges)
+            left = min(e["x0"] for e in v_edges)
+            tables.append((top, left, h_edges, v_edges))
+    tables.sort(key=lambda t: (t[0], t[1]))
+    return [(h_edges, v_edges) for _, _, h_edges, v_edges in tables]
@@ -0,0 +1,149 @@
+"""记录类型模块 - 订单项目、输出行、图纸比对结果的紧凑表示
+
+大批量订单时每行一个字典开销明显（13~28个键的字典每行约0.7~1.5KB）。
+这里的记录类使用 __slots__ 按固定字段顺序存值，不带每实例的 __dict__，
+每行内存降至约1/4~1/5；同时保留字典兼容的访问方式
+（row["产品编号"] / row.get(...) / "键" in row / keys / items / values / 遍历），
+界面、导出、图纸比对等使用方无需修改。
+
+与字典的区别:
+  - 字段固定: 读取未定义的字段返回 get 的默认值或抛出 KeyError，不能新增字段
+  - JSON 序列化前需调用 to_dict()
+"""
+from collections.abc import Mapping
+
+
+class Record:
+    """
+    固定字段记录基类。子类定义 FIELDS（字段名元组，顺序即输出顺序）并设 __slots__ = FIELDS。
+
+    构造:
+        Record(值1, 值2, ...)  - 按 FIELDS 顺序传入全部字段值（也可按字段名传参）
+        Record.from_dict(d)    - 从字典构造，缺失字段取空字符串
+    """
+
+    __slots__ = ()
+    FIELDS = ()
+    _FIELD_SET = frozenset()
+
+    def __init__(self, *args, **kwargs):
+        fields = self.FIELDS
+        if len(args) > len(fields):
+            raise TypeError(
+                f"{type(self).__name__} 最多 {len(fields)} 个字段值，传入了 {len(args)} 个"
+            )
+        for name, value in zip(fields, args):
+            setattr(self, name, value)
+        for name, value in kwargs.items():
+            if name not in self._FIELD_SET:
+                raise TypeError(f"{type(self).__name__} 没有字段 {name!r}")
+            if name in fields[:len(args)]:
+                raise TypeError(f"{type(self).__name__} 字段 {name!r} 重复传值")
+            setattr(self, name, value)
+        missing = [name for name in fields[len(args):] if name not in kwargs]
+        if missing:
+            raise TypeError(f"{type(self).__name__} 缺少字段: {', '.join(missing)}")
+
+    @classmethod
+    def from_dict(cls, data):
+        """从字典（如解析缓存/JSON）构造记录，多余的键忽略"""
+        return cls(*(data.get(name, "") for name in cls.FIELDS))
+
+    def to_dict(self):
+        """转为普通字典（用于 JSON 序列化）"""
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    # ===== 字典兼容接口 =====
+
+    def __getitem__(self, key):
+        if key not in self._FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self._FIELD_SET:
+            raise KeyError(key)
+        object.__setattr__(self, key, value)
+
+    def get(self, key, default=None):
+        if key not in self._FIELD_SET:
+            return default
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self._FIELD_SET
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def keys(self):
+        return self.FIELDS
+
+    def values(self):
+        return [getattr(self, name) for name in self.FIELDS]
+
+    def items(self):
+        return [(name, getattr(self, name)) for name in self.FIELDS]
+
+    def __eq__(self, other):
+        if type(other) is type(self):
+            return self.values() == other.values()
+        if isinstance(other, (Record, Mapping)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None  # 字段可修改，与字典一样不可哈希
+
+    def __reduce__(self):
+        # 跨进程传递（并行解析）时只传字段值
+        return type(self), tuple(self.values())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+
+
+Mapping.register(Record)
+
+
+class OrderItem(Record):
+    """PDF解析出的一个订单项目（pdf_parser._parse_main_row）"""
+
+    FIELDS = (
+        "项次", "料件编号", "品名", "图号", "规格", "单价", "采购数量",
+        "采购单位", "含税金额", "出货日期", "税率", "备注", "交期回复",
+    )
+    __slots__ = FIELDS
+
+
+class OutputRow(Record):
+    """映射后的输出行（code_mapper.MappedColumns.iter_rows）；以下划线开头的为内部字段，不写入导出Excel"""
+
+    FIELDS = (
+        # ===== 5个必填字段 =====
+        "产品编号", "产品规格", "数量", "计划开始时间", "工单分类",
+        # ===== 其余列 =====
+        "产品名称", "计划结束时间", "工艺路线名称", "工序列表", "备注", "更新",
+        "供应商", "供应商名称", "供应商联系人", "供应商联系电话", "收货地址",
+        "采购单价", "客户选择", "关联产品",
+        # ===== 内部字段（预览/比对用）=====
+        "_映射状态", "_匹配方式", "_产品名称", "_品名", "_图号", "_规格",
+        "_交期回复", "_项次",
+    )
+    __slots__ = FIELDS
+
+
+class DrawingResult(Record):
+    """一个YY编号的图纸比对结果（drawing_checker.check_drawings）"""
+
+    FIELDS = (
+        "yy_code", "order_version", "local_version", "drawing_path",
+        "status", "message", "suggested_name",
+    )
+    __slots__ = FIELDS
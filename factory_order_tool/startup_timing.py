@@ -0,0 +1,74 @@
+"""启动计时模块 - 记录延迟导入的各模块耗时和启动各阶段时间点
+
+主界面在创建窗口前只导入 tkinter 等轻量模块；
+pdfplumber/openpyxl 相关模块通过 lazy_import() 在首次使用时导入并计时。
+
+查看方式:
+  - 「关于」对话框中的启动耗时一节
+  - 设置环境变量 FACTORY_TOOL_STARTUP_TIMING=1 启动，
+    启动完成（映射表加载完毕）后把报告输出到 stderr，
+    打包的窗口程序没有控制台时写入程序目录下 startup_timing.txt
+"""
+import importlib
+import os
+import sys
+import time
+
+STARTUP_TIMING_ENV = "FACTORY_TOOL_STARTUP_TIMING"
+STARTUP_TIMING_FILE = "startup_timing.txt"
+
+# 计时起点: 本模块由 main.py 最先导入（PyInstaller 解压/解释器启动时间不在其内）
+_T0 = time.perf_counter()
+
+_marks = {}         # 阶段名 → 距起点秒数（按记录顺序）
+_import_times = {}  # 模块名 → 导入耗时秒数（按导入顺序）
+_reported = False
+
+
+def lazy_import(name):
+    """导入模块并记录首次导入耗时（已导入则直接返回）"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    _import_times.setdefault(name, time.perf_counter() - start)
+    return module
+
+
+def mark(label):
+    """记录启动阶段时间点（同名阶段只记录第一次）"""
+    _marks.setdefault(label, time.perf_counter() - _T0)
+
+
+def format_report():
+    """生成启动耗时报告文本"""
+    lines = ["启动阶段（距启动）:"]
+    for label, seconds in _marks.items():
+        lines.append(f"  {label}: {seconds:.2f}s")
+    lines.append("模块导入耗时:")
+    if _import_times:
+        for name, seconds in _import_times.items():
+            lines.append(f"  {name}: {seconds:.2f}s")
+    else:
+        lines.append("  （尚未导入）")
+    return "\n".join(lines)
+
+
+def report_if_enabled(app_dir):
+    """环境变量开启时输出一次启动报告（输出失败不影响程序运行）"""
+    global _reported
+    if _reported or not os.environ.get(STARTUP_TIMING_ENV):
+        return
+    _reported = True
+    report = format_report()
+    try:
+        if sys.stderr is not None:
+            print(report, file=sys.stderr)
+        else:
+            with open(
+                os.path.join(app_dir, STARTUP_TIMING_FILE), "w", encoding="utf-8"
+            ) as f:
+                f.write(report + "\n")
+    except OSError:
+        pass
@@ -0,0 +1,272 @@
+"""采购单表格列模板模块 - 几何引导的快速表格提取
+
+同一客户的采购单每页表格版面完全一致（列数、列边界x坐标固定），
+而 pdfplumber 的 extract_tables() 每页都要做完整的线段合并、交点检测和单元格构建。
+
+思路:
+  1. 首次遇到订单明细表时，从 pdfplumber 检测出的表格中学习列模板（列边界x坐标）
+  2. 后续页面直接用模板: 竖线按列边界归类、横线确定行边界，字符按中点落入单元格
+  3. 本页版面与模板不符（出现新列线、缺少列边界）时返回 None，由调用方回退 extract_tables
+  4. 模板按供应商持久化到程序目录，下次打开同类采购单第一页即可走快速路径
+
+输出格式与 Table.extract() 一致: list[list[str | None]]，合并单元格覆盖的列为 None
+"""
+import bisect
+import json
+import os
+
+from file_lock import file_lock
+
+# 与 pdfplumber 默认表格设置一致（snap/join/intersection 容差均为3）
+EDGE_TOLERANCE = 3
+TEXT_SETTINGS = {"x_tolerance": 3, "y_tolerance": 3}
+
+
+class TemplateExtractor:
+    """
+    按页提取表格行：有模板时走快速路径，不适用时回退整页表格检测并尝试学习模板。
+
+    参数:
+        template: dict | None - 已有列模板（如按供应商缓存的模板）
+        accept_table: callable | None - 判断检测出的表格是否为订单明细表，
+                      只从明细表学习模板（避免学到封面信息框等其他表格）
+    """
+
+    def __init__(self, template=None, accept_table=None):
+        self.template = template
+        self.accept_table = accept_table
+        self.learned = False      # 本次是否学习到了新模板（调用方据此决定是否持久化）
+        self.fast_pages = 0       # 走快速路径的页数
+        self.fallback_pages = 0   # 回退 extract_tables 的页数
+
+    def extract_tables(self, page):
+        """
+        提取本页所有表格（按从上到下顺序）。
+
+        返回:
+            list[list[list[str | None]]] - 每个表格的行列表；快速路径下模板区域整体为一个表格
+        """
+        if self.template:
+            rows = extract_rows(page, self.template)
+            if rows is not None:
+                self.fast_pages += 1
+                return [rows]
+
+        self.fallback_pages += 1
+        tables = []
+        for table in page.find_tables():
+            table_rows = table.extract(**TEXT_SETTINGS)
+            tables.append(table_rows)
+            self._try_learn(page, table, table_rows)
+        return tables
+
+    def _try_learn(self, page, table, table_rows):
+        """从明细表学习模板，并用本页自检：模板提取结果须与 Table.extract() 完全一致"""
+        if self.accept_table and not self.accept_table(table_rows):
+            return
+        candidate = learn_template(table)
+        if candidate == self.template:
+            return
+        if extract_rows(page, candidate, bbox=table.bbox) == table_rows:
+            self.template = candidate
+            self.learned = True
+
+
+def learn_template(table):
+    """
+    从 pdfplumber 检测出的表格学习列模板。
+
+    参数:
+        table: pdfplumber.table.Table
+
+    返回:
+        dict - {"x_edges": [列边界x坐标, 从左到右]}
+    """
+    xs = []
+    for cell in table.cells:
+        xs.extend((cell[0], cell[2]))
+    return {"x_edges": cluster_coords(xs)}
+
+
+def extract_rows(page, template, bbox=None):
+    """
+    按列模板从页面提取表格行。
+
+    参数:
+        page: pdfplumber.page.Page
+        template: dict - learn_template() 返回的列模板
+        bbox: tuple | None - 仅提取该区域内的行（学习模板时自检用）
+
+    返回:
+        list[list[str | None]] - 与 Table.extract() 相同格式的行列表
+        None - 模板与本页版面不符，调用方应回退到 extract_tables
+    """
+    from pdfplumber.utils import extract_text
+
+    return build_grid_rows(
+        page.chars,
+        page.horizontal_edges,
+        page.vertical_edges,
+        template["x_edges"],
+        lambda chars: extract_text(chars, **TEXT_SETTINGS),
+        bbox=bbox,
+    )
+
+
+def build_grid_rows(chars, horizontal_edges, vertical_edges, x_edges, to_text,
+                    bbox=None):
+    """
+    按列边界把字符切分到表格单元格（纯几何计算，不依赖具体PDF库）。
+
+    坐标约定与 pdfplumber 一致: x0/x1 为左右，top/bottom 为距页面顶部的距离。
+
+    参数:
+        chars: list[dict] - 字符 {text, x0, x1, top, bottom}
+        horizontal_edges: list[dict] - 横线 {x0, x1, top}
+        vertical_edges: list[dict] - 竖线 {x0, top, bottom}
+        x_edges: list[float] - 列边界x坐标（升序）
+        to_text: callable - 单元格内字符列表 → 文本
+        bbox: tuple | None - 仅提取该区域内的行
+
+    返回:
+        list[list[str | None]] | None - 同 extract_rows
+    """
+    left, right = x_edges[0], x_edges[-1]
+    tol = EDGE_TOLERANCE
+
+    # ===== 1. 竖线归类到模板列边界 =====
+    candidates = [
+        e for e in vertical_edges
+        if left - tol <= e["x0"] <= right + tol and e["bottom"] - e["top"] >= tol
+    ]
+    verticals = [[] for _ in x_edges]
+    strays = []
+    for e in candidates:
+        i = _nearest(x_edges, e["x0"])
+        if abs(x_edges[i] - e["x0"]) <= tol:
+            verticals[i].append((e["top"], e["bottom"]))
+        else:
+            strays.append(e)
+
+    # 左右边框缺失 → 本页没有此版面的表格
+    if not verticals[0] or not verticals[-1]:
+        return None
+
+    body_top = min(top for top, _ in verticals[0] + verticals[-1])
+    body_bottom = max(bottom for _, bottom in verticals[0] + verticals[-1])
+
+    # 表格区域内出现模板之外的列线 → 版面变化
+    for e in strays:
+        if e["bottom"] > body_top + tol and e["top"] < body_bottom - tol:
+            return None
+
+    # ===== 2. 横线确定行边界 =====
+    row_ys = cluster_coords([
+        e["top"] for e in horizontal_edges
+        if e["x1"] >= left - tol and e["x0"] <= right + tol
+        and body_top - tol <= e["top"] <= body_bottom + tol
+    ])
+    if bbox:
+        row_ys = [y for y in row_ys if bbox[1] - tol <= y <= bbox[3] + tol]
+
+    # ===== 3. 逐行确定实际存在的列线（缺失即合并单元格）=====
+    grid = []  # [(行顶, 行底, [本行实际存在的列线索引...])]
+    for y0, y1 in zip(row_ys, row_ys[1:]):
+        if y1 - y0 <= tol:
+            continue
+        present = [
+            i for i, segs in enumerate(verticals)
+            if any(top <= y0 + tol and bottom >= y1 - tol for top, bottom in segs)
+        ]
+        # 左右边框都不覆盖的区间是两个表格之间的空白
+        if not present or present[0] != 0 or present[-1] != len(x_edges) - 1:
+            continue
+        grid.append((y0, y1, present))
+
+    if not grid:
+        return None
+
+    # ===== 4. 字符按中点落入单元格 =====
+    row_tops = [g[0] for g in grid]
+    cell_chars = [[[] for _ in g[2][:-1]] for g in grid]
+    for char in chars:
+        h_mid = (char["x0"] + char["x1"]) / 2
+        v_mid = (char["top"] + char["bottom"]) / 2
+        r = bisect.bisect_right(row_tops, v_mid) - 1
+        if r < 0 or v_mid >= grid[r][1]:
+            continue
+        present = grid[r][2]
+        edges = [x_edges[i] for i in present]
+        if h_mid < edges[0] or h_mid >= edges[-1]:
+            continue
+        c = bisect.bisect_right(edges, h_mid) - 1
+        cell_chars[r][c].append(char)
+
+    rows = []
+    for (_, _, present), chars_by_cell in zip(grid, cell_chars):
+        row = [None] * (len(x_edges) - 1)
+        for c, col in enumerate(present[:-1]):
+            in_cell = chars_by_cell[c]
+            row[col] = to_text(in_cell) if in_cell else ""
+        rows.append(row)
+    return rows
+
+
+# ========== 模板持久化 ==========
+
+def load_template(path, key):
+    """读取按 key（供应商）缓存的列模板，不存在或读取失败返回 None"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get(key)
+    except (OSError, ValueError):
+        return None
+
+
+def save_template(path, key, template):
+    """
+    保存列模板（写入失败不影响解析）。
+
+    批量转换的多个进程、界面和命令行可能同时保存不同供应商的模板:
+    读取-更新-写入全程持有文件锁（避免互相覆盖），先写临时文件再替换（中途崩溃不会留下残缺的JSON）。
+    """
+    tmp_path = path + ".tmp"
+    try:
+        with file_lock(path + ".lock"):
+            data = {}
+            if os.path.exists(path):
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    data = {}
+            data[key] = template
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def cluster_coords(values, tol=EDGE_TOLERANCE):
+    """将相近的坐标合并为一个（取首个值），返回升序列表"""
+    result = []
+    for v in sorted(values):
+        if not result or v - result[-1] > tol:
+            result.append(round(v, 2))
+    return result
+
+
+def _nearest(sorted_values, x):
+    """返回 sorted_values 中与 x 最接近的元素索引"""
+    i = bisect.bisect_left(sorted_values, x)
+    if i == 0:
+        return 0
+    if i == len(sorted_values):
+        return i - 1
+    return i if sorted_values[i] - x < x - sorted_values[i - 1] else i - 1
@@ -0,0 +1,582 @@
+"""xlsx 流式读取模块 - 直接从 xlsx 压缩包中流式解析工作表XML，只取指定列
+
+openpyxl 即使在 read_only 模式下也会为每个单元格构造对象、处理样式，
+而映射表只需要表头行之后的 B/C/D 三列。本模块:
+  1. 一次性读取共享字符串表
+  2. 用 iterparse 逐行流式解析每个 sheet 的XML，行处理完即释放
+  3. 只解析需要的列，其余单元格只看列号（用于行宽判断）
+
+读取结果与 openpyxl load_workbook(read_only=True) + iter_rows(values_only=True) 完全一致，
+包括: 按 <dimension> 截断行列、缺失行、行宽（决定 len(row)）、数值 int/float 转换、
+布尔值、错误值、公式（非 data_only 模式下值为 "=公式"）。
+
+遇到无法保证一致的情况（所需列中的日期格式数值、共享公式的从属单元格、数组公式、
+非标准命名空间、文件结构异常等）抛出 UnsupportedXlsxError，调用方应回退到 openpyxl。
+"""
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+_NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+_TAG_ROW = f"{{{_NS_MAIN}}}row"
+_TAG_CELL = f"{{{_NS_MAIN}}}c"
+_TAG_VALUE = f"{{{_NS_MAIN}}}v"
+_TAG_FORMULA = f"{{{_NS_MAIN}}}f"
+_TAG_INLINE = f"{{{_NS_MAIN}}}is"
+_TAG_TEXT = f"{{{_NS_MAIN}}}t"
+_TAG_RUN = f"{{{_NS_MAIN}}}r"
+_TAG_SI = f"{{{_NS_MAIN}}}si"
+_TAG_DIMENSION = f"{{{_NS_MAIN}}}dimension"
+_TAG_SHEET_DATA = f"{{{_NS_MAIN}}}sheetData"
+
+# 确定不是日期的内置数字格式（其余内置格式及含日期字母的自定义格式视为可能是日期）
+_NON_DATE_BUILTIN_FORMATS = set(range(0, 14)) | set(range(37, 45)) | {48, 49}
+_DATE_LETTERS = re.compile(r"[dmyhsDMYHS]")
+
+_CHUNK_SIZE = 1024 * 1024
+
+_COORD_RE = re.compile(r"^\$?([A-Za-z]{1,3})\$?(\d+)$")
+_RANGE_PART_RE = re.compile(r"^\$?([A-Z]+)?\$?(\d+)?$")
+
+
+class UnsupportedXlsxError(Exception):
+    """本读取器无法保证与 openpyxl 结果一致，调用方应回退 openpyxl"""
+
+
+def read_workbook_parts(path):
+    """
+    读取工作簿结构（不解析工作表内容），用于判断各 sheet 是否变化。
+
+    返回:
+        dict:
+            sheets: list[(sheet名, 工作表XML路径)] - 按工作簿中的顺序
+            sst_path: str | None - 共享字符串表路径
+            styles_path: str | None - 样式表路径
+            crc: dict - 压缩包内各文件的 CRC32（取自压缩包目录，无需解压）
+
+    异常:
+        UnsupportedXlsxError - 需回退 openpyxl
+    """
+    with _open_archive(path) as archive:
+        try:
+            sheets, sst_path, styles_path = _read_workbook(archive)
+        except (KeyError, IndexError, ET.ParseError, ValueError) as e:
+            raise UnsupportedXlsxError(str(e)) from e
+        crc = {info.filename: info.CRC for info in archive.infolist()}
+    return {
+        "sheets": sheets,
+        "sst_path": sst_path,
+        "styles_path": styles_path,
+        "crc": crc,
+    }
+
+
+def load_shared_strings(path):
+    """读取共享字符串表（list[str]）"""
+    with _open_archive(path) as archive:
+        try:
+            _, sst_path, _ = _read_workbook(archive)
+            return _read_shared_strings(archive, sst_path)
+        except (KeyError, IndexError, ET.ParseError, ValueError) as e:
+            raise UnsupportedXlsxError(str(e)) from e
+
+
+def iter_sheet_columns(path, columns, header_marker, sheet_names=None,
+                       shared_strings=None, sst_usage=None):
+    """
+    逐 sheet 流式读取表头行之后的指定列。
+
+    表头行: 第一个存在单元格文本包含 header_marker 的行（之前的行全部跳过）。
+    数据行: 仅产出 openpyxl 行元组长度 > max(columns) 的行（与按下标取值前的长度检查一致）；
+            文件中缺失的行（openpyxl 以全 None 行补齐）不产出。
+
+    参数:
+        path: str - xlsx 路径
+        columns: tuple[int] - 需要的列（0起始下标，如 B 列为 1）
+        header_marker: str - 表头行标记文本（如 "久益料号"）
+        sheet_names: Iterable[str] | None - 只读取这些 sheet（None 读取全部）
+        shared_strings: list[str] | None - 已读取的共享字符串表（None 则从文件读取）
+        sst_usage: dict | None - 若提供，填入 {sheet名: 本sheet结果用到的最大共享字符串下标}
+                   （-1 表示未用到），据此判断共享字符串表变化是否影响该 sheet
+
+    产出:
+        (sheet_name, values) - values 为对应列的单元格值元组（None/str/int/float/bool）
+
+    异常:
+        UnsupportedXlsxError - 需回退 openpyxl
+    """
+    wanted = set(sheet_names) if sheet_names is not None else None
+    with _open_archive(path) as archive:
+        try:
+            sheets, sst_path, styles_path = _read_workbook(archive)
+            if shared_strings is None:
+                shared_strings = _read_shared_strings(archive, sst_path)
+            date_styles = _read_date_styles(archive, styles_path)
+        except (KeyError, IndexError, ET.ParseError, ValueError) as e:
+            raise UnsupportedXlsxError(str(e)) from e
+
+        for sheet_name, sheet_path in sheets:
+            if wanted is not None and sheet_name not in wanted:
+                continue
+            usage = [-1]
+            try:
+                dimension = _read_dimension(archive, sheet_path)
+                for values in _iter_sheet(
+                    archive, sheet_path, dimension, shared_strings, date_styles,
+                    columns, header_marker, usage,
+                ):
+                    yield sheet_name, values
+            except (KeyError, IndexError, ET.ParseError, ValueError) as e:
+                raise UnsupportedXlsxError(f"{sheet_name}: {e}") from e
+            if sst_usage is not None:
+                sst_usage[sheet_name] = usage[0]
+
+
+def _open_archive(path):
+    try:
+        return zipfile.ZipFile(path)
+    except (OSError, zipfile.BadZipFile) as e:
+        raise UnsupportedXlsxError(str(e)) from e
+
+
+# ========== 工作簿结构 ==========
+
+def _read_workbook(archive):
+    """
+    返回:
+        sheets: list[(sheet名, 工作表XML路径)] - 按工作簿中的顺序
+        sst_path: str | None - 共享字符串表路径
+        styles_path: str | None - 样式表路径
+    """
+    workbook_path = "xl/workbook.xml"
+    for rel in _read_rels(archive, "_rels/.rels"):
+        if rel["type"].endswith("/officeDocument"):
+            workbook_path = _resolve_target("", rel["target"])
+
+    base = posixpath.dirname(workbook_path)
+    rels_path = posixpath.join(base, "_rels", posixpath.basename(workbook_path) + ".rels")
+    rels = {}
+    sst_path = styles_path = None
+    for rel in _read_rels(archive, rels_path):
+        target = _resolve_target(base, rel["target"])
+        rels[rel["id"]] = (rel["type"], target)
+        if rel["type"].endswith("/sharedStrings"):
+            sst_path = target
+        elif rel["type"].endswith("/styles"):
+            styles_path = target
+
+    root = ET.fromstring(archive.read(workbook_path))
+    if root.tag != f"{{{_NS_MAIN}}}workbook":
+        raise UnsupportedXlsxError(f"非标准工作簿命名空间: {root.tag}")
+
+    names = set(archive.namelist())
+    sheets = []
+    for sheet in root.iter(f"{{{_NS_MAIN}}}sheet"):
+        rel_type, target = rels[sheet.get(f"{{{_NS_REL}}}id")]
+        if target not in names:
+            continue  # openpyxl 同样跳过缺失的工作表
+        if not rel_type.endswith("/worksheet"):
+            raise UnsupportedXlsxError(f"不支持的工作表类型: {rel_type}")
+        sheets.append((sheet.get("name"), target))
+    return sheets, sst_path, styles_path
+
+
+def _read_rels(archive, rels_path):
+    if rels_path not in archive.namelist():
+        return []
+    root = ET.fromstring(archive.read(rels_path))
+    return [
+        {"id": rel.get("Id"), "type": rel.get("Type", ""), "target": rel.get("Target", "")}
+        for rel in root.iter(f"{{{_NS_PKG_REL}}}Relationship")
+    ]
+
+
+def _resolve_target(base, target):
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(base, target))
+
+
+def _read_shared_strings(archive, sst_path):
+    """共享字符串表（与 openpyxl 一致: 纯文本 + 富文本各段拼接，忽略注音，去除 x005F_）"""
+    strings = []
+    if not sst_path or sst_path not in archive.namelist():
+        return strings
+    with archive.open(sst_path) as f:
+        for _, element in ET.iterparse(f):
+            if element.tag == _TAG_SI:
+                strings.append(_text_content(element).replace("x005F_", ""))
+                element.clear()
+    return strings
+
+
+def _read_date_styles(archive, styles_path):
+    """可能为日期格式的单元格样式下标集合（宁多勿少，命中即回退 openpyxl）"""
+    if not styles_path or styles_path not in archive.namelist():
+        return set()
+    root = ET.fromstring(archive.read(styles_path))
+
+    custom_formats = {}
+    num_fmts = root.find(f"{{{_NS_MAIN}}}numFmts")
+    if num_fmts is not None:
+        for fmt in num_fmts:
+            custom_formats[int(fmt.get("numFmtId"))] = fmt.get("formatCode", "")
+
+    date_styles = set()
+    cell_xfs = root.find(f"{{{_NS_MAIN}}}cellXfs")
+    if cell_xfs is None:
+        return date_styles
+    for idx, xf in enumerate(cell_xfs):
+        fmt_id = int(xf.get("numFmtId", 0))
+        if fmt_id in custom_formats:
+            maybe_date = bool(_DATE_LETTERS.search(custom_formats[fmt_id]))
+        else:
+            maybe_date = fmt_id not in _NON_DATE_BUILTIN_FORMATS
+        if maybe_date:
+            date_styles.add(idx)
+    return date_styles
+
+
+def _read_dimension(archive, sheet_path):
+    """
+    读取 <dimension ref>，返回 (max_col, max_row)，缺失时为 (None, None)。
+
+    openpyxl 只读模式按此截断行列（即使该范围不准确）。
+    """
+    with archive.open(sheet_path) as f:
+        # 只看开始标签，读到 <sheetData> 即停止，不解析行数据
+        for _, element in ET.iterparse(f, events=("start",)):
+            if element.tag == _TAG_DIMENSION:
+                return _range_max(element.get("ref", ""))
+            if element.tag == _TAG_SHEET_DATA:
+                break
+    return None, None
+
+
+def _range_max(ref):
+    """与 openpyxl range_boundaries 一致地取右下角 (max_col, max_row)"""
+    parts = ref.upper().split(":")
+    if len(parts) > 2:
+        raise ValueError(f"无效的范围: {ref}")
+    last = parts[-1]
+    match = _RANGE_PART_RE.match(last)
+    if not match or not (match.group(1) or match.group(2)):
+        raise ValueError(f"无效的范围: {ref}")
+    letters, digits = match.groups()
+    if len(parts) == 1 and not (letters and digits):
+        raise ValueError(f"无效的范围: {ref}")
+    max_col = _column_index(letters) if letters else None
+    max_row = int(digits) if digits else None
+    return max_col, max_row
+
+
+# ========== 工作表 ==========
+
+def _iter_sheet(archive, sheet_path, dimension, shared_strings, date_styles,
+                columns, header_marker, usage):
+    """
+    逐行解析单个工作表，产出表头行之后满足行宽条件的指定列值。
+
+    usage: [int] - 记录结果用到的最大共享字符串下标（原地更新）
+    """
+    max_col, max_row = dimension
+    needed = {col + 1: i for i, col in enumerate(columns)}  # 1起始列号 → 结果位置
+    min_width = max(columns) + 1  # openpyxl 行元组长度须 > max(columns)
+
+    header_found = False
+    counter = 1       # openpyxl 期望的下一行号（乱序/重复的行被忽略）
+    row_counter = 0
+
+    shared_masters = {}  # 共享公式 si → 主单元格公式文本
+    for element in _iter_row_elements(archive, sheet_path):
+        r = element.get("r")
+        row_counter = _row_number(r) if r else row_counter + 1
+        if max_row is not None and row_counter > max_row:
+            break
+        cells = _scan_row(element)
+
+        if row_counter < counter:
+            # openpyxl 丢弃乱序/重复的行，但其中的共享公式仍会登记
+            _track_cells(cells, shared_masters)
+            element.clear()
+            continue
+        counter = row_counter + 1
+
+        # 行宽: 有 dimension 时固定为 max_col，否则为本行最后一个单元格的列号
+        if max_col is not None:
+            width = max_col
+        else:
+            width = cells[-1][0] if cells else 0
+
+        if not header_found:
+            # 按文档顺序检查全部单元格（不短路，保证共享公式登记顺序一致）
+            for column, cell in cells:
+                if _contains_marker(
+                    cell, header_marker, shared_strings, shared_masters, usage
+                ):
+                    header_found = header_found or column <= width
+            element.clear()
+            continue
+
+        if width < min_width:
+            _track_cells(cells, shared_masters)
+            element.clear()
+            continue
+
+        values = [None] * len(columns)
+        for column, cell in cells:
+            if column in needed:
+                values[needed[column]] = _cell_value(
+                    cell, shared_strings, date_styles, shared_masters, usage
+                )
+            else:
+                _track_shared_formula(cell, shared_masters)
+        element.clear()
+        yield tuple(values)
+
+
+def _iter_row_elements(archive, sheet_path):
+    """
+    按文档顺序产出工作表的 <row> 元素。
+
+    逐个元素的 iterparse 事件循环是纯Python开销的大头。Excel 写出的工作表不带前缀，
+    这里按 1MB 分块读取，在最后一个 "</row>" 处切开，把整批行交给C实现的 fromstring
+    一次建树；根元素的命名空间声明原样保留（行属性常带 x14ac: 等前缀）。
+    版面不符合预期（带前缀标签、非UTF-8编码）时改用 iterparse 逐元素解析。
+    """
+    with archive.open(sheet_path) as f:
+        head = b""
+        while b"<sheetData" not in head:
+            chunk = f.read(_CHUNK_SIZE)
+            if not chunk:
+                break
+            head += chunk
+            if len(head) > 16 * _CHUNK_SIZE:
+                break
+
+        root_start = _root_start_tag(head)
+        data_start = head.find(b"<sheetData")
+        if root_start is None or data_start < 0:
+            yield from _iter_row_elements_slow(archive, sheet_path)
+            return
+
+        tag_end = head.find(b">", data_start)
+        if tag_end < 0 or head[tag_end - 1:tag_end] == b"/":
+            return  # <sheetData/>: 空工作表
+        wrapper_open = root_start + b"<sheetData>"
+        wrapper_close = b"</sheetData></worksheet>"
+
+        buffer = head[tag_end + 1:]
+        eof = False
+        while not eof:
+            chunk = f.read(_CHUNK_SIZE)
+            if chunk:
+                buffer += chunk
+                cut = buffer.rfind(b"</row>")
+                if cut < 0:
+                    continue
+                cut += len(b"</row>")
+                batch, buffer = buffer[:cut], buffer[cut:]
+            else:
+                eof = True
+                end = buffer.find(b"</sheetData>")
+                batch = buffer[:end] if end >= 0 else buffer
+
+            root = ET.fromstring(wrapper_open + batch + wrapper_close)
+            for element in root[0]:
+                if element.tag == _TAG_ROW:
+                    yield element
+
+
+def _iter_row_elements_slow(archive, sheet_path):
+    """iterparse 逐元素解析（只订阅结束事件）"""
+    with archive.open(sheet_path) as f:
+        for _, element in ET.iterparse(f):
+            if element.tag == _TAG_ROW:
+                yield element
+
+
+def _root_start_tag(head):
+    """
+    取根元素 <worksheet ...> 的开始标签（bytes），
+    根元素带前缀或XML声明了非UTF-8编码时返回 None。
+    """
+    if head.startswith(b"<?xml"):
+        decl_end = head.find(b"?>")
+        if decl_end < 0:
+            return None
+        match = re.search(rb"encoding\s*=\s*[\"']([^\"']+)", head[:decl_end])
+        if match and match.group(1).lower() not in (b"utf-8", b"utf8"):
+            return None
+    start = head.find(b"<worksheet")
+    if start < 0:
+        return None
+    end = head.find(b">", start)
+    if end < 0:
+        return None
+    return head[start:end + 1]
+
+
+def _scan_row(row):
+    """取出行内单元格: [(列号, 单元格元素)]，按文档顺序"""
+    cells = []
+    col_counter = 0
+    for cell in row:
+        if cell.tag != _TAG_CELL:
+            continue
+        coord = cell.get("r")
+        if coord:
+            col_counter = _coord_column(coord)
+        else:
+            col_counter += 1
+        cells.append((col_counter, cell))
+    return cells
+
+
+def _cell_value(cell, shared_strings, date_styles, shared_masters, usage):
+    """单元格值（同 openpyxl parse_cell，非 data_only 模式）"""
+    data_type = cell.get("t", "n")
+
+    formula = cell.find(_TAG_FORMULA)
+    if formula is not None:
+        return "=" + _formula_text(formula, shared_masters)
+
+    if data_type == "inlineStr":
+        inline = cell.find(_TAG_INLINE)
+        return _text_content(inline) if inline is not None else None
+
+    value = cell.findtext(_TAG_VALUE) or None
+    if value is None:
+        return None
+    if data_type == "n":
+        style_id = int(cell.get("s", 0) or 0)
+        if style_id in date_styles:
+            raise UnsupportedXlsxError("所需列中含日期格式单元格")
+        if "." in value or "E" in value or "e" in value:
+            return float(value)
+        return int(value)
+    if data_type == "s":
+        index = int(value)
+        if index > usage[0]:
+            usage[0] = index
+        return shared_strings[index]
+    if data_type == "b":
+        return bool(int(value))
+    if data_type == "d":
+        raise UnsupportedXlsxError("所需列中含ISO日期单元格")
+    return value  # str / e
+
+
+def _formula_text(formula, shared_masters):
+    """公式文本（不含 "="）；需要平移引用的共享公式从属单元格无法还原"""
+    formula_type = formula.get("t")
+    if formula_type == "array":
+        raise UnsupportedXlsxError("所需列中含数组公式")
+    if formula_type == "shared":
+        si = formula.get("si")
+        if si in shared_masters:
+            raise UnsupportedXlsxError("所需列中含共享公式")
+        if formula.text is not None:
+            shared_masters[si] = formula.text
+    return formula.text or ""
+
+
+def _track_cells(cells, shared_masters):
+    for _, cell in cells:
+        _track_shared_formula(cell, shared_masters)
+
+
+def _track_shared_formula(cell, shared_masters):
+    """记录非所需列中的共享公式主单元格（后续从属单元格的判断依赖它）"""
+    formula = cell.find(_TAG_FORMULA)
+    if formula is not None and formula.get("t") == "shared":
+        si = formula.get("si")
+        if si not in shared_masters and formula.text is not None:
+            shared_masters[si] = formula.text
+
+
+def _contains_marker(cell, marker, shared_strings, shared_masters, usage):
+    """
+    表头检测: 单元格文本是否包含标记。
+
+    只有字符串和公式可能包含标记文本；共享公式平移只改变引用、不改变字面量，
+    从属单元格按主单元格公式文本判断。
+    """
+    formula = cell.find(_TAG_FORMULA)
+    if formula is not None:
+        si = formula.get("si")
+        if formula.get("t") == "shared" and si in shared_masters:
+            return marker in shared_masters[si]
+        _track_shared_formula(cell, shared_masters)
+        return marker in (formula.text or "")
+
+    data_type = cell.get("t", "n")
+    if data_type == "inlineStr":
+        inline = cell.find(_TAG_INLINE)
+        return inline is not None and marker in _text_content(inline)
+    if data_type in ("s", "str", "e"):
+        value = cell.findtext(_TAG_VALUE) or None
+        if value is None:
+            return False
+        if data_type == "s":
+            index = int(value)
+            if index > usage[0]:
+                usage[0] = index
+            value = shared_strings[index]
+        return marker in value
+    return False
+
+
+# ========== 工具函数 ==========
+
+def _text_content(element):
+    """<si>/<is> 的文本: 直接 <t> 加各富文本段 <r><t>（忽略注音 <rPh>）"""
+    if len(element) == 1 and element[0].tag == _TAG_TEXT:
+        return element[0].text or ""  # 最常见: 仅一个纯文本 <t>
+    parts = []
+    plain = element.find(_TAG_TEXT)
+    if plain is not None and plain.text:
+        parts.append(plain.text)
+    for run in element.findall(_TAG_RUN):
+        text = run.find(_TAG_TEXT)
+        if text is not None and text.text:
+            parts.append(text.text)
+    return "".join(parts)
+
+
+_column_cache = {}  # 坐标去掉行号后的部分（如 "B"、"$B$"）→ 列号
+
+
+def _coord_column(coord):
+    """单元格坐标 → 1起始列号，校验规则同 openpyxl coordinate_from_string"""
+    key = coord.rstrip("0123456789")
+    index = _column_cache.get(key)
+    if index is None or key == coord:
+        match = _COORD_RE.match(coord)
+        if not match:
+            raise ValueError(f"无效的单元格坐标: {coord}")
+        index = _column_index(match.group(1).upper())
+        _column_cache[key] = index
+    return index
+
+
+def _column_index(letters):
+    """列字母 → 1起始列号（A=1）"""
+    index = 0
+    for ch in letters:
+        index = index * 26 + ord(ch) - 64
+    return index
+
+
+def _row_number(value):
+    try:
+        return int(value)
+    except ValueError:
+        number = float(value)
+        if not number.is_integer():
+            raise
+        return int(number)
@@ -0,0 +1,225 @@
+"""xlsx 流式写出模块 - 不经 openpyxl，直接把 SpreadsheetML 写入 zip 压缩流
+
+供导出超大工厂导入文件使用（见 excel_writer，config.EXCEL_WRITER_BACKEND = "xml"）。
+只支持导入模板需要的最小功能，结构固定:
+  - 单个工作表，第一行为表头（加粗、居中、细边框），其余为数据行（垂直居中、细边框）
+  - 自定义列宽
+  - 字符串以内联字符串写出（不建共享字符串表，内存不随行数增长），数值/布尔原样写出
+
+行按块编码后写入压缩流，整个文件任何时刻只有一块行数据在内存中。
+openpyxl 读回的单元格值、列宽和格式与 excel_writer 的 openpyxl 路径一致
+（benchmark.py xlsx 可校验）。
+"""
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+_ROWS_PER_CHUNK = 2000
+# 日期、料号、固定值等大量重复，缓存单元格值对应的XML片段（超过上限时清空，内存有界）
+_TAIL_CACHE_SIZE = 20000
+# 导出文件的XML重复度很高，最低压缩级别下体积相差不大，速度快数倍
+_COMPRESS_LEVEL = 1
+
+# XML 1.0 不允许的控制字符（openpyxl 写入时会报错，这里直接去除）
+_ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_STYLE_HEADER = 1
+_STYLE_DATA = 2
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# 样式: 0=默认, 1=表头（加粗11号、水平垂直居中、细边框）, 2=数据（垂直居中、细边框）
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2">'
+    '<font><sz val="11"/><name val="Calibri"/><family val="2"/><scheme val="minor"/></font>'
+    '<font><b val="1"/><sz val="11"/></font>'
+    '</fonts>'
+    '<fills count="2">'
+    '<fill><patternFill/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    '</fills>'
+    '<borders count="2">'
+    '<border><left/><right/><top/><bottom/><diagonal/></border>'
+    '<border><left style="thin"/><right style="thin"/><top style="thin"/>'
+    '<bottom style="thin"/><diagonal/></border>'
+    '</borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="1" xfId="0" '
+    'applyFont="1" applyBorder="1" applyAlignment="1">'
+    '<alignment horizontal="center" vertical="center"/></xf>'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="1" xfId="0" '
+    'applyBorder="1" applyAlignment="1">'
+    '<alignment vertical="center"/></xf>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+def write_table_xlsx(path, header, rows, widths=None, sheet_name="Sheet1"):
+    """
+    流式写出一个单表 xlsx。
+
+    参数:
+        path: str - 输出文件路径
+        header: list[str] - 表头（列数以表头为准）
+        rows: Iterable[Sequence] - 数据行（每行与表头等长的值序列，可为生成器）；
+              值为 None / "" 时写出仅带格式的空单元格
+        widths: list[float] | None - 各列列宽（None 使用 Excel 默认列宽）
+        sheet_name: str - 工作表名
+
+    返回:
+        int - 写出的数据行数
+    """
+    letters = [_col_letter(i) for i in range(1, len(header) + 1)]
+    count = 0
+    with zipfile.ZipFile(
+        path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=_COMPRESS_LEVEL
+    ) as archive:
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _ROOT_RELS)
+        archive.writestr("xl/workbook.xml", _workbook_xml(sheet_name))
+        archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        archive.writestr("xl/styles.xml", _STYLES)
+
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(_sheet_head(widths).encode("utf-8"))
+            tails = {}
+            sheet.write(_row_xml(1, header, letters, _STYLE_HEADER, tails).encode("utf-8"))
+
+            chunk = []
+            for values in rows:
+                count += 1
+                chunk.append(_row_xml(count + 1, values, letters, _STYLE_DATA, tails))
+                if len(chunk) >= _ROWS_PER_CHUNK:
+                    sheet.write("".join(chunk).encode("utf-8"))
+                    chunk = []
+            if chunk:
+                sheet.write("".join(chunk).encode("utf-8"))
+            sheet.write(b"</sheetData></worksheet>")
+    return count
+
+
+def _workbook_xml(sheet_name):
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(sheet_name, {chr(34): "&quot;"})}" sheetId="1" r:id="rId1"/>'
+        '</sheets></workbook>'
+    )
+
+
+def _sheet_head(widths):
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    ]
+    if widths:
+        parts.append("<cols>")
+        for idx, width in enumerate(widths, 1):
+            parts.append(f'<col min="{idx}" max="{idx}" width="{width:g}" customWidth="1"/>')
+        parts.append("</cols>")
+    parts.append("<sheetData>")
+    return "".join(parts)
+
+
+def _row_xml(row_number, values, letters, style, tails):
+    """一行的XML（列数以 letters 为准，多出的值忽略、不足的补空单元格）"""
+    rn = str(row_number)
+    cells = [f'<row r="{rn}">']
+    append = cells.append
+    for letter, value in zip(letters, _pad(values, len(letters))):
+        if isinstance(value, bool):
+            tail = _cell_tail(value)  # True/False 与 1/0 相等，不能共用缓存
+        else:
+            try:
+                tail = tails[value]
+            except KeyError:
+                tail = _cell_tail(value)
+                if len(tails) >= _TAIL_CACHE_SIZE:
+                    tails.clear()
+                tails[value] = tail
+            except TypeError:  # 不可哈希的值
+                tail = _cell_tail(value)
+        append(f'<c r="{letter}{rn}" s="{style}"{tail}')
+    append("</row>")
+    return "".join(cells)
+
+
+def _cell_tail(value):
+    """单元格中引用和样式之后的部分（类型属性 + 值）"""
+    if value is None or value == "":
+        return "/>"
+    if isinstance(value, bool):
+        return f' t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f"><v>{_number(value)}</v></c>"
+    return f' t="inlineStr"><is>{_text(str(value))}</is></c>'
+
+
+def _pad(values, width):
+    values = list(values)
+    if len(values) < width:
+        values.extend([None] * (width - len(values)))
+    return values
+
+
+def _number(value):
+    """数值文本（整数值的浮点数写成整数，与 openpyxl 读回的值一致）"""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _text(text):
+    text = escape(_ILLEGAL_XML_CHARS.sub("", text))
+    if text[:1].isspace() or text[-1:].isspace():
+        return f'<t xml:space="preserve">{text}</t>'
+    return f"<t>{text}</t>"
+
+
+def _col_letter(col_idx):
+    """将列号转为Excel列字母（1=A, 27=AA）"""
+    result = ""
+    while col_idx > 0:
+        col_idx, remainder = divmod(col_idx - 1, 26)
+        result = chr(65 + remainder) + result
+    return result